@@ -1,9 +1,17 @@
 # academique/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Filiere, EtudiantAcademique, DocumentEtudiant, ImportEtudiant
+from django.utils import timezone
+from django.http import FileResponse
+from django.db import transaction
+import tempfile
+from .models import Filiere, EtudiantAcademique, DocumentEtudiant, ImportEtudiant, ExportJob
+from .exports import ExportService
+from .pdf import FicheService, SEUIL_FICHES_DIRECTES
+from .dossiers import DossierService
 
 @admin.register(Filiere)
 class FiliereAdmin(admin.ModelAdmin):
@@ -56,7 +64,7 @@ class EtudiantAcademiqueAdmin(admin.ModelAdmin):
         'statut_inscription', 'statut_validation', 'documents_status'
     ]
     list_filter = [
-        'statut_inscription', 'statut_validation', 'filiere',
+        'statut_inscription', 'statut_validation', 'dossier_complet', 'filiere',
         'nationalite', 'date_inscription'
     ]
     search_fields = [
@@ -92,8 +100,8 @@ class EtudiantAcademiqueAdmin(admin.ModelAdmin):
     nom_complet.short_description = "Nom complet"
     
     def documents_status(self, obj):
-        total_docs = obj.documents.count()
-        docs_valides = obj.documents.filter(valide=True).count()
+        total_docs = obj.nb_documents
+        docs_valides = obj.nb_documents_valides
         
         if total_docs == 0:
             return format_html('<span style="color: red;">Aucun document</span>')
@@ -102,12 +110,12 @@ class EtudiantAcademiqueAdmin(admin.ModelAdmin):
         color = 'green' if percentage == 100 else 'orange' if percentage > 50 else 'red'
         
         return format_html(
-            '<span style="color: {};">{}/{} ({:.0f}%)</span>',
-            color, docs_valides, total_docs, percentage
+            '<span style="color: {};">{}/{} ({}%)</span>',
+            color, docs_valides, total_docs, round(percentage)
         )
     documents_status.short_description = "Documents"
     
-    actions = ['valider_etudiants', 'rejeter_etudiants', 'exporter_excel']
+    actions = ['valider_etudiants', 'rejeter_etudiants', 'exporter_excel', 'fiches_pdf_zip', 'fiches_pdf_fusion']
     
     def valider_etudiants(self, request, queryset):
         updated = queryset.update(
@@ -121,6 +129,65 @@ class EtudiantAcademiqueAdmin(admin.ModelAdmin):
         updated = queryset.update(statut_validation='rejete')
         self.message_user(request, f'{updated} étudiant(s) rejeté(s).')
     rejeter_etudiants.short_description = "Rejeter les étudiants sélectionnés"
+    
+    def _fiches_en_file(self, request, queryset, format_export):
+        """
+        Lot volumineux : confié à la file des exports (process_exports) plutôt que
+        produit dans la requête. Retourne False pour un petit lot, servi directement.
+        """
+        ids = list(queryset.values_list('id', flat=True)[:SEUIL_FICHES_DIRECTES + 1])
+        if len(ids) <= SEUIL_FICHES_DIRECTES:
+            return False
+        ids = sorted(queryset.values_list('id', flat=True))
+        job, _ = ExportService.demander_export(
+            request.user, format_export, filtres={'ids': ','.join(map(str, ids))}
+        )
+        lien = reverse('admin:academique_exportjob_change', args=[job.pk])
+        self.message_user(request, format_html(
+            '{} fiches : export <a href="{}">#{}</a> mis en file, fichier disponible une fois terminé.',
+            len(ids), lien, job.pk
+        ))
+        return True
+    
+    def fiches_pdf_zip(self, request, queryset):
+        if self._fiches_en_file(request, queryset, 'fiches_zip'):
+            return None
+        etudiants = queryset.select_related('filiere').order_by('filiere__code', 'nom', 'prenoms')
+        # Petit lot dans la requête : rendu séquentiel, pas de pool de processus dans le serveur web
+        resultat = FicheService.generer_fiches(etudiants.iterator(chunk_size=2000), workers=1)
+        
+        archive = tempfile.TemporaryFile()
+        FicheService.ecrire_zip(resultat['chemins'], archive)
+        archive.seek(0)
+        return FileResponse(
+            archive,
+            as_attachment=True,
+            filename=f"fiches_inscription_{timezone.now().strftime('%Y%m%d')}.zip",
+            content_type='application/zip',
+        )
+    fiches_pdf_zip.short_description = "Fiches d'inscription PDF (ZIP par filière)"
+    
+    def fiches_pdf_fusion(self, request, queryset):
+        if self._fiches_en_file(request, queryset, 'fiches_pdf'):
+            return None
+        etudiants = queryset.select_related('filiere').order_by('filiere__code', 'nom', 'prenoms')
+        resultat = FicheService.generer_fiches(etudiants.iterator(chunk_size=2000), workers=1)
+        
+        fusion = tempfile.TemporaryFile()
+        try:
+            FicheService.ecrire_fusion(resultat['chemins'], fusion)
+        except ImproperlyConfigured as e:
+            fusion.close()
+            self.message_user(request, str(e), level=messages.ERROR)
+            return None
+        fusion.seek(0)
+        return FileResponse(
+            fusion,
+            as_attachment=True,
+            filename=f"fiches_inscription_{timezone.now().strftime('%Y%m%d')}.pdf",
+            content_type='application/pdf',
+        )
+    fiches_pdf_fusion.short_description = "Fiches d'inscription PDF (un seul fichier)"
 
 
 @admin.register(DocumentEtudiant)
@@ -148,12 +215,19 @@ class DocumentEtudiantAdmin(admin.ModelAdmin):
     actions = ['valider_documents', 'invalider_documents']
     
     def valider_documents(self, request, queryset):
-        updated = queryset.update(valide=True, valide_par=request.user)
+        with transaction.atomic():
+            etudiant_ids = list(queryset.values_list('etudiant_id', flat=True))
+            updated = queryset.update(valide=True, valide_par=request.user)
+            # update() n'envoie pas de signal : compteurs des dossiers recalculés ici
+            DossierService.recalculer(etudiant_ids)
         self.message_user(request, f'{updated} document(s) validé(s).')
     valider_documents.short_description = "Valider les documents sélectionnés"
     
     def invalider_documents(self, request, queryset):
-        updated = queryset.update(valide=False, valide_par=None)
+        with transaction.atomic():
+            etudiant_ids = list(queryset.values_list('etudiant_id', flat=True))
+            updated = queryset.update(valide=False, valide_par=None)
+            DossierService.recalculer(etudiant_ids)
         self.message_user(request, f'{updated} document(s) invalidé(s).')
     invalider_documents.short_description = "Invalider les documents sélectionnés"
 
@@ -182,4 +256,21 @@ class ImportEtudiantAdmin(admin.ModelAdmin):
     taux_succes.short_description = "Taux de succès"
     
     def has_add_permission(self, request):
-        return False  # Import se fait via interface dédiée
\ No newline at end of file
+        return False  # Import se fait via interface dédiée
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'format_export', 'inclure_documents', 'statut',
+        'nombre_lignes', 'demande_par', 'date_creation', 'date_fin'
+    ]
+    list_filter = ['statut', 'format_export', 'date_creation']
+    readonly_fields = [
+        'format_export', 'inclure_documents', 'filtres', 'filtres_hash',
+        'statut', 'fichier', 'nombre_lignes', 'erreur', 'demande_par',
+        'date_creation', 'date_debut', 'date_fin'
+    ]
+    
+    def has_add_permission(self, request):
+        return False  # Les exports se demandent depuis la liste des étudiants
@@ -0,0 +1,188 @@
+# academique/apercus.py
+"""
+Aperçus légers des documents étudiants, pour la validation sans ouvrir les
+fichiers complets (jusqu'à 5 Mo).
+
+- Images (JPG, PNG) : réduites à APERCUS_TAILLE pixels de côté, en JPEG.
+- PDF : PNG de la première page. Sans moteur de rendu (outillage pur Python),
+  la page est représentée par sa plus grande image intégrée — le scan, pour
+  les pièces numérisées — ou, à défaut, par une page dessinée avec le début
+  de son texte. Nécessite pypdf ; sans lui, une vignette générique est produite.
+
+Les aperçus sont produits hors requête par la commande generer_apercus,
+qui consomme les documents au statut 'en_attente'.
+"""
+import logging
+import os
+import textwrap
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from .models import DocumentEtudiant
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS_IMAGE = {'.jpg', '.jpeg', '.png'}
+
+
+def taille_apercu():
+    return getattr(settings, 'APERCUS_TAILLE', 480)
+
+
+def reduire(image, taille):
+    """Image RGB réduite pour tenir dans un carré de `taille` pixels (proportions conservées)"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        fond = Image.new('RGB', image.size, 'white')
+        fond.paste(image, mask=image.convert('RGBA').split()[-1])
+        image = fond
+    image.thumbnail((taille, taille), Image.Resampling.LANCZOS)
+    return image.convert('RGB')
+
+
+def apercu_image(flux, taille):
+    image = Image.open(flux)
+    # JPEG : décodage directement à une résolution réduite (bien plus rapide qu'un décodage complet)
+    image.draft('RGB', (taille, taille))
+    return reduire(image, taille)
+
+
+def page_dessinee(taille, lignes, titre='PDF'):
+    """Page blanche au format A4 portant un titre et quelques lignes de texte"""
+    largeur, hauteur = int(taille * 0.707), taille
+    page = Image.new('RGB', (largeur, hauteur), 'white')
+    dessin = ImageDraw.Draw(page)
+    police = ImageFont.load_default()
+    dessin.rectangle([0, 0, largeur - 1, hauteur - 1], outline='#d1d5db')
+    dessin.rectangle([0, 0, largeur, 28], fill='#dc2626')
+    dessin.text((10, 8), titre, fill='white', font=police)
+    y = 40
+    for ligne in lignes:
+        if y > hauteur - 16:
+            break
+        dessin.text((10, y), ligne, fill='#374151', font=police)
+        y += 14
+    return page
+
+
+def apercu_pdf(flux, taille):
+    if PdfReader is None:
+        return page_dessinee(taille, ['Aperçu indisponible'])
+
+    lecteur = PdfReader(flux)
+    if not lecteur.pages:
+        return page_dessinee(taille, ['Document vide'])
+    page = lecteur.pages[0]
+    titre = f"PDF - {len(lecteur.pages)} page{'s' if len(lecteur.pages) > 1 else ''}"
+
+    # Pièce numérisée : la plus grande image de la page est le scan lui-même
+    meilleure = None
+    try:
+        for image in page.images:
+            pil = image.image
+            if pil is not None and (meilleure is None or pil.width * pil.height > meilleure.width * meilleure.height):
+                meilleure = pil
+    except Exception as e:
+        logger.info(f"Aperçu : images du PDF illisibles ({e})")
+    if meilleure is not None:
+        return reduire(meilleure, taille)
+
+    texte = (page.extract_text() or '').strip()
+    largeur_ligne = max(int(taille * 0.707 / 6.5), 20)
+    lignes = [
+        morceau
+        for paragraphe in texte.splitlines()[:60]
+        for morceau in (textwrap.wrap(paragraphe, largeur_ligne) or [''])
+    ]
+    return page_dessinee(taille, lignes or ['(aucun texte)'], titre)
+
+
+class ApercuService:
+    """File d'attente et production des aperçus de documents"""
+
+    @staticmethod
+    def reserver_prochain():
+        """Passe le plus ancien document sans aperçu à 'en_cours' et le retourne (None si file vide)"""
+        candidats = DocumentEtudiant.objects.filter(
+            apercu_statut='en_attente'
+        ).order_by('date_upload').values_list('id', flat=True)[:10]
+
+        for document_id in candidats:
+            # UPDATE conditionnel : un seul worker peut réserver le document
+            reserve = DocumentEtudiant.objects.filter(id=document_id, apercu_statut='en_attente').update(
+                apercu_statut='en_cours'
+            )
+            if reserve:
+                return DocumentEtudiant.objects.get(id=document_id)
+        return None
+
+    @staticmethod
+    def generer(document):
+        """
+        Produit et enregistre l'aperçu d'un document ; retourne le statut final.
+        L'aperçu n'est écrit que si le fichier lu est toujours celui du document :
+        un fichier remplacé pendant la génération garde son propre aperçu en file,
+        un document supprimé entre-temps (rejet) renvoie 'supprime'.
+        """
+        taille = taille_apercu()
+        # Nom dans le stockage par adresse de contenu : change avec le contenu du fichier
+        source = document.fichier.name
+        extension = os.path.splitext(source)[1].lower()
+        contenu = None
+        try:
+            with document.fichier.open('rb') as f:
+                flux = BytesIO(f.read())
+            if extension == '.pdf':
+                image = apercu_pdf(flux, taille)
+                format_image, suffixe = 'PNG', 'png'
+                options = {'optimize': True}
+            elif extension in EXTENSIONS_IMAGE:
+                image = apercu_image(flux, taille)
+                format_image, suffixe = 'JPEG', 'jpg'
+                options = {'quality': 80, 'optimize': True}
+            else:
+                raise ValueError(f"Type de fichier non pris en charge : {extension or '?'}")
+
+            sortie = BytesIO()
+            image.save(sortie, format_image, **options)
+            contenu = ContentFile(sortie.getvalue(), name=f"apercu_{document.pk}.{suffixe}")
+            statut = 'pret'
+        except Exception as e:
+            logger.warning(f"Aperçu du document #{document.pk} impossible : {e}")
+            statut = 'echec'
+
+        # Écriture conditionnelle sous verrou de ligne : rien n'est écrit, pas même le fichier,
+        # si le document a été supprimé ou son fichier remplacé entre-temps (le dépôt a remis le
+        # document 'en_attente'). save() plutôt qu'update() pour le comptage des références du stockage.
+        with transaction.atomic():
+            actuel = DocumentEtudiant.objects.select_for_update().filter(
+                pk=document.pk
+            ).values_list('fichier', 'apercu_statut').first()
+            if actuel == (source, 'en_cours'):
+                if contenu is not None:
+                    document.apercu.save(contenu.name, contenu, save=False)
+                document.apercu_statut = statut
+                # update_fields : pas de recalcul des compteurs du dossier
+                document.save(update_fields=['apercu', 'apercu_statut'])
+                return statut
+
+        if actuel is None:
+            logger.info(f"Document #{document.pk} supprimé pendant la génération : aperçu abandonné")
+            return 'supprime'
+        logger.info(f"Document #{document.pk} remplacé pendant la génération : aperçu abandonné")
+        document.refresh_from_db(fields=['fichier', 'apercu', 'apercu_statut'])
+        return document.apercu_statut
+
+    @staticmethod
+    def relancer(statuts=('echec', 'en_cours')):
+        """Remet en file les documents en échec ou restés 'en_cours' (worker interrompu)"""
+        return DocumentEtudiant.objects.filter(apercu_statut__in=statuts).update(apercu_statut='en_attente')
@@ -0,0 +1,127 @@
+# academique/archives.py
+"""
+Archives ZIP des dossiers étudiants, produites à la volée.
+
+L'archive est écrite par zipfile dans un tampon que l'on vide après chaque
+bloc : rien n'est conservé en mémoire ni sur disque au-delà du bloc en cours,
+et le premier octet part dès que le premier fichier est lu. Les pièces sont
+déjà compressées (PDF, JPEG) : elles sont stockées sans recompression.
+"""
+import logging
+import os
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+
+from .models import DocumentEtudiant
+
+logger = logging.getLogger(__name__)
+
+TAILLE_BLOC = 64 * 1024
+
+
+class _TamponFlux:
+    """Fichier en écriture seule et non positionnable : zipfile y ajoute des descripteurs de données"""
+
+    def __init__(self):
+        self._morceaux = []
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux = []
+        return data
+
+
+def entrees_documents(documents):
+    """
+    Liste (nom dans l'archive, chemin dans le stockage) pour un queryset de DocumentEtudiant.
+    Une ligne de trois chaînes par pièce : le queryset est évalué avant de commencer le flux.
+    """
+    lignes = documents.exclude(fichier='').values_list(
+        'etudiant__numero_matricule', 'etudiant__nom', 'type_document', 'fichier'
+    ).order_by('etudiant__numero_matricule', 'type_document')
+
+    entrees = []
+    for matricule, nom, type_document, fichier in lignes:
+        extension = os.path.splitext(fichier)[1].lower()
+        dossier = f"{matricule}_{slugify(nom)}" if nom else matricule
+        entrees.append((f"{dossier}/{type_document}{extension}", fichier))
+    return entrees
+
+
+def flux_zip(entrees):
+    """Générateur des octets de l'archive ZIP"""
+    tampon = _TamponFlux()
+    manquants = []
+
+    with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for nom_archive, chemin in entrees:
+            try:
+                source = default_storage.open(chemin, 'rb')
+            except OSError:
+                logger.warning(f"Fichier introuvable pour l'archive : {chemin}")
+                manquants.append(nom_archive)
+                continue
+
+            with source, archive.open(nom_archive, 'w') as cible:
+                for bloc in source.chunks(TAILLE_BLOC):
+                    cible.write(bloc)
+                    yield tampon.vider()
+            yield tampon.vider()
+
+        if manquants:
+            archive.writestr('FICHIERS_MANQUANTS.txt', '\n'.join(manquants) + '\n')
+
+    yield tampon.vider()
+
+
+async def _flux_zip_async(entrees):
+    """Même flux, consommé bloc par bloc dans un thread (sous ASGI, un itérateur synchrone serait mis en mémoire)"""
+    generateur = flux_zip(entrees)
+    fin = object()
+    while True:
+        bloc = await sync_to_async(next, thread_sensitive=False)(generateur, fin)
+        if bloc is fin:
+            break
+        if bloc:
+            yield bloc
+
+
+def reponse_zip(request, entrees, nom_fichier):
+    """StreamingHttpResponse d'une archive ZIP adaptée au serveur (WSGI ou ASGI)"""
+    if isinstance(request, ASGIRequest):
+        contenu = _flux_zip_async(entrees)
+    else:
+        contenu = (bloc for bloc in flux_zip(entrees) if bloc)
+
+    response = StreamingHttpResponse(contenu, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    # Désactive la mise en tampon d'un éventuel reverse proxy (nginx)
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ArchiveService:
+    """Sélection des pièces à archiver"""
+
+    @staticmethod
+    def documents_etudiant(etudiant):
+        return entrees_documents(DocumentEtudiant.objects.filter(etudiant=etudiant))
+
+    @staticmethod
+    def documents_en_attente_filiere(filiere, type_document=None):
+        documents = DocumentEtudiant.objects.filter(etudiant__filiere=filiere, valide=False)
+        if type_document:
+            documents = documents.filter(type_document=type_document)
+        return entrees_documents(documents)
@@ -0,0 +1,168 @@
+# academique/dossiers.py
+"""
+État du dossier d'un étudiant (pièces fournies, manquantes, validées,
+progression du profil), calculé à partir d'un seul chargement des documents.
+
+Pour une page d'étudiants, DossierService.charger() précharge les documents
+de tous en une requête (prefetch_related) : l'affichage de l'état de chaque
+ligne ne coûte alors plus aucune requête.
+
+Les compteurs dénormalisés d'EtudiantAcademique (nb_documents,
+nb_documents_valides, dossier_complet) sont recalculés par
+DossierService.recalculer(), appelé par DocumentEtudiant.save()/delete() et
+après les mises à jour en masse ; filtrer_dossiers() s'appuie dessus.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q, prefetch_related_objects
+
+from .models import DocumentEtudiant, EtudiantAcademique
+
+TYPES_DOCUMENT = [code for code, _ in DocumentEtudiant.TYPE_DOCUMENT_CHOICES]
+
+TAILLE_LOT = 2000
+
+ETAT_DOSSIER_CHOICES = [
+    ('complet', 'Dossier complet'),
+    ('incomplet', 'Pièces manquantes'),
+    ('tous_valides', 'Pièces fournies toutes validées'),
+    ('en_attente', 'Pièces en attente de validation'),
+]
+
+TRI_CHOICES = [
+    ('recents', 'Plus récents'),
+    ('progression', 'Progression du profil'),
+    ('documents_valides', 'Documents validés'),
+]
+
+# Ordre de chaque tri (compatible avec la pagination par curseur)
+TRIS_ETUDIANTS = {
+    'recents': ('-date_inscription', 'id'),
+    'progression': ('-progression', 'id'),
+    'documents_valides': ('-nb_documents_valides', 'id'),
+}
+
+
+class EtatDossier:
+    """Pièces et progression d'un étudiant, calculées en mémoire"""
+
+    def __init__(self, etudiant, documents):
+        self.documents = list(documents)
+        self.types_fournis = {document.type_document for document in self.documents}
+        self.documents_manquants = [t for t in TYPES_DOCUMENT if t not in self.types_fournis]
+        self.total = len(self.documents)
+        self.valides = sum(1 for document in self.documents if document.valide)
+        self.en_attente = self.total - self.valides
+        self.progression = DossierService.progression_profil(etudiant)
+
+    @property
+    def complet(self):
+        """Toutes les pièces fournies et validées"""
+        return not self.documents_manquants and self.en_attente == 0
+
+    @property
+    def stats(self):
+        return {'total': self.total, 'valides': self.valides, 'en_attente': self.en_attente}
+
+
+class DossierService:
+    """Calcul de l'état des dossiers sans requête par type de pièce ni par étudiant"""
+
+    @staticmethod
+    def prefetch(queryset=None):
+        """Prefetch des documents, à passer à prefetch_related()"""
+        return Prefetch('documents', queryset=queryset if queryset is not None else DocumentEtudiant.objects.all())
+
+    @staticmethod
+    def etat(etudiant):
+        """
+        État du dossier d'un étudiant. Utilise les documents préchargés s'ils
+        le sont, sinon les charge en une requête.
+        """
+        return EtatDossier(etudiant, etudiant.documents.all())
+
+    @staticmethod
+    def charger(etudiants, queryset=None):
+        """
+        Précharge les documents d'une liste (ou page) d'étudiants en une requête et
+        pose `etudiant.dossier` sur chacun. Retourne la liste des étudiants.
+        """
+        etudiants = list(etudiants)
+        prefetch_related_objects(etudiants, DossierService.prefetch(queryset))
+        for etudiant in etudiants:
+            etudiant.dossier = DossierService.etat(etudiant)
+        return etudiants
+
+    @staticmethod
+    def progression_profil(etudiant):
+        """Pourcentage des champs importants du profil renseignés"""
+        return etudiant.calculer_progression()
+
+    @staticmethod
+    def recalculer(etudiant_ids):
+        """
+        Recalcule les compteurs dénormalisés des étudiants donnés à partir de leurs
+        documents. Les lignes étudiant sont verrouillées pendant le calcul : deux
+        recalculs concurrents d'un même dossier s'exécutent l'un après l'autre.
+        Retourne le nombre d'étudiants mis à jour.
+        """
+        etudiant_ids = sorted(set(etudiant_ids))
+        total = 0
+        for debut in range(0, len(etudiant_ids), TAILLE_LOT):
+            lot = etudiant_ids[debut:debut + TAILLE_LOT]
+            with transaction.atomic():
+                existants = list(
+                    EtudiantAcademique.objects.select_for_update().filter(id__in=lot).values_list('id', flat=True)
+                )
+                compteurs = {
+                    ligne['etudiant_id']: (ligne['total'], ligne['valides'])
+                    for ligne in DocumentEtudiant.objects.filter(etudiant_id__in=existants).values(
+                        'etudiant_id'
+                    ).annotate(total=Count('id'), valides=Count('id', filter=Q(valide=True)))
+                }
+                # Un UPDATE par combinaison de compteurs plutôt qu'un par étudiant
+                groupes = defaultdict(list)
+                for etudiant_id in existants:
+                    groupes[compteurs.get(etudiant_id, (0, 0))].append(etudiant_id)
+                for (nb_documents, nb_valides), ids in groupes.items():
+                    EtudiantAcademique.objects.filter(id__in=ids).update(
+                        nb_documents=nb_documents,
+                        nb_documents_valides=nb_valides,
+                        dossier_complet=nb_valides >= len(TYPES_DOCUMENT),
+                    )
+            total += len(existants)
+        return total
+
+    @staticmethod
+    def recalculer_tout(stdout=None):
+        """Recalcule les compteurs et la progression de tous les étudiants"""
+        ids = list(EtudiantAcademique.objects.order_by('id').values_list('id', flat=True))
+        for debut in range(0, len(ids), TAILLE_LOT):
+            lot = ids[debut:debut + TAILLE_LOT]
+            DossierService.recalculer(lot)
+            groupes = defaultdict(list)
+            for etudiant in EtudiantAcademique.objects.filter(id__in=lot).only('id', *EtudiantAcademique.CHAMPS_PROFIL):
+                groupes[etudiant.calculer_progression()].append(etudiant.id)
+            for progression, ids_progression in groupes.items():
+                EtudiantAcademique.objects.filter(id__in=ids_progression).update(progression=progression)
+            if stdout:
+                stdout.write(f"  {min(debut + TAILLE_LOT, len(ids))}/{len(ids)}")
+        return len(ids)
+
+
+def filtrer_dossiers(queryset, etat=None, en_attente_min=None):
+    """Filtres sur l'état du dossier, servis par les colonnes dénormalisées et leurs index"""
+    if etat == 'complet':
+        queryset = queryset.filter(dossier_complet=True)
+    elif etat == 'incomplet':
+        queryset = queryset.filter(nb_documents__lt=len(TYPES_DOCUMENT))
+    elif etat == 'tous_valides':
+        queryset = queryset.filter(nb_documents__gt=0, nb_documents_valides=F('nb_documents'))
+    elif etat == 'en_attente':
+        en_attente_min = max(int(en_attente_min or 0), 1)
+    if en_attente_min:
+        queryset = queryset.alias(
+            en_attente=F('nb_documents') - F('nb_documents_valides')
+        ).filter(en_attente__gte=int(en_attente_min))
+    return queryset
@@ -0,0 +1,365 @@
+# academique/exports.py
+"""
+Exports d'étudiants en arrière-plan.
+
+La vue ne fait qu'enregistrer un ExportJob ; le fichier est produit par la
+commande `python manage.py process_exports`. Deux demandes identiques
+(même format, mêmes filtres) dans la fenêtre EXPORT_CACHE_MINUTES
+réutilisent le même job et donc le même fichier.
+
+Un job resté 'en_cours' plus de EXPORT_DELAI_BLOCAGE_MINUTES (worker arrêté,
+mémoire épuisée, redéploiement) n'est plus réutilisé : il est remis en
+attente à la prochaine demande ou réservation et repris par un worker.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+import openpyxl
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+from administration.routage import utiliser_replique
+
+from .dossiers import filtrer_dossiers
+from .models import DocumentEtudiant, EtudiantAcademique, ExportJob
+from .pdf import FicheService
+from .search import rechercher_etudiants
+
+logger = logging.getLogger(__name__)
+
+# Filtres acceptés (mêmes clés que FiltreEtudiantForm)
+FILTRES_AUTORISES = (
+    'filiere', 'statut_inscription', 'statut_validation', 'recherche',
+    'etat_dossier', 'documents_en_attente',
+    # Sélection explicite (actions de l'admin) : identifiants séparés par des virgules
+    'ids',
+)
+
+EXPORT_HEADERS = [
+    'Matricule', 'Nom', 'Prénoms', 'CNI', 'Téléphone', 'Email',
+    'Filière', 'Statut Inscription', 'Statut Validation', 'Date Inscription'
+]
+
+CONTENT_TYPES = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'pdf': 'application/pdf',
+    'zip': 'application/zip',
+    'fiches_zip': 'application/zip',
+    'fiches_pdf': 'application/pdf',
+}
+
+EXTENSIONS = {'excel': 'xlsx', 'csv': 'csv', 'pdf': 'pdf', 'fiches_zip': 'zip', 'fiches_pdf': 'pdf'}
+
+
+def filtrer_etudiants(queryset, filtres):
+    """Applique les filtres de la liste admin (filière, statuts, dossier, recherche) à un queryset"""
+    filiere = filtres.get('filiere')
+    statut_inscription = filtres.get('statut_inscription')
+    statut_validation = filtres.get('statut_validation')
+    recherche = filtres.get('recherche')
+    ids = filtres.get('ids')
+
+    if ids:
+        queryset = queryset.filter(id__in=[int(i) for i in ids.split(',') if i.strip().isdigit()])
+    if filiere:
+        queryset = queryset.filter(filiere=filiere)
+    if statut_inscription:
+        queryset = queryset.filter(statut_inscription=statut_inscription)
+    if statut_validation:
+        queryset = queryset.filter(statut_validation=statut_validation)
+    queryset = filtrer_dossiers(queryset, filtres.get('etat_dossier'), filtres.get('documents_en_attente'))
+    if recherche:
+        queryset = rechercher_etudiants(queryset, recherche)
+    return queryset
+
+
+class ExportService:
+    """Création, réutilisation et production des exports d'étudiants"""
+
+    @staticmethod
+    def normaliser_filtres(filtres):
+        """Ne garde que les filtres connus et non vides, sous forme de chaînes"""
+        if isinstance(filtres, str):
+            try:
+                filtres = json.loads(filtres) if filtres else {}
+            except ValueError:
+                filtres = {}
+        if not isinstance(filtres, dict):
+            return {}
+
+        normalises = {}
+        for cle in FILTRES_AUTORISES:
+            valeur = filtres.get(cle)
+            if valeur is None:
+                continue
+            valeur = str(getattr(valeur, 'pk', valeur)).strip()
+            if valeur:
+                normalises[cle] = valeur
+        return normalises
+
+    @staticmethod
+    def calculer_hash(format_export, inclure_documents, filtres):
+        """Empreinte stable d'une demande d'export"""
+        payload = json.dumps({
+            'format': format_export,
+            'documents': bool(inclure_documents),
+            'filtres': filtres,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def demander_export(user, format_export, inclure_documents=False, filtres=None):
+        """
+        Retourne un job pour la demande : un job identique en cours ou terminé
+        récemment est réutilisé, sinon un nouveau job est mis en file.
+        """
+        filtres = ExportService.normaliser_filtres(filtres or {})
+        filtres_hash = ExportService.calculer_hash(format_export, inclure_documents, filtres)
+
+        # Un job identique abandonné en cours est remis en attente plutôt que dupliqué
+        ExportService.relancer_jobs_bloques()
+        fenetre = timezone.now() - timedelta(minutes=getattr(settings, 'EXPORT_CACHE_MINUTES', 30))
+        existant = ExportJob.objects.filter(
+            filtres_hash=filtres_hash
+        ).filter(
+            Q(statut='en_attente') |
+            Q(statut='en_cours', date_debut__gte=ExportService.limite_blocage()) |
+            Q(statut='termine', date_fin__gte=fenetre)
+        ).order_by('-date_creation').first()
+
+        if existant and (existant.statut != 'termine' or existant.fichier):
+            return existant, False
+
+        job = ExportJob.objects.create(
+            format_export=format_export,
+            inclure_documents=inclure_documents,
+            filtres=filtres,
+            filtres_hash=filtres_hash,
+            demande_par=user,
+        )
+        return job, True
+
+    @staticmethod
+    def limite_blocage():
+        """Date de début avant laquelle un job 'en_cours' est considéré comme abandonné"""
+        return timezone.now() - timedelta(minutes=getattr(settings, 'EXPORT_DELAI_BLOCAGE_MINUTES', 60))
+
+    @staticmethod
+    def relancer_jobs_bloques(tous=False):
+        """
+        Remet en attente les jobs 'en_cours' abandonnés (tous=True : tous les jobs
+        'en_cours', quand aucun worker ne tourne) ; retourne leur nombre
+        """
+        jobs = ExportJob.objects.filter(statut='en_cours')
+        if not tous:
+            jobs = jobs.filter(Q(date_debut__lt=ExportService.limite_blocage()) | Q(date_debut__isnull=True))
+        relances = jobs.update(statut='en_attente', date_debut=None)
+        if relances:
+            logger.warning(f"{relances} export(s) bloqué(s) remis en attente")
+        return relances
+
+    @staticmethod
+    def reserver_prochain_job():
+        """Passe le plus ancien job en attente à 'en_cours' et le retourne (None si file vide)"""
+        ExportService.relancer_jobs_bloques()
+        candidats = ExportJob.objects.filter(
+            statut='en_attente'
+        ).order_by('date_creation').values_list('id', flat=True)[:10]
+
+        for job_id in candidats:
+            # UPDATE conditionnel : un seul worker peut réserver le job
+            reserve = ExportJob.objects.filter(id=job_id, statut='en_attente').update(
+                statut='en_cours',
+                date_debut=timezone.now()
+            )
+            if reserve:
+                return ExportJob.objects.get(id=job_id)
+        return None
+
+    @staticmethod
+    def executer_job(job):
+        """Produit le fichier du job et met à jour son statut"""
+        try:
+            with tempfile.TemporaryDirectory(prefix='export_') as tmpdir:
+                # Lectures du rapport sur le réplica ; le job lui-même reste sur la base principale
+                with utiliser_replique():
+                    chemin, nom_fichier, nombre_lignes = ExportService._produire_fichier(job, tmpdir)
+                with open(chemin, 'rb') as f:
+                    job.fichier.save(nom_fichier, File(f), save=False)
+
+            job.nombre_lignes = nombre_lignes
+            job.statut = 'termine'
+            job.erreur = ''
+        except Exception as e:
+            logger.exception(f"Erreur export #{job.pk}")
+            job.statut = 'echec'
+            job.erreur = str(e)
+
+        job.date_fin = timezone.now()
+        # UPDATE conditionnel : un job relancé entre-temps appartient à un autre worker
+        ecrit = ExportJob.objects.filter(
+            id=job.pk, statut='en_cours', date_debut=job.date_debut
+        ).update(
+            statut=job.statut,
+            fichier=job.fichier.name or '',
+            nombre_lignes=job.nombre_lignes,
+            erreur=job.erreur,
+            date_fin=job.date_fin,
+        )
+        if not ecrit:
+            logger.warning(f"Export #{job.pk} relancé pendant son exécution : résultat ignoré")
+            if job.fichier:
+                job.fichier.delete(save=False)
+            job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def get_queryset(job):
+        etudiants = EtudiantAcademique.objects.select_related('filiere').order_by('-date_inscription', 'id')
+        return filtrer_etudiants(etudiants, job.filtres)
+
+    @staticmethod
+    def nom_fichier(job, extension):
+        return f"etudiants_{timezone.now().strftime('%Y%m%d_%H%M')}_{job.pk}.{extension}"
+
+    # ------------------------------------------------------------------
+    # Production des fichiers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _produire_fiches(job, etudiants, chemin_export, nom_export):
+        """Fiches d'inscription : cache mis à jour (pool de processus), puis ZIP ou PDF fusionné"""
+        etudiants = etudiants.order_by('filiere__code', 'nom', 'prenoms')
+        resultat = FicheService.generer_fiches(etudiants.iterator(chunk_size=2000))
+        ecrire = FicheService.ecrire_zip if job.format_export == 'fiches_zip' else FicheService.ecrire_fusion
+        ecrire(resultat['chemins'], chemin_export)
+        return chemin_export, nom_export, resultat['total']
+
+    @staticmethod
+    def _produire_fichier(job, tmpdir):
+        extension = EXTENSIONS[job.format_export]
+        nom_export = ExportService.nom_fichier(job, extension)
+        chemin_export = os.path.join(tmpdir, nom_export)
+
+        etudiants = ExportService.get_queryset(job)
+
+        if job.format_export in ('fiches_zip', 'fiches_pdf'):
+            return ExportService._produire_fiches(job, etudiants, chemin_export, nom_export)
+
+        writer = {
+            'excel': ExportService._ecrire_excel,
+            'csv': ExportService._ecrire_csv,
+            'pdf': ExportService._ecrire_pdf,
+        }[job.format_export]
+        nombre_lignes = writer(chemin_export, ExportService._lignes(etudiants.iterator(chunk_size=2000)))
+
+        if not job.inclure_documents:
+            return chemin_export, nom_export, nombre_lignes
+
+        # Archive ZIP : fichier d'export + pièces des étudiants (second passage, en flux)
+        documents = DocumentEtudiant.objects.filter(
+            etudiant__in=etudiants.values('id')
+        ).exclude(fichier='').values_list(
+            'id', 'etudiant__numero_matricule', 'type_document', 'fichier'
+        ).order_by('etudiant_id', 'type_document')
+
+        nom_zip = ExportService.nom_fichier(job, 'zip')
+        chemin_zip = os.path.join(tmpdir, nom_zip)
+        with zipfile.ZipFile(chemin_zip, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            archive.write(chemin_export, nom_export)
+            for doc_id, matricule, type_document, nom_stockage in documents.iterator(chunk_size=2000):
+                extension_doc = os.path.splitext(nom_stockage)[1].lower()
+                try:
+                    with default_storage.open(nom_stockage, 'rb') as source, \
+                            archive.open(f"documents/{matricule}/{type_document}{extension_doc}", 'w') as cible:
+                        for chunk in source.chunks():
+                            cible.write(chunk)
+                except OSError:
+                    logger.warning(f"Fichier introuvable pour le document #{doc_id}")
+        return chemin_zip, nom_zip, nombre_lignes
+
+    @staticmethod
+    def _lignes(etudiants):
+        """Générateur de lignes d'export"""
+        for etudiant in etudiants:
+            yield [
+                etudiant.numero_matricule,
+                etudiant.nom,
+                etudiant.prenoms,
+                etudiant.cni,
+                etudiant.telephone,
+                etudiant.email_personnel,
+                etudiant.filiere.nom,
+                etudiant.get_statut_inscription_display(),
+                etudiant.get_statut_validation_display(),
+                etudiant.date_inscription.strftime('%d/%m/%Y')
+            ]
+
+    @staticmethod
+    def _ecrire_excel(chemin, lignes):
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Étudiants")
+        ws.append(EXPORT_HEADERS)
+        count = 0
+        for ligne in lignes:
+            ws.append(ligne)
+            count += 1
+        wb.save(chemin)
+        return count
+
+    @staticmethod
+    def _ecrire_csv(chemin, lignes):
+        count = 0
+        # utf-8-sig : Excel reconnaît les accents à l'ouverture
+        with open(chemin, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(EXPORT_HEADERS)
+            for ligne in lignes:
+                writer.writerow(ligne)
+                count += 1
+        return count
+
+    @staticmethod
+    def _ecrire_pdf(chemin, lignes):
+        pagesize = landscape(A4)
+        width, height = pagesize
+        p = canvas.Canvas(chemin, pagesize=pagesize)
+        colonnes = [0, 1, 2, 3, 4, 6, 8]  # Matricule, Nom, Prénoms, CNI, Téléphone, Filière, Validation
+        positions = [30, 150, 250, 390, 480, 570, 720]
+
+        def entete(y):
+            p.setFont("Helvetica-Bold", 9)
+            for x, index in zip(positions, colonnes):
+                p.drawString(x, y, EXPORT_HEADERS[index])
+            return y - 18
+
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(30, height - 40, "LISTE DES ÉTUDIANTS")
+        y = entete(height - 70)
+
+        count = 0
+        for ligne in lignes:
+            if y < 40:
+                p.showPage()
+                y = entete(height - 40)
+            p.setFont("Helvetica", 8)
+            for x, index in zip(positions, colonnes):
+                p.drawString(x, y, str(ligne[index])[:30])
+            y -= 14
+            count += 1
+
+        p.showPage()
+        p.save()
+        return count
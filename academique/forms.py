@@ -1,8 +1,11 @@
 # academique/forms.py
+import json
+
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from .models import Filiere, EtudiantAcademique, DocumentEtudiant, ImportEtudiant
+from .dossiers import ETAT_DOSSIER_CHOICES, TRI_CHOICES
 
 User = get_user_model()
 
@@ -270,6 +273,28 @@ class FiltreEtudiantForm(forms.Form):
             'placeholder': 'Rechercher par nom, matricule, CNI...'
         })
     )
+    
+    etat_dossier = forms.ChoiceField(
+        choices=[('', 'Tous les dossiers')] + ETAT_DOSSIER_CHOICES,
+        required=False,
+        label="Dossier",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    
+    documents_en_attente = forms.IntegerField(
+        min_value=1,
+        max_value=len(DocumentEtudiant.TYPE_DOCUMENT_CHOICES),
+        required=False,
+        label="Pièces en attente (au moins)",
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'N'})
+    )
+    
+    tri = forms.ChoiceField(
+        choices=TRI_CHOICES,
+        required=False,
+        label="Trier par",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
 
 
 class ValidationDocumentForm(forms.ModelForm):
@@ -352,4 +377,24 @@ class ExportForm(forms.Form):
     filtres = forms.CharField(
         required=False,
         widget=forms.HiddenInput()
-    )
\ No newline at end of file
+    )
+
+    def clean_filtres(self):
+        # Filtres de la liste (JSON) validés ici comme dans FiltreEtudiantForm :
+        # une valeur invalide ferait échouer le job dans le worker
+        filtres = self.cleaned_data['filtres']
+        if not filtres:
+            return {}
+        try:
+            filtres = json.loads(filtres)
+        except ValueError:
+            raise ValidationError('Filtres illisibles.')
+        if not isinstance(filtres, dict):
+            raise ValidationError('Filtres illisibles.')
+
+        form = FiltreEtudiantForm(filtres)
+        if not form.is_valid():
+            raise ValidationError([
+                f"{champ} : {message}" for champ, messages in form.errors.items() for message in messages
+            ])
+        return filtres
\ No newline at end of file
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from academique.apercus import ApercuService
+
+
+class Command(BaseCommand):
+    help = 'Produit en arrière-plan les aperçus (vignettes) des documents étudiants déposés'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite les documents en attente puis s\'arrête',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Délai (secondes) entre deux consultations de la file vide',
+        )
+        parser.add_argument(
+            '--relancer',
+            action='store_true',
+            help='Remet d\'abord en file les aperçus en échec ou interrompus',
+        )
+
+    def handle(self, *args, **options):
+        if options['relancer']:
+            nombre = ApercuService.relancer()
+            self.stdout.write(f'{nombre} document(s) remis en file.')
+
+        self.stdout.write('Worker d\'aperçus démarré...')
+        prets = echecs = 0
+
+        while True:
+            document = ApercuService.reserver_prochain()
+
+            if document is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            statut = ApercuService.generer(document)
+            if statut == 'pret':
+                prets += 1
+            elif statut == 'echec':
+                echecs += 1
+                self.stdout.write(self.style.ERROR(f'Aperçu du document #{document.pk} en échec'))
+
+        self.stdout.write(self.style.SUCCESS(f'File des aperçus vide : {prets} produit(s), {echecs} échec(s).'))
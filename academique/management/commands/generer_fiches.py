@@ -0,0 +1,79 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academique.models import EtudiantAcademique, Filiere
+from academique.pdf import FicheService
+
+
+class Command(BaseCommand):
+    help = 'Génère (ou met à jour) les fiches d\'inscription PDF en parallèle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filiere',
+            action='append',
+            default=[],
+            help='Code de filière à traiter (répétable). Par défaut : toutes les filières',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de processus de rendu (défaut : nombre de CPU)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Redessine toutes les fiches, même celles déjà en cache',
+        )
+        parser.add_argument(
+            '--fusion',
+            metavar='DOSSIER',
+            help='Écrit un PDF fusionné par filière dans DOSSIER',
+        )
+        parser.add_argument(
+            '--zip',
+            metavar='DOSSIER',
+            help='Écrit une archive ZIP des fiches par filière dans DOSSIER',
+        )
+
+    def handle(self, *args, **options):
+        filieres = Filiere.objects.all().order_by('code')
+        if options['filiere']:
+            codes = [code.upper() for code in options['filiere']]
+            filieres = filieres.filter(code__in=codes)
+            manquantes = set(codes) - set(filieres.values_list('code', flat=True))
+            if manquantes:
+                raise CommandError(f"Filière(s) introuvable(s) : {', '.join(sorted(manquantes))}")
+
+        for dossier in (options['fusion'], options['zip']):
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+
+        for filiere in filieres:
+            etudiants = EtudiantAcademique.objects.filter(
+                filiere=filiere
+            ).select_related('filiere').order_by('nom', 'prenoms')
+
+            resultat = FicheService.generer_fiches(
+                etudiants.iterator(chunk_size=2000),
+                workers=options['workers'],
+                force=options['force'],
+            )
+            self.stdout.write(
+                f"{filiere.code} : {resultat['generees']} fiche(s) générée(s) "
+                f"sur {resultat['total']}"
+            )
+
+            if options['fusion'] and resultat['total']:
+                chemin = os.path.join(options['fusion'], f"fiches_{filiere.code}.pdf")
+                FicheService.ecrire_fusion(resultat['chemins'], chemin)
+                self.stdout.write(f"  PDF fusionné : {chemin}")
+
+            if options['zip'] and resultat['total']:
+                chemin = os.path.join(options['zip'], f"fiches_{filiere.code}.zip")
+                FicheService.ecrire_zip(resultat['chemins'], chemin)
+                self.stdout.write(f"  Archive ZIP : {chemin}")
+
+        self.stdout.write(self.style.SUCCESS('Génération des fiches terminée.'))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from academique.exports import ExportService
+
+
+class Command(BaseCommand):
+    help = 'Traite la file des exports d\'étudiants (ExportJob) en arrière-plan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite les exports en attente puis s\'arrête',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Délai (secondes) entre deux consultations de la file vide',
+        )
+        parser.add_argument(
+            '--relancer',
+            action='store_true',
+            help='Remet d\'abord en attente tous les jobs \'en_cours\' (après un arrêt de tous les workers)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker d\'exports démarré...')
+
+        if options['relancer']:
+            relances = ExportService.relancer_jobs_bloques(tous=True)
+            self.stdout.write(f'{relances} export(s) en cours remis en attente')
+
+        while True:
+            job = ExportService.reserver_prochain_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'Export #{job.pk} ({job.get_format_export_display()}) en cours...')
+            job = ExportService.executer_job(job)
+
+            if job.statut == 'termine':
+                self.stdout.write(
+                    self.style.SUCCESS(f'Export #{job.pk} terminé : {job.nombre_lignes} ligne(s)')
+                )
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f'Export #{job.pk} en échec : {job.erreur}')
+                )
+
+        self.stdout.write(self.style.SUCCESS('File des exports vide.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from academique.dossiers import DossierService
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de documents et la progression des dossiers étudiants (après une mise à jour SQL en masse)'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recalcul des dossiers étudiants...')
+        total = DossierService.recalculer_tout(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'{total} dossier(s) recalculé(s).'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from academique.search import RechercheService
+
+
+class Command(BaseCommand):
+    help = 'Recalcule l\'index de recherche des étudiants (après un import en masse ou une mise à jour SQL)'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruction de l\'index de recherche...')
+        total = RechercheService.reconstruire(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'{total} étudiant(s) indexé(s).'))
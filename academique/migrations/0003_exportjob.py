@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0002_pageblock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format_export', models.CharField(choices=[('excel', 'Excel (.xlsx)'), ('pdf', 'PDF'), ('csv', 'CSV')], default='excel', max_length=10, verbose_name='Format')),
+                ('inclure_documents', models.BooleanField(default=False, verbose_name='Inclure les documents')),
+                ('filtres', models.JSONField(blank=True, default=dict, verbose_name='Filtres')),
+                ('filtres_hash', models.CharField(db_index=True, max_length=64, verbose_name='Empreinte des filtres')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('fichier', models.FileField(blank=True, upload_to='exports/%Y/%m/', verbose_name='Fichier')),
+                ('nombre_lignes', models.PositiveIntegerField(default=0, verbose_name='Nombre de lignes')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('demande_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exports', to=settings.AUTH_USER_MODEL, verbose_name='Demandé par')),
+            ],
+            options={
+                'verbose_name': 'Export',
+                'verbose_name_plural': 'Exports',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='academique__statut_2f3b00_idx')],
+            },
+        ),
+    ]
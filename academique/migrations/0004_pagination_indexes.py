@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0003_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentetudiant',
+            index=models.Index(fields=['valide', '-date_upload', 'id'], name='academique__valide_abaa71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiantacademique',
+            index=models.Index(fields=['-date_inscription', 'id'], name='academique__date_in_b1d15f_idx'),
+        ),
+    ]
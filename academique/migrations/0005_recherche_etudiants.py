@@ -0,0 +1,107 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:39
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies figées de academique.search.normaliser / trigrammes à la date de la migration :
+# une évolution ultérieure de ces fonctions ne doit pas changer ce que fait la migration
+_SEPARATEURS = re.compile(r'[^0-9a-z]+')
+
+
+def normaliser(texte):
+    if not texte:
+        return ''
+    decompose = unicodedata.normalize('NFKD', str(texte))
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return _SEPARATEURS.sub(' ', sans_accents.lower()).strip()
+
+
+def trigrammes(texte):
+    resultat = set()
+    for mot in texte.split():
+        for i in range(len(mot) - 2):
+            resultat.add(mot[i:i + 3])
+    return resultat
+
+
+# Les préfixes de matricule et de CNI (champs uniques) sont servis par les index `_like`
+# (varchar_pattern_ops) que Django crée déjà pour les champs uniques sous PostgreSQL
+INDEX_POSTGRESQL = [
+    ('etudiant_recherche_trgm',
+     'CREATE INDEX IF NOT EXISTS etudiant_recherche_trgm ON academique_etudiantacademique '
+     'USING gin (recherche_normalisee gin_trgm_ops)'),
+]
+
+
+def remplir_recherche(apps, schema_editor):
+    EtudiantAcademique = apps.get_model('academique', 'EtudiantAcademique')
+    TrigrammeEtudiant = apps.get_model('academique', 'TrigrammeEtudiant')
+    avec_trigrammes = schema_editor.connection.vendor != 'postgresql'
+
+    lot = []
+    for etudiant in EtudiantAcademique.objects.only('id', 'nom', 'prenoms').iterator(chunk_size=2000):
+        etudiant.recherche_normalisee = normaliser(f"{etudiant.nom} {etudiant.prenoms}")
+        lot.append(etudiant)
+        if len(lot) >= 2000:
+            EtudiantAcademique.objects.bulk_update(lot, ['recherche_normalisee'])
+            if avec_trigrammes:
+                TrigrammeEtudiant.objects.bulk_create([
+                    TrigrammeEtudiant(etudiant_id=e.id, trigramme=tri)
+                    for e in lot for tri in trigrammes(e.recherche_normalisee)
+                ])
+            lot = []
+    if lot:
+        EtudiantAcademique.objects.bulk_update(lot, ['recherche_normalisee'])
+        if avec_trigrammes:
+            TrigrammeEtudiant.objects.bulk_create([
+                TrigrammeEtudiant(etudiant_id=e.id, trigramme=tri)
+                for e in lot for tri in trigrammes(e.recherche_normalisee)
+            ])
+
+
+def creer_index_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in INDEX_POSTGRESQL:
+        schema_editor.execute(sql)
+
+
+def supprimer_index_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom, _ in INDEX_POSTGRESQL:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nom}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0004_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiantacademique',
+            name='recherche_normalisee',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Texte de recherche'),
+        ),
+        migrations.CreateModel(
+            name='TrigrammeEtudiant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigramme', models.CharField(max_length=3)),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrammes', to='academique.etudiantacademique')),
+            ],
+            options={
+                'verbose_name': 'Trigramme de recherche',
+                'verbose_name_plural': 'Trigrammes de recherche',
+                'indexes': [models.Index(fields=['trigramme', 'etudiant'], name='academique__trigram_711c46_idx')],
+            },
+        ),
+        migrations.RunPython(remplir_recherche, migrations.RunPython.noop),
+        migrations.RunPython(creer_index_postgresql, supprimer_index_postgresql),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:08
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+NB_TYPES_DOCUMENT = 7
+
+CHAMPS_PROFIL = [
+    'date_naissance', 'lieu_naissance', 'cni', 'telephone', 'email_personnel',
+    'adresse', 'nom_pere', 'nom_mere', 'diplome_obtenu', 'annee_obtention',
+]
+
+
+def remplir_dossiers(apps, schema_editor):
+    EtudiantAcademique = apps.get_model('academique', 'EtudiantAcademique')
+    DocumentEtudiant = apps.get_model('academique', 'DocumentEtudiant')
+
+    compteurs = {
+        ligne['etudiant_id']: (ligne['total'], ligne['valides'])
+        for ligne in DocumentEtudiant.objects.values('etudiant_id').annotate(
+            total=Count('id'), valides=Count('id', filter=Q(valide=True))
+        ).order_by()
+    }
+    lot = []
+    for etudiant in EtudiantAcademique.objects.only('id', *CHAMPS_PROFIL).iterator(chunk_size=2000):
+        etudiant.nb_documents, etudiant.nb_documents_valides = compteurs.get(etudiant.id, (0, 0))
+        etudiant.dossier_complet = etudiant.nb_documents_valides >= NB_TYPES_DOCUMENT
+        etudiant.progression = int(
+            sum(1 for champ in CHAMPS_PROFIL if getattr(etudiant, champ)) / len(CHAMPS_PROFIL) * 100
+        )
+        lot.append(etudiant)
+        if len(lot) >= 2000:
+            EtudiantAcademique.objects.bulk_update(
+                lot, ['nb_documents', 'nb_documents_valides', 'dossier_complet', 'progression']
+            )
+            lot = []
+    if lot:
+        EtudiantAcademique.objects.bulk_update(
+            lot, ['nb_documents', 'nb_documents_valides', 'dossier_complet', 'progression']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0005_recherche_etudiants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiantacademique',
+            name='dossier_complet',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Dossier complet'),
+        ),
+        migrations.AddField(
+            model_name='etudiantacademique',
+            name='nb_documents',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Documents fournis'),
+        ),
+        migrations.AddField(
+            model_name='etudiantacademique',
+            name='nb_documents_valides',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Documents validés'),
+        ),
+        migrations.AddField(
+            model_name='etudiantacademique',
+            name='progression',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Progression du profil (%)'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiantacademique',
+            index=models.Index(fields=['dossier_complet', '-date_inscription', 'id'], name='academique__dossier_e7ce06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiantacademique',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('nb_documents'), '-', models.F('nb_documents_valides')), name='etudiant_docs_en_attente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiantacademique',
+            index=models.Index(fields=['-progression', 'id'], name='academique__progres_3dc7fb_idx'),
+        ),
+        migrations.RunPython(remplir_dossiers, migrations.RunPython.noop),
+    ]
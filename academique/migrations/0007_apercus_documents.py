@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0006_dossier_denormalise'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentetudiant',
+            name='apercu',
+            field=models.ImageField(blank=True, editable=False, upload_to='documents/apercus/%Y/%m/', verbose_name='Aperçu'),
+        ),
+        migrations.AddField(
+            model_name='documentetudiant',
+            name='apercu_statut',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('pret', 'Prêt'), ('echec', 'Échec')], default='en_attente', editable=False, max_length=10, verbose_name="Statut de l'aperçu"),
+        ),
+        migrations.AddIndex(
+            model_name='documentetudiant',
+            index=models.Index(fields=['apercu_statut', 'date_upload'], name='academique__apercu__f1c623_idx'),
+        ),
+    ]
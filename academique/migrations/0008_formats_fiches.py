@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0007_apercus_documents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='format_export',
+            field=models.CharField(choices=[('excel', 'Excel (.xlsx)'), ('pdf', 'PDF'), ('csv', 'CSV'), ('fiches_zip', "Fiches d'inscription (ZIP)"), ('fiches_pdf', "Fiches d'inscription (PDF unique)")], default='excel', max_length=10, verbose_name='Format'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+# Créés par une première version de 0005 : doublons des index `_like` que Django
+# crée pour numero_matricule et cni (uniques), coût d'écriture sans gain en lecture
+INDEX_DOUBLONS = ['etudiant_matricule_like', 'etudiant_cni_like']
+
+
+def supprimer_doublons(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom in INDEX_DOUBLONS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nom}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0008_formats_fiches'),
+    ]
+
+    operations = [
+        migrations.RunPython(supprimer_doublons, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 # academique/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.utils import timezone
@@ -97,6 +98,15 @@ class EtudiantAcademique(models.Model):
         ('autre', 'Autre')
     ]
     
+    # Compteurs dénormalisés du dossier (voir academique/dossiers.py)
+    CHAMPS_COMPTEURS = ('nb_documents', 'nb_documents_valides', 'dossier_complet')
+    
+    # Champs du profil pris en compte dans la progression
+    CHAMPS_PROFIL = [
+        'date_naissance', 'lieu_naissance', 'cni', 'telephone', 'email_personnel',
+        'adresse', 'nom_pere', 'nom_mere', 'diplome_obtenu', 'annee_obtention',
+    ]
+    
     # Relations
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='etudiant_academique')
     filiere = models.ForeignKey(Filiere, on_delete=models.PROTECT, related_name='etudiants')
@@ -175,18 +185,67 @@ class EtudiantAcademique(models.Model):
     date_inscription = models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")
     date_validation = models.DateTimeField(null=True, blank=True, verbose_name="Date de validation")
     
+    # Recherche : nom + prénoms en minuscules sans accents (voir academique/search.py)
+    recherche_normalisee = models.CharField(
+        max_length=200,
+        blank=True,
+        editable=False,
+        verbose_name="Texte de recherche"
+    )
+    
+    # État du dossier, dénormalisé pour filtrer et trier sans sous-requête sur les documents.
+    # Tenu à jour par DocumentEtudiant.save()/delete() (voir academique/dossiers.py) ;
+    # après une mise à jour en masse : commande recalculer_dossiers.
+    nb_documents = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Documents fournis")
+    nb_documents_valides = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Documents validés")
+    dossier_complet = models.BooleanField(default=False, editable=False, verbose_name="Dossier complet")
+    progression = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Progression du profil (%)")
+    
     class Meta:
         verbose_name = "Étudiant Académique"
         verbose_name_plural = "Étudiants Académiques"
         ordering = ['-date_inscription']
+        indexes = [
+            # Pagination par curseur des listes admin
+            models.Index(fields=['-date_inscription', 'id']),
+            # Filtres et tris sur l'état du dossier
+            models.Index(fields=['dossier_complet', '-date_inscription', 'id']),
+            models.Index(F('nb_documents') - F('nb_documents_valides'), name='etudiant_docs_en_attente_idx'),
+            models.Index(fields=['-progression', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.numero_matricule} - {self.nom} {self.prenoms}"
     
     def save(self, *args, **kwargs):
+        from .search import texte_recherche, indexer_etudiant
+        
         if not self.numero_matricule:
             self.numero_matricule = self.generer_matricule()
+        
+        ancien_texte = self.recherche_normalisee
+        self.recherche_normalisee = texte_recherche(self)
+        self.progression = self.calculer_progression()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Les compteurs du dossier ne sont écrits que par DossierService.recalculer() :
+            # une instance chargée avant un dépôt ou une validation ne doit pas les écraser
+            kwargs['update_fields'] = [
+                champ.name for champ in self._meta.concrete_fields
+                if not champ.primary_key and champ.name not in self.CHAMPS_COMPTEURS
+            ]
+        elif update_fields is not None:
+            supplementaires = set()
+            if {'nom', 'prenoms'} & set(update_fields):
+                supplementaires.add('recherche_normalisee')
+            if set(self.CHAMPS_PROFIL) & set(update_fields):
+                supplementaires.add('progression')
+            kwargs['update_fields'] = set(update_fields) | supplementaires
+        
         super().save(*args, **kwargs)
+        
+        if self.recherche_normalisee != ancien_texte:
+            indexer_etudiant(self)
     
     def generer_matricule(self):
         """Génère un matricule unique format: IUTESSA-YYYY-XXXX"""
@@ -197,9 +256,45 @@ class EtudiantAcademique(models.Model):
         ).count() + 1
         return f"IUTESSA-{annee}-{count:04d}"
     
+    def calculer_progression(self):
+        """Pourcentage des champs importants du profil renseignés"""
+        remplis = sum(1 for champ in self.CHAMPS_PROFIL if getattr(self, champ))
+        return int(remplis / len(self.CHAMPS_PROFIL) * 100)
+    
     @property
     def nom_complet(self):
         return f"{self.nom} {self.prenoms}"
+    
+    @property
+    def nb_documents_en_attente(self):
+        return self.nb_documents - self.nb_documents_valides
+    
+    @property
+    def nb_documents_manquants(self):
+        return len(DocumentEtudiant.TYPE_DOCUMENT_CHOICES) - self.nb_documents
+
+
+class TrigrammeEtudiant(models.Model):
+    """
+    Index n-grammes des noms pour les bases sans pg_trgm (SQLite).
+    Alimenté par EtudiantAcademique.save() et la commande reindexer_recherche.
+    """
+    etudiant = models.ForeignKey(
+        EtudiantAcademique,
+        on_delete=models.CASCADE,
+        related_name='trigrammes'
+    )
+    trigramme = models.CharField(max_length=3)
+    
+    class Meta:
+        verbose_name = "Trigramme de recherche"
+        verbose_name_plural = "Trigrammes de recherche"
+        indexes = [
+            models.Index(fields=['trigramme', 'etudiant']),
+        ]
+    
+    def __str__(self):
+        return f"{self.trigramme} ({self.etudiant_id})"
 
 
 class DocumentEtudiant(models.Model):
@@ -239,14 +334,61 @@ class DocumentEtudiant(models.Model):
     )
     commentaire = models.TextField(blank=True, verbose_name="Commentaire")
     
+    # Aperçu léger (première page d'un PDF, image réduite) produit par la commande generer_apercus
+    APERCU_STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('pret', 'Prêt'),
+        ('echec', 'Échec'),
+    ]
+    apercu = models.ImageField(
+        upload_to='documents/apercus/%Y/%m/',
+        blank=True,
+        editable=False,
+        verbose_name="Aperçu"
+    )
+    apercu_statut = models.CharField(
+        max_length=10,
+        choices=APERCU_STATUT_CHOICES,
+        default='en_attente',
+        editable=False,
+        verbose_name="Statut de l'aperçu"
+    )
+    
     class Meta:
         verbose_name = "Document Étudiant"
         verbose_name_plural = "Documents Étudiants"
         unique_together = ['etudiant', 'type_document']
         ordering = ['-date_upload']
+        indexes = [
+            models.Index(fields=['valide', '-date_upload', 'id']),
+            # File d'attente du worker d'aperçus
+            models.Index(fields=['apercu_statut', 'date_upload']),
+        ]
     
     def __str__(self):
         return f"{self.etudiant.nom_complet} - {self.get_type_document_display()}"
+    
+    # Champs qui influent sur les compteurs du dossier de l'étudiant
+    CHAMPS_DOSSIER = {'etudiant', 'etudiant_id', 'type_document', 'valide'}
+    
+    def save(self, *args, **kwargs):
+        from .dossiers import DossierService
+        
+        # Document et compteurs du dossier (EtudiantAcademique.nb_documents...) dans la même transaction
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or self.CHAMPS_DOSSIER & set(update_fields):
+                DossierService.recalculer([self.etudiant_id])
+    
+    def delete(self, *args, **kwargs):
+        from .dossiers import DossierService
+        
+        with transaction.atomic():
+            resultat = super().delete(*args, **kwargs)
+            DossierService.recalculer([self.etudiant_id])
+        return resultat
 
 
 class ImportEtudiant(models.Model):
@@ -268,4 +410,74 @@ class ImportEtudiant(models.Model):
         ordering = ['-date_import']
     
     def __str__(self):
-        return f"Import {self.date_import.strftime('%d/%m/%Y %H:%M')} - {self.nombre_succes}/{self.nombre_total}"
\ No newline at end of file
+        return f"Import {self.date_import.strftime('%d/%m/%Y %H:%M')} - {self.nombre_succes}/{self.nombre_total}"
+
+class ExportJob(models.Model):
+    """Export d'étudiants produit en arrière-plan par la commande process_exports"""
+    FORMAT_CHOICES = [
+        ('excel', 'Excel (.xlsx)'),
+        ('pdf', 'PDF'),
+        ('csv', 'CSV'),
+        ('fiches_zip', "Fiches d'inscription (ZIP)"),
+        ('fiches_pdf', "Fiches d'inscription (PDF unique)"),
+    ]
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec')
+    ]
+
+    format_export = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        default='excel',
+        verbose_name="Format"
+    )
+    inclure_documents = models.BooleanField(default=False, verbose_name="Inclure les documents")
+    filtres = models.JSONField(default=dict, blank=True, verbose_name="Filtres")
+    # Empreinte SHA-256 du format + filtres : deux demandes identiques partagent le même fichier
+    filtres_hash = models.CharField(max_length=64, db_index=True, verbose_name="Empreinte des filtres")
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+    fichier = models.FileField(upload_to='exports/%Y/%m/', blank=True, verbose_name="Fichier")
+    nombre_lignes = models.PositiveIntegerField(default=0, verbose_name="Nombre de lignes")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+
+    demande_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exports',
+        verbose_name="Demandé par"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export"
+        verbose_name_plural = "Exports"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'date_creation']),
+        ]
+
+    def __str__(self):
+        return f"Export {self.get_format_export_display()} #{self.pk} - {self.get_statut_display()}"
+
+    @property
+    def est_termine(self):
+        return self.statut in ('termine', 'echec')
+
+
+# PageBlock est défini avec les template tags : importé ici pour être enregistré au
+# chargement de l'application (signaux du stockage, téléversements), pas au premier rendu
+from .templatetags.academique_tags import PageBlock  # noqa: E402,F401
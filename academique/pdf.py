@@ -0,0 +1,199 @@
+# academique/pdf.py
+"""
+Génération des fiches d'inscription PDF.
+
+Chaque fiche est mise en cache dans le stockage média sous
+`fiches/<matricule>/<empreinte>.pdf`, l'empreinte étant un SHA-256 des champs
+imprimés : la fiche n'est redessinée que lorsque l'un d'eux change.
+Les fonctions de rendu ne manipulent que des dictionnaires, ce qui permet de
+les exécuter dans un pool de processus pour les générations en masse.
+
+Le PDF fusionné est assemblé à partir des fiches en cache (pypdf), sans
+redessiner les pages. Au-delà de SEUIL_FICHES_DIRECTES fiches, les actions de
+l'admin passent par la file des exports (process_exports) plutôt que par la
+requête HTTP.
+"""
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from administration.metrics import metriques
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand la mise en page change : invalide toutes les fiches en cache
+FICHE_VERSION = 1
+
+# En dessous de ce nombre de fiches à dessiner, le pool de processus coûte plus qu'il ne rapporte
+SEUIL_POOL = 20
+
+# Au-delà, les fiches demandées depuis l'admin sont produites par la file des exports
+SEUIL_FICHES_DIRECTES = 100
+
+
+def donnees_fiche(etudiant):
+    """Champs imprimés sur la fiche (chaînes prêtes à dessiner)"""
+    return {
+        'matricule': etudiant.numero_matricule,
+        'nom_complet': etudiant.nom_complet,
+        'cni': etudiant.cni,
+        'telephone': etudiant.telephone,
+        'email': etudiant.email_personnel,
+        'filiere': etudiant.filiere.nom,
+        'date_inscription': etudiant.date_inscription.strftime('%d/%m/%Y'),
+    }
+
+
+def empreinte_fiche(donnees):
+    """SHA-256 des champs imprimés et de la version de mise en page"""
+    payload = json.dumps({'version': FICHE_VERSION, 'donnees': donnees}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def chemin_fiche(donnees):
+    return f"fiches/{donnees['matricule']}/{empreinte_fiche(donnees)}.pdf"
+
+
+def dessiner_fiche(p, donnees):
+    """Dessine une fiche sur la page courante du canvas"""
+    width, height = letter
+
+    # En-tête
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(50, height - 50, "FICHE D'INSCRIPTION ACADÉMIQUE")
+
+    # Informations étudiant
+    y_position = height - 100
+    p.setFont("Helvetica", 12)
+
+    infos = [
+        f"Matricule: {donnees['matricule']}",
+        f"Nom complet: {donnees['nom_complet']}",
+        f"CNI: {donnees['cni']}",
+        f"Téléphone: {donnees['telephone']}",
+        f"Email: {donnees['email']}",
+        f"Filière: {donnees['filiere']}",
+        f"Date d'inscription: {donnees['date_inscription']}",
+    ]
+
+    for info in infos:
+        p.drawString(50, y_position, info)
+        y_position -= 25
+
+    p.showPage()
+
+
+def rendre_fiche(donnees):
+    """Rend une fiche seule et retourne les octets du PDF (exécutable dans un sous-processus)"""
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    dessiner_fiche(p, donnees)
+    p.save()
+    return buffer.getvalue()
+
+
+class FicheService:
+    """Cache et génération en masse des fiches d'inscription"""
+
+    @staticmethod
+    def obtenir_fiche(etudiant):
+        """Retourne le chemin (stockage) de la fiche à jour, en la générant si nécessaire"""
+        donnees = donnees_fiche(etudiant)
+        chemin = chemin_fiche(donnees)
+        present = storages['chemins'].exists(chemin)
+        metriques.incrementer('cache_requetes_total', usage='fiches_pdf', resultat='hit' if present else 'miss')
+        if not present:
+            FicheService._enregistrer(donnees, rendre_fiche(donnees))
+        return chemin
+
+    @staticmethod
+    def generer_fiches(etudiants, workers=None, force=False):
+        """
+        Met à jour le cache des fiches d'un ensemble d'étudiants.
+        Les fiches manquantes sont dessinées en parallèle sur `workers` processus.
+        Retourne {'total', 'generees', 'chemins'} ; `chemins` suit l'ordre des étudiants
+        sous la forme (nom dans une archive, chemin dans le stockage).
+        """
+        a_generer = []
+        chemins = []
+        for etudiant in etudiants:
+            donnees = donnees_fiche(etudiant)
+            chemin = chemin_fiche(donnees)
+            nom_archive = f"{etudiant.filiere.code}/fiche_inscription_{donnees['matricule']}.pdf"
+            chemins.append((nom_archive, chemin))
+            if force or not storages['chemins'].exists(chemin):
+                a_generer.append(donnees)
+
+        if len(a_generer) < SEUIL_POOL or workers == 1:
+            rendus = map(rendre_fiche, a_generer)
+            FicheService._enregistrer_tous(a_generer, rendus)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rendus = executor.map(rendre_fiche, a_generer, chunksize=16)
+                FicheService._enregistrer_tous(a_generer, rendus)
+
+        return {
+            'total': len(chemins),
+            'generees': len(a_generer),
+            'chemins': chemins,
+        }
+
+    @staticmethod
+    def ecrire_fusion(chemins, destination):
+        """Écrit dans `destination` un PDF unique assemblant les fiches déjà en cache"""
+        if PdfWriter is None:
+            raise ImproperlyConfigured("pypdf est requis pour fusionner les fiches : pip install pypdf")
+        fusion = PdfWriter()
+        for _, chemin in chemins:
+            with storages['chemins'].open(chemin, 'rb') as source:
+                fusion.append(BytesIO(source.read()))
+        fusion.write(destination)
+        return len(chemins)
+
+    @staticmethod
+    def ecrire_zip(chemins, destination):
+        """Écrit dans `destination` une archive ZIP des fiches déjà en cache (un dossier par filière)"""
+        with zipfile.ZipFile(destination, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for nom_archive, chemin in chemins:
+                with storages['chemins'].open(chemin, 'rb') as source:
+                    archive.writestr(nom_archive, source.read())
+        return len(chemins)
+
+    @staticmethod
+    def _enregistrer_tous(donnees_list, rendus):
+        for donnees, contenu in zip(donnees_list, rendus):
+            FicheService._enregistrer(donnees, contenu)
+
+    @staticmethod
+    def _enregistrer(donnees, contenu):
+        """Enregistre la fiche et supprime les versions précédentes de l'étudiant"""
+        chemin = chemin_fiche(donnees)
+        dossier = os.path.dirname(chemin)
+        try:
+            _, anciennes = storages['chemins'].listdir(dossier)
+        except FileNotFoundError:
+            anciennes = []
+        for nom in anciennes:
+            ancien_chemin = f"{dossier}/{nom}"
+            if ancien_chemin != chemin:
+                storages['chemins'].delete(ancien_chemin)
+
+        if storages['chemins'].exists(chemin):
+            storages['chemins'].delete(chemin)
+        storages['chemins'].save(chemin, ContentFile(contenu))
+        return chemin
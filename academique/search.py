@@ -0,0 +1,142 @@
+# academique/search.py
+"""
+Recherche indexée des étudiants.
+
+- Matricule et CNI : recherche exacte ou par préfixe, servie par l'index B-tree de
+  leur contrainte d'unicité (sous PostgreSQL, l'index `_like` en `varchar_pattern_ops`
+  que Django crée avec elle ; ailleurs, plage [préfixe, préfixe + U+10FFFF[).
+- Nom et prénoms : colonne `recherche_normalisee` (minuscules, sans accents),
+  tenue à jour dans EtudiantAcademique.save(). Sous PostgreSQL un index GIN
+  pg_trgm sert les LIKE '%mot%' ; sous SQLite la table TrigrammeEtudiant
+  présélectionne les candidats avant la vérification par sous-chaîne.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import EtudiantAcademique, TrigrammeEtudiant
+
+TAILLE_LOT = 2000
+
+_SEPARATEURS = re.compile(r'[^0-9a-z]+')
+
+
+def normaliser(texte):
+    """Minuscules, accents retirés, ponctuation remplacée par des espaces : 'Élodie-Anne' -> 'elodie anne'"""
+    if not texte:
+        return ''
+    decompose = unicodedata.normalize('NFKD', str(texte))
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return _SEPARATEURS.sub(' ', sans_accents.lower()).strip()
+
+
+def texte_recherche(etudiant):
+    """Valeur de la colonne recherche_normalisee"""
+    return normaliser(f"{etudiant.nom} {etudiant.prenoms}")
+
+
+def trigrammes(texte):
+    """Ensemble des trigrammes des mots d'un texte normalisé (les mots de moins de 3 lettres n'en ont pas)"""
+    resultat = set()
+    for mot in texte.split():
+        for i in range(len(mot) - 2):
+            resultat.add(mot[i:i + 3])
+    return resultat
+
+
+def utilise_table_trigrammes(conn=None):
+    """La table TrigrammeEtudiant n'est alimentée que hors PostgreSQL (pg_trgm s'en charge sinon)"""
+    return (conn or connection).vendor != 'postgresql'
+
+
+def indexer_etudiant(etudiant):
+    """Remplace les trigrammes d'un étudiant (appelé après chaque sauvegarde)"""
+    if not utilise_table_trigrammes():
+        return
+    TrigrammeEtudiant.objects.filter(etudiant=etudiant).delete()
+    TrigrammeEtudiant.objects.bulk_create([
+        TrigrammeEtudiant(etudiant=etudiant, trigramme=tri)
+        for tri in trigrammes(etudiant.recherche_normalisee)
+    ])
+
+
+def _prefixe(champ, valeur):
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{champ}__startswith': valeur})
+    # Collation binaire : la plage couvre exactement les chaînes commençant par `valeur`
+    return Q(**{f'{champ}__gte': valeur, f'{champ}__lt': valeur + '\U0010ffff'})
+
+
+def rechercher_etudiants(queryset, terme):
+    """
+    Filtre `queryset` sur un terme saisi librement :
+    préfixe de matricule ou de CNI, ou tous les mots contenus dans nom + prénoms.
+    """
+    terme = (terme or '').strip()
+    if not terme:
+        return queryset
+
+    condition = Q()
+    code = terme.upper().replace(' ', '')
+    if code:
+        condition |= _prefixe('numero_matricule', code) | _prefixe('cni', code)
+
+    mots = normaliser(terme).split()
+    if mots:
+        condition_noms = Q()
+        for mot in mots:
+            condition_noms &= Q(recherche_normalisee__contains=mot)
+
+        tris = set()
+        for mot in mots:
+            tris |= trigrammes(mot)
+        if tris and utilise_table_trigrammes():
+            # Candidats possédant tous les trigrammes ; la sous-chaîne élimine les faux positifs
+            candidats = TrigrammeEtudiant.objects.filter(
+                trigramme__in=tris
+            ).values('etudiant').annotate(
+                nb=Count('trigramme', distinct=True)
+            ).filter(nb=len(tris)).values('etudiant')
+            condition_noms &= Q(id__in=candidats)
+
+        condition |= condition_noms
+
+    return queryset.filter(condition)
+
+
+class RechercheService:
+    """Maintenance de l'index de recherche"""
+
+    @staticmethod
+    def reconstruire(queryset=None, stdout=None):
+        """Recalcule recherche_normalisee (et les trigrammes hors PostgreSQL) par lots"""
+        queryset = queryset if queryset is not None else EtudiantAcademique.objects.all()
+        queryset = queryset.only('id', 'nom', 'prenoms', 'recherche_normalisee').order_by('id')
+
+        total = 0
+        lot = []
+        for etudiant in queryset.iterator(chunk_size=TAILLE_LOT):
+            etudiant.recherche_normalisee = texte_recherche(etudiant)
+            lot.append(etudiant)
+            if len(lot) >= TAILLE_LOT:
+                total += RechercheService._enregistrer_lot(lot)
+                lot = []
+                if stdout:
+                    stdout.write(f"  {total} étudiants indexés")
+        if lot:
+            total += RechercheService._enregistrer_lot(lot)
+        return total
+
+    @staticmethod
+    def _enregistrer_lot(lot):
+        EtudiantAcademique.objects.bulk_update(lot, ['recherche_normalisee'])
+        if utilise_table_trigrammes():
+            TrigrammeEtudiant.objects.filter(etudiant__in=lot).delete()
+            TrigrammeEtudiant.objects.bulk_create([
+                TrigrammeEtudiant(etudiant_id=etudiant.id, trigramme=tri)
+                for etudiant in lot
+                for tri in trigrammes(etudiant.recherche_normalisee)
+            ], batch_size=TAILLE_LOT)
+        return len(lot)
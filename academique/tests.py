@@ -1,3 +1,330 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import apercus, pdf
+from .apercus import ApercuService
+from .exports import ExportService
+from .models import DocumentEtudiant, EtudiantAcademique, ExportJob, Filiere
+from .search import RechercheService, rechercher_etudiants, utilise_table_trigrammes
+
+User = get_user_model()
+
+
+def creer_etudiant(numero=1, filiere=None, **champs):
+    """Étudiant minimal (profil complet) pour les tests"""
+    filiere = filiere or Filiere.objects.get_or_create(code='TST', defaults={'nom': 'Filière test'})[0]
+    user = User.objects.create_user(f'etudiant-test-{numero}', password='x', role='ETUDIANT')
+    valeurs = {
+        'user': user,
+        'filiere': filiere,
+        'nom': 'Test',
+        'prenoms': f'Etudiant {numero}',
+        'date_naissance': datetime.date(2000, 1, 1),
+        'lieu_naissance': 'Mokolo',
+        'region_origine': 'Extrême-Nord',
+        'cni': f'CNI{numero:06d}',
+        'telephone': '690000000',
+        'email_personnel': f'etudiant{numero}@iutessa.test',
+        'adresse': 'Mokolo',
+        'nom_pere': 'Pere',
+        'nom_mere': 'Mere',
+        'diplome_obtenu': 'Baccalauréat',
+        'annee_obtention': 2020,
+    }
+    valeurs.update(champs)
+    return EtudiantAcademique.objects.create(**valeurs)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CompteursDossierTests(TestCase):
+    """Compteurs dénormalisés du dossier (nb_documents, nb_documents_valides, dossier_complet)"""
+
+    def test_sauvegarde_instance_perimee_conserve_les_compteurs(self):
+        etudiant = creer_etudiant()
+        perime = EtudiantAcademique.objects.get(pk=etudiant.pk)
+
+        DocumentEtudiant.objects.create(
+            etudiant=etudiant, type_document='photo', fichier=ContentFile(b'photo', name='photo.jpg'), valide=True
+        )
+        etudiant.refresh_from_db()
+        self.assertEqual((etudiant.nb_documents, etudiant.nb_documents_valides), (1, 1))
+
+        # Modification du profil à partir d'une instance chargée avant le dépôt
+        perime.telephone = '691111111'
+        perime.save()
+
+        etudiant.refresh_from_db()
+        self.assertEqual(etudiant.telephone, '691111111')
+        self.assertEqual((etudiant.nb_documents, etudiant.nb_documents_valides), (1, 1))
+
+    def test_compteurs_ecrits_si_listes_dans_update_fields(self):
+        etudiant = creer_etudiant()
+        etudiant.nb_documents = 3
+        etudiant.save(update_fields=['nb_documents'])
+        etudiant.refresh_from_db()
+        self.assertEqual(etudiant.nb_documents, 3)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), EXPORT_DELAI_BLOCAGE_MINUTES=60)
+class JobsExportBloquesTests(TestCase):
+    """Jobs d'export restés 'en_cours' après l'arrêt d'un worker"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin-export', password='x', role='ADMIN')
+
+    def demander(self):
+        return ExportService.demander_export(self.admin, 'csv', filtres={'recherche': 'abc'})
+
+    def test_job_en_cours_recent_reutilise(self):
+        job, cree = self.demander()
+        self.assertTrue(cree)
+        self.assertEqual(ExportService.reserver_prochain_job().pk, job.pk)
+
+        meme, cree = self.demander()
+        self.assertFalse(cree)
+        self.assertEqual(meme.pk, job.pk)
+
+    def test_job_bloque_remis_en_attente_et_reutilise(self):
+        job, _ = self.demander()
+        ExportService.reserver_prochain_job()
+        ExportJob.objects.filter(pk=job.pk).update(date_debut=timezone.now() - timedelta(hours=2))
+
+        meme, cree = self.demander()
+        self.assertFalse(cree)
+        self.assertEqual(meme.pk, job.pk)
+        self.assertEqual(meme.statut, 'en_attente')
+
+        repris = ExportService.reserver_prochain_job()
+        self.assertEqual(repris.pk, job.pk)
+        self.assertEqual(repris.statut, 'en_cours')
+
+    def test_reservation_relance_les_jobs_bloques(self):
+        job, _ = self.demander()
+        ExportService.reserver_prochain_job()
+        ExportJob.objects.filter(pk=job.pk).update(date_debut=timezone.now() - timedelta(hours=2))
+
+        repris = ExportService.reserver_prochain_job()
+        self.assertEqual(repris.pk, job.pk)
+        self.assertGreater(repris.date_debut, timezone.now() - timedelta(minutes=1))
+
+    def test_filtres_invalides_refuses_a_la_demande(self):
+        self.client.force_login(self.admin)
+        url = reverse('academique:export_etudiants_demande')
+        for filtres in ('{"documents_en_attente": "abc"}', '{"filiere": "x"}', '[1]', '{'):
+            with self.subTest(filtres=filtres):
+                response = self.client.post(url, {'format_export': 'csv', 'filtres': filtres})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExportJob.objects.exists())
+
+        response = self.client.post(url, {'format_export': 'csv', 'filtres': '{"documents_en_attente": "2"}'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ExportJob.objects.get().filtres, {'documents_en_attente': '2'})
+
+    def test_resultat_d_un_worker_depasse_ignore(self):
+        job, _ = self.demander()
+        ancien = ExportService.reserver_prochain_job()
+        ExportJob.objects.filter(pk=job.pk).update(date_debut=timezone.now() - timedelta(hours=2))
+        ancien.date_debut = timezone.now() - timedelta(hours=2)
+        nouveau = ExportService.reserver_prochain_job()
+
+        ExportService.executer_job(ancien)
+        job.refresh_from_db()
+        self.assertEqual(job.statut, 'en_cours')
+        self.assertEqual(job.date_debut, nouveau.date_debut)
+
+        ExportService.executer_job(nouveau)
+        job.refresh_from_db()
+        self.assertEqual(job.statut, 'termine')
+        self.assertTrue(job.fichier)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class FichesPdfTests(TestCase):
+    """Fiches d'inscription : fusion depuis le cache et lots confiés à la file des exports"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin-fiches', 'admin@iutessa.test', 'x', role='ADMIN')
+        self.etudiants = [creer_etudiant(numero) for numero in range(1, 4)]
+
+    def action(self, action):
+        self.client.force_login(self.admin)
+        return self.client.post(reverse('admin:academique_etudiantacademique_changelist'), {
+            'action': action,
+            '_selected_action': [e.pk for e in self.etudiants],
+        })
+
+    def test_petit_lot_servi_directement(self):
+        response = self.action('fiches_pdf_zip')
+
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_gros_lot_mis_en_file(self):
+        with mock.patch('academique.admin.SEUIL_FICHES_DIRECTES', 2):
+            response = self.action('fiches_pdf_zip')
+
+        self.assertEqual(response.status_code, 302)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.format_export, 'fiches_zip')
+        self.assertEqual(job.filtres, {'ids': ','.join(str(e.pk) for e in self.etudiants)})
+
+        ExportService.executer_job(ExportService.reserver_prochain_job())
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.nombre_lignes), ('termine', 3))
+        with job.fichier.open('rb') as f, zipfile.ZipFile(f) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                [f'TST/fiche_inscription_{e.numero_matricule}.pdf' for e in self.etudiants],
+            )
+
+    @unittest.skipIf(pdf.PdfWriter is None, "pypdf non installé")
+    def test_fusion_assemblee_depuis_le_cache(self):
+        from pypdf import PdfReader
+
+        resultat = pdf.FicheService.generer_fiches(EtudiantAcademique.objects.select_related('filiere'))
+        destination = BytesIO()
+        with mock.patch.object(pdf, 'rendre_fiche', side_effect=AssertionError('fiche redessinée')):
+            pdf.FicheService.ecrire_fusion(resultat['chemins'], destination)
+
+        destination.seek(0)
+        self.assertEqual(len(PdfReader(destination).pages), 3)
+
+
+def image_jpeg(couleur):
+    sortie = BytesIO()
+    Image.new('RGB', (40, 40), couleur).save(sortie, 'JPEG')
+    return ContentFile(sortie.getvalue(), name='photo.jpg')
+
+
+def fichiers_media():
+    return {
+        os.path.join(dossier, nom)
+        for dossier, _, noms in os.walk(settings.MEDIA_ROOT)
+        for nom in noms
+    }
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ApercusTests(TestCase):
+    """Aperçus des documents produits par le worker"""
+
+    def setUp(self):
+        self.document = DocumentEtudiant.objects.create(
+            etudiant=creer_etudiant(), type_document='photo', fichier=image_jpeg('red')
+        )
+
+    def test_apercu_produit(self):
+        document = ApercuService.reserver_prochain()
+
+        self.assertEqual(ApercuService.generer(document), 'pret')
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.apercu_statut, 'pret')
+        self.assertTrue(self.document.apercu)
+
+    def test_fichier_remplace_pendant_la_generation(self):
+        document = ApercuService.reserver_prochain()
+
+        # Nouveau dépôt (comme etudiant_documents) pendant que le worker travaille
+        remplace = DocumentEtudiant.objects.get(pk=self.document.pk)
+        remplace.fichier = image_jpeg('blue')
+        remplace.apercu = ''
+        remplace.apercu_statut = 'en_attente'
+        remplace.save()
+
+        self.assertEqual(ApercuService.generer(document), 'en_attente')
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.fichier.name, remplace.fichier.name)
+        self.assertEqual((self.document.apercu.name, self.document.apercu_statut), ('', 'en_attente'))
+
+        # Le nouveau fichier reçoit son propre aperçu au passage suivant
+        self.assertEqual(ApercuService.generer(ApercuService.reserver_prochain()), 'pret')
+
+    def test_document_supprime_pendant_la_generation(self):
+        document = ApercuService.reserver_prochain()
+        apercu_image = apercus.apercu_image
+        avant = fichiers_media()
+
+        def rejet_pendant_la_generation(*args):
+            # Rejet du document (validation) pendant que le worker produit la vignette
+            DocumentEtudiant.objects.filter(pk=document.pk).delete()
+            return apercu_image(*args)
+
+        with mock.patch.object(apercus, 'apercu_image', side_effect=rejet_pendant_la_generation):
+            self.assertEqual(ApercuService.generer(document), 'supprime')
+
+        self.assertFalse(DocumentEtudiant.objects.filter(pk=document.pk).exists())
+        self.assertEqual(fichiers_media(), avant, "aperçu écrit pour un document supprimé")
+
+        # Le worker poursuit avec la file (vide)
+        call_command('generer_apercus', once=True, stdout=StringIO())
+
+
+class RechercheEtudiantsTests(TestCase):
+    """Recherche des étudiants : préfixe de matricule ou de CNI, mots du nom (trigrammes hors PostgreSQL)"""
+
+    def setUp(self):
+        for numero, nom, prenoms, matricule in [
+            (1, 'Abdoulaye', 'Élodie-Anne', 'IUTESSA-2024-0001'),
+            (2, 'Bouba', 'Marcel', 'IUTESSA-2024-0002'),
+            (3, 'Hamadou', 'Léon Anan', 'IUTESSA-2025-0001'),
+        ]:
+            creer_etudiant(numero, nom=nom, prenoms=prenoms, numero_matricule=matricule)
+
+    def chercher(self, terme):
+        return sorted(
+            rechercher_etudiants(EtudiantAcademique.objects.all(), terme).values_list('nom', flat=True)
+        )
+
+    def test_prefixe_de_matricule_et_de_cni(self):
+        self.assertEqual(self.chercher('IUTESSA-2024'), ['Abdoulaye', 'Bouba'])
+        self.assertEqual(self.chercher('iutessa-2025-0001'), ['Hamadou'])
+        self.assertEqual(self.chercher('CNI000002'), ['Bouba'])
+        # Préfixe uniquement : un fragment du milieu ne correspond pas
+        self.assertEqual(self.chercher('2024-0002'), [])
+
+    def test_nom_sans_accents_ni_casse(self):
+        self.assertEqual(self.chercher('elodie'), ['Abdoulaye'])
+        self.assertEqual(self.chercher('LEON hamadou'), ['Hamadou'])
+        self.assertEqual(self.chercher('bouba léon'), [])
+
+    @unittest.skipIf(not utilise_table_trigrammes(), "trigrammes servis par pg_trgm")
+    def test_sous_chaine_par_la_table_des_trigrammes(self):
+        self.assertEqual(self.chercher('lodi'), ['Abdoulaye'])
+        self.assertEqual(self.chercher('arce'), ['Bouba'])
+        # Trigrammes tous présents (« ana », « nan » dans « anan ») sans la sous-chaîne : écarté
+        self.assertEqual(self.chercher('anana'), [])
+
+        with CaptureQueriesContext(connection) as requetes:
+            self.chercher('marcel')
+        self.assertIn('academique_trigrammeetudiant', requetes.captured_queries[0]['sql'])
+
+    @unittest.skipIf(not utilise_table_trigrammes(), "trigrammes servis par pg_trgm")
+    def test_trigrammes_tenus_a_jour(self):
+        etudiant = EtudiantAcademique.objects.get(nom='Bouba')
+        etudiant.prenoms = 'Issa'
+        etudiant.save()
+
+        self.assertEqual(self.chercher('marcel'), [])
+        self.assertEqual(self.chercher('issa'), ['Bouba'])
+
+        # Colonne écrite hors save() : reconstruire() recale l'index
+        EtudiantAcademique.objects.filter(pk=etudiant.pk).update(prenoms='Moussa')
+        RechercheService.reconstruire()
+        self.assertEqual(self.chercher('ouss'), ['Bouba'])
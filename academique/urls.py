@@ -29,6 +29,10 @@ urlpatterns = [
          views.admin_etudiant_detail, 
          name='admin_etudiant_detail'),
     
+    path('administration/etudiants/<int:etudiant_id>/dossier.zip', 
+         views.admin_etudiant_dossier_zip, 
+         name='admin_etudiant_dossier_zip'),
+    
     path('administration/etudiants/import/', 
          views.admin_import_etudiants, 
          name='admin_import_etudiants'),
@@ -37,11 +41,32 @@ urlpatterns = [
          views.export_etudiants_excel, 
          name='export_etudiants_excel'),
     
+    # Exports en arrière-plan
+    path('administration/exports/', 
+         views.export_etudiants_demande, 
+         name='export_etudiants_demande'),
+    
+    path('administration/exports/<int:job_id>/', 
+         views.export_etudiants_statut, 
+         name='export_etudiants_statut'),
+    
+    path('administration/exports/<int:job_id>/telecharger/', 
+         views.export_etudiants_telecharger, 
+         name='export_etudiants_telecharger'),
+    
     # Validation des documents
     path('administration/documents/', 
          views.admin_documents_validation, 
          name='admin_documents_validation'),
     
+    path('administration/filieres/<int:pk>/documents-en-attente.zip', 
+         views.admin_filiere_documents_zip, 
+         name='admin_filiere_documents_zip'),
+    
+    path('administration/documents/valider-lot/', 
+         views.admin_documents_validation_lot, 
+         name='admin_documents_validation_lot'),
+    
     path('administration/documents/<int:doc_id>/valider/', 
          views.admin_validate_document, 
          name='admin_validate_document'),
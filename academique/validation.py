@@ -0,0 +1,69 @@
+# academique/validation.py
+"""
+Validation des documents par lots.
+
+Les décisions d'un lot (validation ou rejet de documents en attente) sont
+appliquées dans une seule transaction : un UPDATE groupé pour les documents
+validés, une suppression groupée pour les rejetés (comme pour un rejet
+unitaire, l'étudiant doit redéposer la pièce), puis le recalcul des
+compteurs des dossiers concernés. Une fois la transaction validée, chaque
+étudiant reçoit une seule notification qui récapitule toutes les décisions ;
+l'email correspondant est envoyé hors requête par la commande envoyer_emails.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from notifications.services import NotificationService
+from .dossiers import DossierService
+from .models import DocumentEtudiant
+
+ACTIONS = ('valider', 'rejeter')
+
+
+class ValidationDocumentsService:
+    """Validation et rejet de documents en masse"""
+
+    @staticmethod
+    def traiter(document_ids, action, validateur, commentaire='', notifier=True):
+        """
+        Valide ou rejette les documents en attente parmi `document_ids`.
+        Les documents déjà validés ou inexistants sont ignorés.
+        Retourne {'traites': n, 'etudiants': n}.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Action inconnue : {action}")
+
+        with transaction.atomic():
+            documents = list(
+                DocumentEtudiant.objects.select_for_update(of=('self',)).select_related(
+                    'etudiant__user'
+                ).filter(id__in=set(document_ids), valide=False)
+            )
+            if not documents:
+                return {'traites': 0, 'etudiants': 0}
+
+            if action == 'valider':
+                # Mêmes valeurs pour tout le lot : un seul UPDATE (plutôt qu'un bulk_update en CASE)
+                DocumentEtudiant.objects.filter(id__in=[d.id for d in documents]).update(
+                    valide=True, valide_par=validateur, commentaire=commentaire
+                )
+            else:
+                # Suppression groupée : ne passe pas par DocumentEtudiant.delete(),
+                # les compteurs sont recalculés ci-dessous pour tout le lot
+                DocumentEtudiant.objects.filter(id__in=[d.id for d in documents]).delete()
+
+            etudiant_ids = {document.etudiant_id for document in documents}
+            DossierService.recalculer(etudiant_ids)
+
+            if notifier:
+                decisions = defaultdict(list)
+                for document in documents:
+                    decisions[document.etudiant].append((document, action == 'valider'))
+                transaction.on_commit(
+                    lambda: NotificationService.notify_documents_reviewed(
+                        decisions, validateur, commentaire
+                    )
+                )
+
+        return {'traites': len(documents), 'etudiants': len(etudiant_ids)}
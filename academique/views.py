@@ -2,21 +2,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
+from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.utils import timezone
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.contrib.auth import get_user_model
 from users.decorators import role_required, admin_required
-from .models import Filiere, EtudiantAcademique, DocumentEtudiant, ImportEtudiant
+from users.roles import attribuer_roles, roles_differes
+from .models import Filiere, EtudiantAcademique, DocumentEtudiant, ImportEtudiant, ExportJob
 from .forms import (
     FiliereForm, EtudiantInscriptionForm, DocumentUploadForm, 
-    ImportEtudiantForm, FiltreEtudiantForm, ValidationDocumentForm
+    ImportEtudiantForm, FiltreEtudiantForm, ValidationDocumentForm, ExportForm
 )
+from .exports import ExportService, filtrer_etudiants, CONTENT_TYPES
+from .pdf import FicheService
+from .archives import ArchiveService, reponse_zip
+from .dossiers import DossierService, TRIS_ETUDIANTS
+from .validation import ValidationDocumentsService, ACTIONS as ACTIONS_VALIDATION
+from administration.asynchrone import lister, rendre
+from administration.pagination import paginer
+from administration.metrics import metriques
+from django.core.files.storage import storages
+import json
+import os
 import pandas as pd
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 import openpyxl
 from notifications.services import NotificationService  # AJOUT IMPORT NOTIFICATION
 
@@ -114,42 +127,29 @@ def admin_etudiants_list(request):
     
     # Filtrage
     form = FiltreEtudiantForm(request.GET)
+    filtres = {}
+    tri = 'recents'
     if form.is_valid():
-        filiere = form.cleaned_data.get('filiere')
-        statut_inscription = form.cleaned_data.get('statut_inscription')
-        statut_validation = form.cleaned_data.get('statut_validation')
-        recherche = form.cleaned_data.get('recherche')
-        
-        if filiere:
-            etudiants = etudiants.filter(filiere=filiere)
-        if statut_inscription:
-            etudiants = etudiants.filter(statut_inscription=statut_inscription)
-        if statut_validation:
-            etudiants = etudiants.filter(statut_validation=statut_validation)
-        if recherche:
-            etudiants = etudiants.filter(
-                Q(nom__icontains=recherche) |
-                Q(prenoms__icontains=recherche) |
-                Q(numero_matricule__icontains=recherche) |
-                Q(cni__icontains=recherche)
-            )
+        filtres = ExportService.normaliser_filtres(form.cleaned_data)
+        etudiants = filtrer_etudiants(etudiants, form.cleaned_data)
+        tri = form.cleaned_data.get('tri') or tri
     
-    paginator = Paginator(etudiants, 20)
-    page = request.GET.get('page')
-    etudiants = paginator.get_page(page)
+    # Compteurs de documents et progression lus sur les colonnes dénormalisées de l'étudiant
+    etudiants = paginer(request, etudiants, TRIS_ETUDIANTS[tri], 20)
     
     # Statistiques
-    stats = {
-        'total': EtudiantAcademique.objects.count(),
-        'en_attente': EtudiantAcademique.objects.filter(statut_validation='en_attente').count(),
-        'valides': EtudiantAcademique.objects.filter(statut_validation='valide').count(),
-        'rejetes': EtudiantAcademique.objects.filter(statut_validation='rejete').count(),
-    }
+    stats = EtudiantAcademique.objects.aggregate(
+        total=Count('id'),
+        en_attente=Count('id', filter=Q(statut_validation='en_attente')),
+        valides=Count('id', filter=Q(statut_validation='valide')),
+        rejetes=Count('id', filter=Q(statut_validation='rejete')),
+    )
     
     context = {
         'etudiants': etudiants,
         'form': form,
         'stats': stats,
+        'export_form': ExportForm(initial={'filtres': json.dumps(filtres)}),
     }
     
     return render(request, 'academique/admin/etudiants_list.html', context)
@@ -211,20 +211,74 @@ def admin_documents_validation(request):
     if type_doc:
         documents = documents.filter(type_document=type_doc)
     
-    paginator = Paginator(documents, 15)
-    page = request.GET.get('page')
-    documents = paginator.get_page(page)
+    # Page de 20 : la grille d'aperçus tient sur 4 lignes de 5
+    documents = paginer(request, documents, ('-date_upload', 'id'), 20)
     
     context = {
         'documents': documents,
         'types_documents': DocumentEtudiant.TYPE_DOCUMENT_CHOICES,
         'selected_type': type_doc,
+        'affichage': 'liste' if request.GET.get('affichage') == 'liste' else 'grille',
         'pending_count': DocumentEtudiant.objects.filter(valide=False).count(),
+        'filieres': Filiere.objects.order_by('code'),
     }
     
     return render(request, 'academique/admin/documents_validation.html', context)
 
 
+@admin_required
+@require_POST
+def admin_documents_validation_lot(request):
+    """
+    Validation ou rejet de plusieurs documents en une transaction, avec une seule
+    notification par étudiant. Accepte un formulaire (redirection vers la liste)
+    ou un corps JSON {"documents": [ids], "action": "valider"|"rejeter", "commentaire": ""}
+    (réponse JSON).
+    """
+    en_json = request.content_type == 'application/json'
+    if en_json:
+        try:
+            donnees = json.loads(request.body or b'{}')
+            document_ids = [int(i) for i in donnees.get('documents', [])]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'Requête invalide'}, status=400)
+        action = donnees.get('action')
+        commentaire = str(donnees.get('commentaire', '')).strip()
+    else:
+        document_ids = [int(i) for i in request.POST.getlist('documents') if i.isdigit()]
+        action = request.POST.get('action')
+        commentaire = request.POST.get('commentaire', '').strip()
+    
+    erreur = None
+    if action not in ACTIONS_VALIDATION:
+        erreur = 'Action inconnue.'
+    elif not document_ids:
+        erreur = 'Aucun document sélectionné.'
+    elif action == 'rejeter' and not commentaire:
+        erreur = 'Un motif est requis pour rejeter des documents.'
+    if erreur:
+        if en_json:
+            return JsonResponse({'success': False, 'error': erreur}, status=400)
+        messages.error(request, erreur)
+        return redirect('academique:admin_documents_validation')
+    
+    resultat = ValidationDocumentsService.traiter(document_ids, action, request.user, commentaire)
+    
+    if en_json:
+        return JsonResponse({'success': True, **resultat})
+    verbe = 'validé' if action == 'valider' else 'rejeté'
+    messages.success(
+        request,
+        f"{resultat['traites']} document(s) {verbe}(s) pour {resultat['etudiants']} étudiant(s). "
+        f"Une notification récapitulative a été envoyée à chaque étudiant."
+    )
+    # Retour sur la page d'origine (filtres et curseur conservés)
+    suivant = request.POST.get('suivant', '')
+    if not url_has_allowed_host_and_scheme(suivant, allowed_hosts={request.get_host()}):
+        suivant = reverse('academique:admin_documents_validation')
+    return redirect(suivant)
+
+
 @admin_required
 def admin_validate_document(request, doc_id):
     """
@@ -277,28 +331,36 @@ def admin_validate_document(request, doc_id):
 @admin_required
 def admin_etudiant_detail(request, etudiant_id):
     """Détails complets d'un étudiant pour l'admin"""
-    etudiant = get_object_or_404(EtudiantAcademique, id=etudiant_id)
+    etudiant = get_object_or_404(EtudiantAcademique.objects.select_related('user', 'filiere'), id=etudiant_id)
     
-    # Documents avec statistiques
-    documents = etudiant.documents.all()
-    documents_stats = {
-        'total': documents.count(),
-        'valides': documents.filter(valide=True).count(),
-        'en_attente': documents.filter(valide=False).count(),
-    }
-    
-    # Progression du dossier
-    progression = _calculate_completion_progress(etudiant)
+    # Documents, statistiques et progression à partir d'un seul chargement
+    dossier = DossierService.etat(etudiant)
     
     context = {
         'etudiant': etudiant,
-        'documents': documents,
-        'documents_stats': documents_stats,
-        'progression': progression,
+        'documents': dossier.documents,
+        'documents_stats': dossier.stats,
+        'progression': dossier.progression,
     }
     
     return render(request, 'academique/admin/etudiant_detail.html', context)
 
+@admin_required
+def admin_etudiant_dossier_zip(request, etudiant_id):
+    """Archive ZIP de toutes les pièces d'un étudiant, envoyée en flux"""
+    etudiant = get_object_or_404(EtudiantAcademique, id=etudiant_id)
+    entrees = ArchiveService.documents_etudiant(etudiant)
+    return reponse_zip(request, entrees, f"dossier_{etudiant.numero_matricule}.zip")
+
+
+@admin_required
+def admin_filiere_documents_zip(request, pk):
+    """Archive ZIP des pièces en attente de validation d'une filière, envoyée en flux"""
+    filiere = get_object_or_404(Filiere, pk=pk)
+    type_doc = request.GET.get('type') or None
+    entrees = ArchiveService.documents_en_attente_filiere(filiere, type_doc)
+    return reponse_zip(request, entrees, f"documents_en_attente_{filiere.code}.zip")
+
 @admin_required
 def admin_validate_inscription(request, etudiant_id):
     """Validation complète d'une inscription avec notifications"""
@@ -378,6 +440,57 @@ def export_etudiants_excel(request):
     return response
 
 
+@admin_required
+@require_POST
+def export_etudiants_demande(request):
+    """
+    Met en file un export d'étudiants (traité par `manage.py process_exports`).
+    Une demande identique récente réutilise le fichier déjà produit.
+    """
+    form = ExportForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    
+    job, created = ExportService.demander_export(
+        request.user,
+        form.cleaned_data['format_export'],
+        inclure_documents=form.cleaned_data['inclure_documents'],
+        filtres=form.cleaned_data['filtres'],
+    )
+    
+    return JsonResponse(_export_job_data(job, created), status=202 if created else 200)
+
+
+@admin_required
+def export_etudiants_statut(request, job_id):
+    """Statut d'un export (interrogé périodiquement par l'interface admin)"""
+    job = get_object_or_404(ExportJob, id=job_id)
+    return JsonResponse(_export_job_data(job))
+
+
+@admin_required
+def export_etudiants_telecharger(request, job_id):
+    """Téléchargement du fichier d'un export terminé (envoyé par blocs, sans chargement en mémoire)"""
+    job = get_object_or_404(ExportJob, id=job_id, statut='termine')
+    if not job.fichier:
+        raise Http404("Fichier d'export introuvable")
+    
+    try:
+        fichier = job.fichier.open('rb')
+    except OSError:
+        raise Http404("Fichier d'export introuvable")
+    
+    extension = os.path.splitext(job.fichier.name)[1].lstrip('.')
+    content_type = CONTENT_TYPES['zip'] if extension == 'zip' else CONTENT_TYPES[job.format_export]
+    
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=ExportService.nom_fichier(job, extension),
+        content_type=content_type,
+    )
+
+
 # =================== VIEWS ÉTUDIANT ===================
 
 @role_required('ETUDIANT')
@@ -445,17 +558,13 @@ def etudiant_inscription(request):
 @role_required('ETUDIANT')
 def etudiant_profile(request):
     """Profil étudiant"""
-    try:
-        etudiant = request.user.etudiant_academique
-    except EtudiantAcademique.DoesNotExist:
+    etudiant = EtudiantAcademique.objects.select_related('filiere').filter(user=request.user).first()
+    if etudiant is None:
         return redirect('academique:etudiant_inscription')
     
-    documents = etudiant.documents.all()
-    documents_requis = [choice[0] for choice in DocumentEtudiant.TYPE_DOCUMENT_CHOICES]
-    documents_manquants = [
-        type_doc for type_doc in documents_requis 
-        if not documents.filter(type_document=type_doc).exists()
-    ]
+    # Une seule requête pour les documents ; les types manquants se déduisent en mémoire
+    dossier = DossierService.etat(etudiant)
+    documents_manquants = dossier.documents_manquants
     
     # NOTIFICATION: Rappel documents manquants (si nécessaire)
     if documents_manquants and not request.session.get('rappel_documents_sent'):
@@ -464,9 +573,9 @@ def etudiant_profile(request):
     
     context = {
         'etudiant': etudiant,
-        'documents': documents,
+        'documents': dossier.documents,
         'documents_manquants': documents_manquants,
-        'progression': _calculate_completion_progress(etudiant),
+        'progression': dossier.progression,
     }
     
     return render(request, 'academique/etudiant/profile.html', context)
@@ -495,6 +604,9 @@ def etudiant_documents(request):
                 existing.valide = False
                 existing.valide_par = None
                 existing.commentaire = ''
+                # Nouvel aperçu à produire par le worker (generer_apercus)
+                existing.apercu = ''
+                existing.apercu_statut = 'en_attente'
                 existing.save()
                 messages.success(request, 'Document remplacé avec succès.')
             else:
@@ -554,53 +666,29 @@ def etudiant_fiche_pdf(request):
         messages.error(request, 'Vous devez d\'abord compléter votre inscription.')
         return redirect('academique:etudiant_inscription')
     
-    # Créer le PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="fiche_inscription_{etudiant.numero_matricule}.pdf"'
-    
-    p = canvas.Canvas(response, pagesize=letter)
-    width, height = letter
-    
-    # En-tête
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, "FICHE D'INSCRIPTION ACADÉMIQUE")
-    
-    # Informations étudiant
-    y_position = height - 100
-    p.setFont("Helvetica", 12)
-    
-    infos = [
-        f"Matricule: {etudiant.numero_matricule}",
-        f"Nom complet: {etudiant.nom_complet}",
-        f"CNI: {etudiant.cni}",
-        f"Téléphone: {etudiant.telephone}",
-        f"Email: {etudiant.email_personnel}",
-        f"Filière: {etudiant.filiere.nom}",
-        f"Date d'inscription: {etudiant.date_inscription.strftime('%d/%m/%Y')}",
-    ]
-    
-    for info in infos:
-        p.drawString(50, y_position, info)
-        y_position -= 25
-    
-    p.showPage()
-    p.save()
+    # Fiche en cache, redessinée seulement si les informations imprimées ont changé
+    chemin = FicheService.obtenir_fiche(etudiant)
     
-    return response
+    return FileResponse(
+        storages['chemins'].open(chemin, 'rb'),
+        as_attachment=True,
+        filename=f"fiche_inscription_{etudiant.numero_matricule}.pdf",
+        content_type='application/pdf',
+    )
 
 
 # =================== VIEWS PUBLIQUES ===================
 
-def filieres_list_public(request):
+async def filieres_list_public(request):
     """Liste publique des filières"""
-    filieres = Filiere.objects.filter(statut='active').order_by('nom')
+    filieres = await lister(Filiere.objects.filter(statut='active').order_by('nom'))
     
     context = {
         'filieres': filieres,
         'total_places': sum(f.places_disponibles for f in filieres),
     }
     
-    return render(request, 'academique/public/filieres_list.html', context)
+    return await rendre(request, 'academique/public/filieres_list.html', context)
 
 
 def filiere_detail_public(request, code):
@@ -631,8 +719,9 @@ def ajax_stats_dashboard(request):
 
 # =================== FONCTIONS UTILITAIRES ===================
 
+@roles_differes()
 def _process_excel_import(import_obj):
-    """Traite l'import Excel des étudiants"""
+    """Traite l'import Excel des étudiants (groupes attribués en une fois, après la boucle)"""
     try:
         df = pd.read_excel(import_obj.fichier.path)
         
@@ -704,6 +793,9 @@ def _process_excel_import(import_obj):
                 error_count += 1
                 errors.append(f"Ligne {index + 2}: {str(e)}")
         
+        # Groupe Étudiants : un seul bulk_create pour tous les comptes créés
+        attribuer_roles(users_imported)
+        
         # NOTIFICATION: Envoyer notifications aux étudiants importés
         if users_imported:
             NotificationService.notify_import_success(users_imported, import_obj.importe_par)
@@ -714,6 +806,9 @@ def _process_excel_import(import_obj):
         import_obj.nombre_erreurs = error_count
         import_obj.rapport_erreurs = '\n'.join(errors)
         import_obj.save()
+
+        metriques.incrementer('import_lignes_total', success_count, source='etudiants', statut='importee')
+        metriques.incrementer('import_lignes_total', error_count, source='etudiants', statut='erreur')
         
         return {
             'success': success_count,
@@ -726,31 +821,19 @@ def _process_excel_import(import_obj):
         import_obj.save()
         raise e
     
-def _calculate_completion_progress(etudiant):
-    """Calcule le pourcentage de completion du profil"""
-    total_fields = 10  # Nombre de champs importants
-    completed_fields = 0
-    
-    # Vérifier les champs obligatoires
-    if etudiant.date_naissance:
-        completed_fields += 1
-    if etudiant.lieu_naissance:
-        completed_fields += 1
-    if etudiant.cni:
-        completed_fields += 1
-    if etudiant.telephone:
-        completed_fields += 1
-    if etudiant.email_personnel:
-        completed_fields += 1
-    if etudiant.adresse:
-        completed_fields += 1
-    if etudiant.nom_pere:
-        completed_fields += 1
-    if etudiant.nom_mere:
-        completed_fields += 1
-    if etudiant.diplome_obtenu:
-        completed_fields += 1
-    if etudiant.annee_obtention:
-        completed_fields += 1
-    
-    return int((completed_fields / total_fields) * 100)
\ No newline at end of file
+def _export_job_data(job, created=False):
+    """Représentation JSON d'un ExportJob pour l'interface admin"""
+    data = {
+        'success': True,
+        'id': job.id,
+        'created': created,
+        'statut': job.statut,
+        'statut_display': job.get_statut_display(),
+        'nombre_lignes': job.nombre_lignes,
+        'erreur': job.erreur,
+        'status_url': reverse('academique:export_etudiants_statut', args=[job.id]),
+        'download_url': None,
+    }
+    if job.statut == 'termine' and job.fichier:
+        data['download_url'] = reverse('academique:export_etudiants_telecharger', args=[job.id])
+    return data
@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class AdministrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'administration'
-    verbose_name = 'Administration'
\ No newline at end of file
+    verbose_name = 'Administration'
+
+    def ready(self):
+        from . import compteurs, stockage
+        stockage.connecter_signaux()
+        compteurs.connecter_signaux()
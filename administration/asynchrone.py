@@ -0,0 +1,72 @@
+# administration/asynchrone.py
+"""
+Outils pour les vues asynchrones (servies nativement par uvicorn en ASGI).
+
+Les requêtes des vues passent par l'ORM asynchrone (acount, aget, itération
+`async for`). Le rendu des templates reste synchrone : les context processors
+(utilisateur, messages) lisent la session à la demande, il est donc exécuté
+dans le pool de threads via rendre().
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import render
+
+TAILLE_BLOC_FICHIER = 256 * 1024
+
+
+async def utilisateur(request):
+    """
+    Utilisateur connecté, chargé sans bloquer la boucle d'événements.
+    request.user désigne ensuite le même objet : pas de seconde requête au rendu.
+    """
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def rendre(request, template_name, context=None, **kwargs):
+    """render() pour les vues asynchrones"""
+    return await sync_to_async(render)(request, template_name, context, **kwargs)
+
+
+async def lister(queryset):
+    """Évalue un queryset sans bloquer : liste des objets"""
+    return [obj async for obj in queryset]
+
+
+async def lire_fichier(chemin, debut, longueur):
+    """Générateur asynchrone des blocs d'un fichier ; les lectures disque se font dans un thread"""
+    with open(chemin, 'rb') as fichier:
+        fichier.seek(debut)
+        restant = longueur
+        while restant > 0:
+            bloc = await asyncio.to_thread(fichier.read, min(TAILLE_BLOC_FICHIER, restant))
+            if not bloc:
+                break
+            restant -= len(bloc)
+            yield bloc
+
+
+def lire_fichier_sync(chemin, debut, longueur):
+    with open(chemin, 'rb') as fichier:
+        fichier.seek(debut)
+        restant = longueur
+        while restant > 0:
+            bloc = fichier.read(min(TAILLE_BLOC_FICHIER, restant))
+            if not bloc:
+                break
+            restant -= len(bloc)
+            yield bloc
+
+
+def flux_fichier(request, chemin, debut, longueur):
+    """
+    Itérateur des blocs d'un fichier adapté au serveur : asynchrone sous ASGI,
+    synchrone sous WSGI (runserver), où un itérateur asynchrone serait lu en
+    entier en mémoire avant l'envoi.
+    """
+    if isinstance(request, ASGIRequest):
+        return lire_fichier(chemin, debut, longueur)
+    return lire_fichier_sync(chemin, debut, longueur)
@@ -0,0 +1,345 @@
+# administration/benchmark.py
+"""
+Mesure de performance des vues les plus sollicitées.
+
+Chaque scénario est joué via le client de test Django (sans serveur HTTP) :
+un premier appel de chauffe, où sont comptées les requêtes SQL, puis
+`repetitions` appels chronométrés. Le résultat (p50/p95 en millisecondes,
+requêtes SQL) est écrit dans un fichier JSON qui sert de référence pour les
+exécutions suivantes.
+
+En option, une mesure de charge joue les vues asynchrones et celles qui font
+des entrées-sorties à travers le gestionnaire ASGI (AsyncClient, comme sous
+uvicorn), avec N requêtes simultanées : débit (requêtes/s) et p95 sous charge.
+Exécutée avant puis après une modification (--reference), elle compare les deux.
+
+mesurer_connexions() (commande benchmark_connexions) chiffre, sur la base
+PostgreSQL configurée, le temps d'établissement des connexions économisé par
+le pool psycopg 3 sous charge concurrente.
+"""
+import asyncio
+import json
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from academique.models import DocumentEtudiant, EtudiantAcademique, Filiere
+from administration.middleware import ProfilRequete
+from pages.models import Post
+
+User = get_user_model()
+
+
+def _scenarios(admin, etudiant, article, terme):
+    """(nom, utilisateur connecté ou None, URL)"""
+    scenarios = [
+        ('dashboard_admin', admin, reverse('administration:dashboard')),
+        ('dashboard_etudiant', etudiant, reverse('users:dashboard')),
+        ('etudiants_liste', admin, reverse('academique:admin_etudiants_list')),
+        ('etudiants_recherche', admin, f"{reverse('academique:admin_etudiants_list')}?recherche={terme}"),
+        ('notifications_non_lues', etudiant, reverse('notifications:ajax_unread_count')),
+        ('notifications_recentes', etudiant, reverse('notifications:ajax_recent')),
+        ('blog_liste', None, reverse('pages:blog')),
+        ('filieres_publiques', None, reverse('academique:filieres_list_public')),
+    ]
+    if article:
+        scenarios.append(('blog_detail', None, reverse('pages:blog_detail', kwargs={'slug': article.slug})))
+    return scenarios
+
+
+# Budget de requêtes SQL par vue (nom d'URL) : requêtes émises par la vue et le rendu
+# de son template, hors middlewares (session, authentification). Le budget ne doit
+# pas dépendre du volume de données ; administration/tests.py le vérifie à deux volumes.
+BUDGETS_REQUETES = {
+    'administration:dashboard': 8,
+    'academique:etudiant_profile': 5,
+    'academique:admin_etudiants_list': 6,
+    'academique:admin_etudiant_detail': 3,
+    'notifications:ajax_unread_count': 1,
+    'notifications:ajax_recent': 1,
+    'pages:blog': 6,
+    'pages:blog_detail': 6,
+    'academique:filieres_list_public': 1,
+}
+
+
+def percentile(durees, q):
+    return round(float(np.percentile(durees, q)), 2)
+
+
+# Scénarios de la mesure de charge : vues asynchrones et service des fichiers
+SCENARIOS_CHARGE = [
+    'notifications_non_lues', 'notifications_recentes', 'blog_liste', 'blog_detail', 'filieres_publiques', 'media',
+]
+
+
+def _contexte():
+    """(admin, étudiant, article, terme de recherche) pris dans la base"""
+    admin = User.objects.filter(role='ADMIN', is_active=True).order_by('id').first()
+    etudiant = User.objects.filter(
+        role='ETUDIANT', is_active=True, etudiant_academique__isnull=False
+    ).order_by('id').first()
+    if admin is None or etudiant is None:
+        raise ValueError("Il faut au moins un administrateur et un étudiant (voir generer_donnees)")
+
+    article = Post.objects.filter(status='published').order_by('-published_at').first()
+    terme = etudiant.etudiant_academique.nom[:4]
+    return admin, etudiant, article, terme
+
+
+async def _charge(client, url, concurrence, requetes):
+    """`requetes` appels de `url` répartis sur `concurrence` tâches simultanées"""
+    durees = []
+    statuts = set()
+    restantes = iter(range(requetes))
+
+    async def tache():
+        for _ in restantes:
+            debut = time.perf_counter()
+            response = await client.get(url)
+            if response.streaming:
+                async for _bloc in response:
+                    pass
+            durees.append((time.perf_counter() - debut) * 1000)
+            statuts.add(response.status_code)
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(tache() for _ in range(concurrence)))
+    total = time.perf_counter() - debut
+    return {
+        'url': url,
+        'statuts': sorted(statuts),
+        'debit_rps': round(requetes / total, 1),
+        'p50_ms': percentile(durees, 50),
+        'p95_ms': percentile(durees, 95),
+    }
+
+
+class BenchmarkService:
+    """Exécution des scénarios et comparaison à une référence"""
+
+    @staticmethod
+    def executer(repetitions=20, stdout=None):
+        admin, etudiant, article, terme = _contexte()
+
+        clients = {}
+        resultats = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for nom, user, url in _scenarios(admin, etudiant, article, terme):
+                client = clients.get(user)
+                if client is None:
+                    client = clients[user] = Client(raise_request_exception=False)
+                    if user is not None:
+                        client.force_login(user)
+
+                # Appel de chauffe (caches, connexions, templates compilés), qui sert aussi
+                # à compter les requêtes SQL hors de la boucle chronométrée
+                profil = ProfilRequete()
+                with connection.execute_wrapper(profil):
+                    client.get(url)
+
+                durees = []
+                for _ in range(repetitions):
+                    debut = time.perf_counter()
+                    response = client.get(url)
+                    durees.append((time.perf_counter() - debut) * 1000)
+
+                resultats[nom] = {
+                    'url': url,
+                    'statut': response.status_code,
+                    'p50_ms': percentile(durees, 50),
+                    'p95_ms': percentile(durees, 95),
+                    'moyenne_ms': round(sum(durees) / len(durees), 2),
+                    'requetes_sql': profil.nombre_requetes,
+                }
+                if stdout:
+                    r = resultats[nom]
+                    stdout.write(
+                        f"{nom:<26} {r['statut']}  p50 {r['p50_ms']:>8.1f} ms  "
+                        f"p95 {r['p95_ms']:>8.1f} ms  {r['requetes_sql']:>4} requêtes"
+                    )
+
+        return {
+            'date': timezone.now().isoformat(),
+            'base_de_donnees': connection.vendor,
+            'python': platform.python_version(),
+            'repetitions': repetitions,
+            'volumes': {
+                'filieres': Filiere.objects.count(),
+                'etudiants': EtudiantAcademique.objects.count(),
+                'utilisateurs': User.objects.count(),
+            },
+            'scenarios': resultats,
+        }
+
+    @staticmethod
+    def executer_charge(concurrence=20, requetes=200, stdout=None):
+        """Débit et p95 de SCENARIOS_CHARGE avec `concurrence` requêtes simultanées (gestionnaire ASGI)"""
+        admin, etudiant, article, terme = _contexte()
+        urls = dict((nom, (user, url)) for nom, user, url in _scenarios(admin, etudiant, article, terme))
+        fichier = DocumentEtudiant.objects.exclude(fichier='').values_list('fichier', flat=True).first()
+        if fichier:
+            urls['media'] = (None, settings.MEDIA_URL + fichier)
+
+        async def mesurer():
+            clients = {}
+            resultats = {}
+            for nom in SCENARIOS_CHARGE:
+                if nom not in urls:
+                    continue
+                user, url = urls[nom]
+                client = clients.get(user)
+                if client is None:
+                    client = clients[user] = AsyncClient(raise_request_exception=False)
+                    if user is not None:
+                        await client.aforce_login(user)
+                await client.get(url)  # chauffe
+                resultats[nom] = r = await _charge(client, url, concurrence, requetes)
+                if stdout:
+                    stdout.write(
+                        f"{nom:<26} {r['statuts']}  {r['debit_rps']:>8.1f} req/s  "
+                        f"p95 {r['p95_ms']:>8.1f} ms  ({concurrence} simultanées)"
+                    )
+            return resultats
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            scenarios = async_to_sync(mesurer)()
+        return {'concurrence': concurrence, 'requetes': requetes, 'scenarios': scenarios}
+
+    @staticmethod
+    def mesurer_connexions(concurrence=20, requetes=500, taille_pool=10, stdout=None):
+        """
+        `requetes` requêtes (SELECT 1) réparties sur `concurrence` threads : d'abord avec
+        une connexion neuve par requête (ce que produisent les threads éphémères d'ASGI
+        sans pool), puis avec un pool psycopg 3 de `taille_pool` connexions.
+        """
+        if connection.vendor != 'postgresql':
+            raise ValueError("Mesure réservée à PostgreSQL (base configurée : {})".format(connection.vendor))
+        try:
+            import psycopg
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise ValueError("psycopg 3 requis : pip install 'psycopg[binary,pool]'")
+
+        reglages = connection.settings_dict
+        parametres = {
+            'dbname': reglages['NAME'],
+            'user': reglages['USER'],
+            'password': reglages['PASSWORD'],
+            'host': reglages['HOST'],
+            'port': reglages['PORT'],
+            # Options de connexion (sslmode...), hors réglages propres à Django
+            **{
+                cle: valeur for cle, valeur in reglages['OPTIONS'].items()
+                if cle not in ('pool', 'isolation_level', 'server_side_binding', 'assume_role')
+            },
+        }
+        parametres = {cle: valeur for cle, valeur in parametres.items() if valeur not in (None, '')}
+
+        def sans_pool(_):
+            debut = time.perf_counter()
+            with psycopg.connect(**parametres) as conn:
+                conn.execute('SELECT 1')
+            return (time.perf_counter() - debut) * 1000
+
+        def jouer(fonction):
+            debut = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrence) as executeur:
+                durees = list(executeur.map(fonction, range(requetes)))
+            total = time.perf_counter() - debut
+            return {
+                'debit_rps': round(requetes / total, 1),
+                'p50_ms': percentile(durees, 50),
+                'p95_ms': percentile(durees, 95),
+                'total_s': round(total, 2),
+            }
+
+        resultats = {'sans_pool': jouer(sans_pool)}
+
+        with ConnectionPool(kwargs=parametres, min_size=taille_pool, max_size=taille_pool, open=True) as pool:
+            pool.wait()
+
+            def avec_pool(_):
+                debut = time.perf_counter()
+                with pool.connection() as conn:
+                    conn.execute('SELECT 1')
+                return (time.perf_counter() - debut) * 1000
+
+            resultats['avec_pool'] = jouer(avec_pool)
+
+        sans, avec = resultats['sans_pool'], resultats['avec_pool']
+        resultats.update({
+            'concurrence': concurrence,
+            'requetes': requetes,
+            'taille_pool': taille_pool,
+            'sslmode': parametres.get('sslmode', ''),
+            # Temps d'établissement de connexion économisé par requête (médiane)
+            'gain_p50_ms': round(sans['p50_ms'] - avec['p50_ms'], 2),
+        })
+        if stdout:
+            for mode in ('sans_pool', 'avec_pool'):
+                r = resultats[mode]
+                stdout.write(
+                    f"{mode:<10} {r['debit_rps']:>8.1f} req/s  p50 {r['p50_ms']:>7.2f} ms  "
+                    f"p95 {r['p95_ms']:>7.2f} ms  total {r['total_s']:.2f} s"
+                )
+        return resultats
+
+    @staticmethod
+    def comparer(resultat, reference, tolerance=20):
+        """
+        Régressions par rapport à une référence : p95 plus lent de plus de `tolerance` %,
+        nombre de requêtes SQL en hausse ou, sous charge, débit en baisse de plus de
+        `tolerance` %. Retourne une liste de messages.
+        """
+        regressions = []
+        for nom, actuel in resultat['scenarios'].items():
+            ancien = reference.get('scenarios', {}).get(nom)
+            if not ancien:
+                continue
+            if actuel['p95_ms'] > ancien['p95_ms'] * (1 + tolerance / 100):
+                regressions.append(f"{nom} : p95 {ancien['p95_ms']} -> {actuel['p95_ms']} ms")
+            if actuel['requetes_sql'] > ancien['requetes_sql']:
+                regressions.append(f"{nom} : {ancien['requetes_sql']} -> {actuel['requetes_sql']} requêtes SQL")
+
+        charge = resultat.get('charge') or {}
+        charge_reference = reference.get('charge') or {}
+        if charge.get('concurrence') == charge_reference.get('concurrence'):
+            for nom, actuel in charge.get('scenarios', {}).items():
+                ancien = charge_reference.get('scenarios', {}).get(nom)
+                if ancien and actuel['debit_rps'] < ancien['debit_rps'] * (1 - tolerance / 100):
+                    regressions.append(
+                        f"{nom} (charge) : {ancien['debit_rps']} -> {actuel['debit_rps']} req/s"
+                    )
+        return regressions
+
+    @staticmethod
+    def ecarts_charge(resultat, reference):
+        """[(scénario, débit de référence, débit actuel, variation en %)] pour l'affichage avant/après"""
+        anciens = (reference.get('charge') or {}).get('scenarios', {})
+        ecarts = []
+        for nom, actuel in (resultat.get('charge') or {}).get('scenarios', {}).items():
+            if nom in anciens and anciens[nom]['debit_rps']:
+                avant = anciens[nom]['debit_rps']
+                ecarts.append((nom, avant, actuel['debit_rps'], round((actuel['debit_rps'] / avant - 1) * 100, 1)))
+        return ecarts
+
+    @staticmethod
+    def ecrire(resultat, chemin):
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(resultat, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def lire(chemin):
+        with open(chemin, encoding='utf-8') as f:
+            return json.load(f)
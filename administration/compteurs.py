@@ -0,0 +1,94 @@
+# administration/compteurs.py
+"""
+Compteurs globaux de l'administration (nombre de blocs de page, etc.).
+
+Affichés sur toutes les pages d'administration, ils sont servis à trois niveaux :
+- par requête : compteurs(request) renvoie un objet paresseux mémorisé sur la
+  requête ; rien n'est calculé si aucun template ni aucune vue ne le lit, et
+  le calcul n'a lieu qu'une fois quel que soit le nombre de lecteurs ;
+- entre requêtes : les valeurs sont gardées dans le cache, sous une version
+  incrémentée à chaque enregistrement ou suppression d'un PageBlock. Un calcul
+  lancé avant une modification et terminé après s'écrit sous l'ancienne
+  version : il ne peut pas masquer la nouvelle valeur ;
+- en base : un seul aggregate() lorsque le cache est vide ou périmé.
+
+Avec le cache mémoire par défaut, l'invalidation ne touche que le processus
+courant (COMPTEURS_TIMEOUT borne alors l'écart) : en production, un cache
+partagé (CACHE_BACKEND) l'étend à tous les workers.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject
+
+from .metrics import cache_get
+
+CLE_VERSION = 'administration:compteurs:version'
+CLE_VALEURS = 'administration:compteurs:blocs'
+
+
+def _timeout():
+    return getattr(settings, 'COMPTEURS_TIMEOUT', 3600)
+
+
+def _version_initiale():
+    # Horodatage plutôt que 1 : une version perdue (éviction) ne doit pas repartir sur
+    # un numéro déjà utilisé, dont les valeurs peuvent encore être en cache
+    return time.time_ns()
+
+
+def version():
+    courante = cache.get(CLE_VERSION)
+    if courante is None:
+        # add() : pas d'écrasement d'une version posée entre-temps par un autre worker
+        initiale = _version_initiale()
+        cache.add(CLE_VERSION, initiale, None)
+        courante = cache.get(CLE_VERSION, initiale)
+    return courante
+
+
+def invalider(**kwargs):
+    """Passe à une nouvelle version : les valeurs en cache ne sont plus lues"""
+    try:
+        cache.incr(CLE_VERSION)
+    except ValueError:
+        # Version absente du cache (redémarrage, éviction)
+        cache.add(CLE_VERSION, _version_initiale(), None)
+
+
+def calculer():
+    from academique.models import PageBlock
+
+    return PageBlock.objects.aggregate(
+        total_blocks=Count('id'),
+        active_blocks=Count('id', filter=Q(status='active')),
+    )
+
+
+def compteurs_globaux():
+    """Compteurs depuis le cache (version courante), recalculés au besoin"""
+    courante = version()
+    valeurs = cache_get(cache, f'{CLE_VALEURS}:{courante}', 'compteurs')
+    if valeurs is None:
+        valeurs = calculer()
+        cache.set(f'{CLE_VALEURS}:{courante}', valeurs, _timeout())
+    return valeurs
+
+
+def compteurs(request):
+    """Compteurs de la requête : calculés au premier accès, puis mémorisés sur la requête"""
+    memo = getattr(request, '_compteurs_admin', None)
+    if memo is None:
+        memo = SimpleLazyObject(compteurs_globaux)
+        request._compteurs_admin = memo
+    return memo
+
+
+def connecter_signaux():
+    from academique.models import PageBlock
+
+    post_save.connect(invalider, sender=PageBlock, dispatch_uid='compteurs_blocs_save')
+    post_delete.connect(invalider, sender=PageBlock, dispatch_uid='compteurs_blocs_delete')
@@ -1,15 +1,24 @@
 from django.conf import settings
-from pages.models import PageBlock
+from django.utils.functional import SimpleLazyObject
+
+from .compteurs import compteurs
+
+PREFIXES_ADMINISTRATION = ('/administration/', '/academique/administration/')
+
 
 def admin_context(request):
     """Context processor pour variables globales de l'administration"""
-    
-    if not request.path.startswith('/administration/'):
+
+    if not request.path.startswith(PREFIXES_ADMINISTRATION):
         return {}
-    
+
+    # Valeurs paresseuses : aucune requête si le template ne les affiche pas,
+    # une seule lecture (cache ou base) pour toute la requête sinon
+    memo = compteurs(request)
     return {
         'admin_config': getattr(settings, 'ADMINISTRATION_CONFIG', {}),
-        'total_blocks': PageBlock.objects.count(),
-        'active_blocks': PageBlock.objects.filter(status='active').count(),
+        'compteurs_admin': memo,
+        'total_blocks': SimpleLazyObject(lambda: memo['total_blocks']),
+        'active_blocks': SimpleLazyObject(lambda: memo['active_blocks']),
         'debug': settings.DEBUG,
-    }
\ No newline at end of file
+    }
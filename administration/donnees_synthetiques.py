@@ -0,0 +1,274 @@
+# administration/donnees_synthetiques.py
+"""
+Génération de données synthétiques à l'échelle de la production (tests de charge).
+
+Tout est écrit par bulk_create, par lots de TAILLE_LOT étudiants, avec une
+graine fixe pour rendre les volumes et les valeurs reproductibles. Les objets
+créés sont reconnaissables (préfixe PREFIXE dans les identifiants) et peuvent
+être supprimés avec `purger()`.
+"""
+import datetime
+import random
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from academique.models import DocumentEtudiant, EtudiantAcademique, Filiere, TrigrammeEtudiant
+from academique.search import texte_recherche, trigrammes, utilise_table_trigrammes
+from notifications.models import Notification
+from pages.models import Category, Comment, Post
+from users.roles import ajouter_au_groupe
+
+User = get_user_model()
+
+PREFIXE = 'synth'
+TAILLE_LOT = 5000
+MOT_DE_PASSE = 'benchmark'
+FICHIER_DOCUMENT = 'documents/synthetiques/document.pdf'
+
+NOMS = [
+    'Mbarga', 'Ngono', 'Fotso', 'Tchoumi', 'Nkoulou', 'Abena', 'Essomba', 'Kamga', 'Njoya', 'Ekotto',
+    'Manga', 'Bella', 'Talla', 'Onana', 'Mvondo', 'Djoumessi', 'Nana', 'Wamba', 'Atangana', 'Ndjock',
+]
+PRENOMS = [
+    'Jean', 'Marie', 'Paul', 'Élodie', 'Aïcha', 'Brice', 'Christelle', 'Hervé', 'Joël', 'Sandrine',
+    'Arnaud', 'Clarisse', 'Franck', 'Grâce', 'Ibrahim', 'Larissa', 'Rodrigue', 'Stéphanie', 'Yannick', 'Zénabou',
+]
+REGIONS = ['Centre', 'Littoral', 'Ouest', 'Nord', 'Sud', 'Est', 'Adamaoua', 'Nord-Ouest', 'Sud-Ouest', 'Extrême-Nord']
+VILLES = ['Yaoundé', 'Douala', 'Bafoussam', 'Garoua', 'Ebolowa', 'Bertoua', 'Ngaoundéré', 'Bamenda', 'Buea', 'Maroua']
+FILIERES = [
+    ('Génie Informatique', 'technique'), ('Génie Civil', 'technique'), ('Génie Électrique', 'technique'),
+    ('Gestion des Entreprises', 'general'), ('Comptabilité et Finance', 'general'),
+    ('Marketing et Commerce', 'general'), ('Biologie Appliquée', 'scientifique'), ('Chimie Industrielle', 'scientifique'),
+]
+TYPES_DOCUMENT = [code for code, _ in DocumentEtudiant.TYPE_DOCUMENT_CHOICES]
+TYPES_NOTIFICATION = ['document_valide', 'document_rejete', 'document_manquant', 'inscription_validee', 'rappel', 'info']
+
+
+class DonneesSynthetiquesService:
+    """Création et suppression du jeu de données synthétique"""
+
+    @staticmethod
+    def generer(filieres=8, etudiants=100000, notifications=1000000, articles=200,
+                commentaires_par_article=20, graine=42, stdout=None):
+        """Crée le jeu de données et retourne les volumes créés"""
+        aleatoire = random.Random(graine)
+
+        def afficher(message):
+            if stdout:
+                stdout.write(message)
+
+        admin = DonneesSynthetiquesService._admin()
+        filieres_creees = DonneesSynthetiquesService._filieres(filieres)
+        afficher(f"{len(filieres_creees)} filière(s)")
+
+        user_ids = DonneesSynthetiquesService._etudiants(etudiants, filieres_creees, aleatoire, afficher)
+        afficher(f"{len(user_ids)} étudiant(s) et {len(user_ids) * len(TYPES_DOCUMENT)} document(s)")
+
+        nombre_notifications = DonneesSynthetiquesService._notifications(notifications, user_ids, aleatoire, afficher)
+        nombre_commentaires = DonneesSynthetiquesService._blog(articles, commentaires_par_article, admin, aleatoire)
+        afficher(f"{articles} article(s), {nombre_commentaires} commentaire(s)")
+
+        return {
+            'filieres': len(filieres_creees),
+            'etudiants': len(user_ids),
+            'documents': len(user_ids) * len(TYPES_DOCUMENT),
+            'notifications': nombre_notifications,
+            'articles': articles,
+            'commentaires': nombre_commentaires,
+        }
+
+    @staticmethod
+    def purger():
+        """Supprime tout ce qui a été créé par generer() ; retourne le nombre d'objets supprimés par modèle"""
+        supprimes = Counter()
+        with transaction.atomic():
+            for queryset in (
+                Post.objects.filter(slug__startswith=f'{PREFIXE}-'),
+                Category.objects.filter(slug__startswith=f'{PREFIXE}-'),
+                User.objects.filter(username__startswith=f'{PREFIXE}-'),
+                Filiere.objects.filter(code__startswith=PREFIXE.upper()),
+            ):
+                supprimes.update(queryset.delete()[1])
+        return dict(supprimes)
+
+    @staticmethod
+    def _admin():
+        admin, cree = User.objects.get_or_create(
+            username=f'{PREFIXE}-admin',
+            defaults={'email': f'{PREFIXE}-admin@iutessa.test', 'role': 'ADMIN', 'is_staff': True},
+        )
+        if cree:
+            admin.set_password(MOT_DE_PASSE)
+            admin.save()
+        return admin
+
+    @staticmethod
+    def _filieres(nombre):
+        existantes = set(Filiere.objects.filter(code__startswith=PREFIXE.upper()).values_list('code', flat=True))
+        nouvelles = []
+        for i in range(nombre):
+            nom, domaine = FILIERES[i % len(FILIERES)]
+            code = f'{PREFIXE.upper()}{i + 1:02d}'
+            if code not in existantes:
+                nouvelles.append(Filiere(
+                    nom=f'{nom} {i // len(FILIERES) + 1}' if i >= len(FILIERES) else nom,
+                    code=code,
+                    description=f"Formation en {nom.lower()}.",
+                    places_disponibles=20000,
+                    domaine_requis=domaine,
+                ))
+        Filiere.objects.bulk_create(nouvelles)
+        return list(Filiere.objects.filter(code__startswith=PREFIXE.upper()).order_by('code'))
+
+    @staticmethod
+    def _etudiants(nombre, filieres, aleatoire, afficher):
+        """Utilisateurs, EtudiantAcademique, 7 documents chacun et index de recherche ; retourne les user ids"""
+        if not storages['chemins'].exists(FICHIER_DOCUMENT):
+            storages['chemins'].save(FICHIER_DOCUMENT, ContentFile(b'%PDF-1.4\n% document synthetique\n'))
+
+        hash_mot_de_passe = make_password(MOT_DE_PASSE)
+        debut = User.objects.filter(username__startswith=f'{PREFIXE}-etu-').count()
+        annee = timezone.now().year
+        user_ids = []
+
+        for lot_debut in range(debut, debut + nombre, TAILLE_LOT):
+            indices = range(lot_debut, min(lot_debut + TAILLE_LOT, debut + nombre))
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{PREFIXE}-etu-{i:06d}',
+                        email=f'{PREFIXE}.etu{i}@iutessa.test',
+                        first_name=aleatoire.choice(PRENOMS),
+                        last_name=aleatoire.choice(NOMS),
+                        role='ETUDIANT',
+                        password=hash_mot_de_passe,
+                    )
+                    for i in indices
+                ])
+                # bulk_create n'envoie pas post_save : groupe ajouté directement dans la table de liaison
+                ajouter_au_groupe('ETUDIANT', [user.id for user in users], batch_size=TAILLE_LOT)
+
+                etudiants = []
+                for i, user in zip(indices, users):
+                    etudiant = EtudiantAcademique(
+                        user_id=user.id,
+                        filiere=filieres[i % len(filieres)],
+                        nom=user.last_name,
+                        prenoms=f"{user.first_name} {aleatoire.choice(PRENOMS)}",
+                        date_naissance=datetime.date(1998, 1, 1) + datetime.timedelta(days=aleatoire.randrange(3650)),
+                        lieu_naissance=aleatoire.choice(VILLES),
+                        region_origine=aleatoire.choice(REGIONS),
+                        cni=f'{PREFIXE.upper()}{i:09d}',
+                        telephone=f'+2376{aleatoire.randrange(10 ** 8):08d}',
+                        email_personnel=user.email,
+                        adresse=f"BP {aleatoire.randrange(1, 9999)} {aleatoire.choice(VILLES)}",
+                        nom_pere=f"{aleatoire.choice(NOMS)} {aleatoire.choice(PRENOMS)}",
+                        nom_mere=f"{aleatoire.choice(NOMS)} {aleatoire.choice(PRENOMS)}",
+                        diplome_obtenu='Baccalauréat',
+                        annee_obtention=annee - aleatoire.randrange(1, 4),
+                        numero_matricule=f'SYN-{annee}-{i:06d}',
+                        statut_validation=aleatoire.choice(['en_attente', 'en_attente', 'valide', 'rejete']),
+                    )
+                    etudiant.recherche_normalisee = texte_recherche(etudiant)
+                    # bulk_create ne passe pas par DocumentEtudiant.save() : compteurs du dossier posés ici
+                    etudiant.validations = [aleatoire.random() < 0.6 for _ in TYPES_DOCUMENT]
+                    etudiant.nb_documents = len(TYPES_DOCUMENT)
+                    etudiant.nb_documents_valides = sum(etudiant.validations)
+                    etudiant.dossier_complet = all(etudiant.validations)
+                    etudiant.progression = etudiant.calculer_progression()
+                    etudiants.append(etudiant)
+                EtudiantAcademique.objects.bulk_create(etudiants)
+
+                DocumentEtudiant.objects.bulk_create([
+                    DocumentEtudiant(
+                        etudiant_id=etudiant.id,
+                        type_document=type_document,
+                        fichier=FICHIER_DOCUMENT,
+                        valide=valide,
+                    )
+                    for etudiant in etudiants
+                    for type_document, valide in zip(TYPES_DOCUMENT, etudiant.validations)
+                ], batch_size=TAILLE_LOT)
+
+                if utilise_table_trigrammes():
+                    TrigrammeEtudiant.objects.bulk_create([
+                        TrigrammeEtudiant(etudiant_id=etudiant.id, trigramme=tri)
+                        for etudiant in etudiants
+                        for tri in trigrammes(etudiant.recherche_normalisee)
+                    ], batch_size=TAILLE_LOT)
+
+            user_ids.extend(user.id for user in users)
+            afficher(f"  {len(user_ids)}/{nombre} étudiants")
+
+        for filiere in filieres:
+            Filiere.objects.filter(pk=filiere.pk).update(places_occupees=filiere.etudiants.count())
+        return user_ids
+
+    @staticmethod
+    def _notifications(nombre, user_ids, aleatoire, afficher):
+        if not user_ids:
+            return 0
+        creees = 0
+        while creees < nombre:
+            taille = min(TAILLE_LOT * 2, nombre - creees)
+            lot = []
+            for _ in range(taille):
+                type_notification = aleatoire.choice(TYPES_NOTIFICATION)
+                lot.append(Notification(
+                    destinataire_id=aleatoire.choice(user_ids),
+                    type_notification=type_notification,
+                    titre=f"Notification {type_notification.replace('_', ' ')}",
+                    message="Message généré pour les tests de charge.",
+                    lu=aleatoire.random() < 0.7,
+                ))
+            Notification.objects.bulk_create(lot, batch_size=TAILLE_LOT)
+            creees += taille
+            if creees % (TAILLE_LOT * 20) == 0 or creees == nombre:
+                afficher(f"  {creees}/{nombre} notifications")
+        return creees
+
+    @staticmethod
+    def _blog(articles, commentaires_par_article, admin, aleatoire):
+        categories = []
+        for nom in ['Actualités', 'Vie étudiante', 'Recherche', 'Annonces']:
+            categorie, _ = Category.objects.get_or_create(
+                slug=f'{PREFIXE}-{slugify(nom)}', defaults={'name': f'{nom} (test)'}
+            )
+            categories.append(categorie)
+
+        debut = Post.objects.filter(slug__startswith=f'{PREFIXE}-').count()
+        maintenant = timezone.now()
+        posts = Post.objects.bulk_create([
+            Post(
+                title=f"Article de test n°{i + 1}",
+                slug=f'{PREFIXE}-article-{i + 1}',
+                author=admin,
+                excerpt="Résumé de l'article généré pour les tests de charge.",
+                content="<p>Contenu de l'article.</p>" * 20,
+                category=aleatoire.choice(categories),
+                tags='iutessa, test',
+                status='published',
+                published_at=maintenant - datetime.timedelta(hours=i),
+            )
+            for i in range(debut, debut + articles)
+        ])
+
+        commentaires = Comment.objects.bulk_create([
+            Comment(
+                post_id=post.id,
+                author_name=f"{aleatoire.choice(PRENOMS)} {aleatoire.choice(NOMS)}",
+                author_email=f'{PREFIXE}.lecteur{j}@iutessa.test',
+                content="Commentaire généré pour les tests de charge.",
+                is_approved=aleatoire.random() < 0.8,
+            )
+            for post in posts
+            for j in range(commentaires_par_article)
+        ], batch_size=TAILLE_LOT)
+        return len(commentaires)
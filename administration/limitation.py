@@ -0,0 +1,143 @@
+# administration/limitation.py
+"""
+Limitation de débit des vues exposées aux robots (connexion, commentaires).
+
+Chaque requête limitée est comptée par adresse IP et, si la vue le demande,
+par identifiant saisi (ex. le nom d'utilisateur) : un robot qui essaie des
+mots de passe depuis plusieurs adresses sur un même compte est aussi freiné.
+Au-delà de la limite, la réponse est un 429 avec Retry-After, renvoyé avant
+toute lecture en base ou vérification de mot de passe.
+
+Compteurs à fenêtre glissante approchée : un compteur par fenêtre fixe dans
+le cache (add + incr, atomiques avec Redis ou memcached), et une estimation
+pondérée par la part de la fenêtre précédente encore couverte. Avec un cache
+partagé (CACHE_BACKEND), la limite vaut pour l'ensemble des workers ; avec le
+cache mémoire par défaut, elle s'applique par processus.
+
+Les limites se règlent dans le décorateur et peuvent être remplacées par vue
+dans LIMITATION_DEBIT (ex. {'connexion': {'ip': '60/m'}}) ;
+LIMITATION_DEBIT_ACTIVE = False désactive tout.
+"""
+import hashlib
+import math
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .metrics import metriques
+
+UNITES = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_FORMAT = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$')
+
+
+def analyser_taux(taux):
+    """'10/m' -> (10, 60) ; '20/5m' -> (20, 300)"""
+    correspondance = _FORMAT.match(taux or '')
+    if not correspondance:
+        raise ValueError(f"Taux invalide : {taux!r} (attendu : '10/m', '20/5m'...)")
+    nombre, multiple, unite = correspondance.groups()
+    return int(nombre), int(multiple or 1) * UNITES[unite]
+
+
+def adresse_ip(request):
+    # Derrière un proxy, uvicorn --proxy-headers place l'adresse du client dans REMOTE_ADDR
+    return request.META.get('REMOTE_ADDR') or 'inconnue'
+
+
+def _cles(cle, fenetre, maintenant):
+    numero = int(maintenant // fenetre)
+    return f'limite:{cle}:{numero}', f'limite:{cle}:{numero - 1}'
+
+
+def _evaluer(limite, fenetre, maintenant, courant, precedent):
+    """(dépassement, secondes avant nouvel essai) d'après les compteurs des deux fenêtres"""
+    ecoule = (maintenant % fenetre) / fenetre
+    estime = (precedent or 0) * (1 - ecoule) + courant
+    if estime <= limite:
+        return False, 0
+    return True, max(1, math.ceil(fenetre - maintenant % fenetre))
+
+
+def compter(cle, limite, fenetre):
+    """Compte une requête ; retourne (dépassement, Retry-After)"""
+    maintenant = time.time()
+    courante, precedente = _cles(cle, fenetre, maintenant)
+    cache.add(courante, 0, fenetre * 2)
+    try:
+        courant = cache.incr(courante)
+    except ValueError:
+        # Entrée expirée ou évincée entre add() et incr()
+        cache.set(courante, 1, fenetre * 2)
+        courant = 1
+    return _evaluer(limite, fenetre, maintenant, courant, cache.get(precedente))
+
+
+async def acompter(cle, limite, fenetre):
+    maintenant = time.time()
+    courante, precedente = _cles(cle, fenetre, maintenant)
+    await cache.aadd(courante, 0, fenetre * 2)
+    try:
+        courant = await cache.aincr(courante)
+    except ValueError:
+        await cache.aset(courante, 1, fenetre * 2)
+        courant = 1
+    return _evaluer(limite, fenetre, maintenant, courant, await cache.aget(precedente))
+
+
+def reponse_trop_de_requetes(attente):
+    response = HttpResponse(
+        "Trop de tentatives. Veuillez réessayer dans quelques instants.",
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(attente)
+    return response
+
+
+def limiter(nom, ip=None, identifiant=None, champ='username', methodes=('POST',)):
+    """
+    Décorateur de vue (synchrone ou asynchrone).
+    `ip` / `identifiant` : taux '<nombre>/<durée>' par adresse IP / par valeur du
+    champ POST `champ` (normalisée en minuscules). Seules les `methodes` sont comptées.
+    """
+    def decorateur(vue):
+        def regles(request):
+            if request.method not in methodes or not getattr(settings, 'LIMITATION_DEBIT_ACTIVE', True):
+                return []
+            config = {'ip': ip, 'identifiant': identifiant, **getattr(settings, 'LIMITATION_DEBIT', {}).get(nom, {})}
+            resultat = []
+            if config['ip']:
+                resultat.append(('ip', f'{nom}:ip:{adresse_ip(request)}', config['ip']))
+            valeur = request.POST.get(champ, '').strip().lower() if config['identifiant'] else ''
+            if valeur:
+                empreinte = hashlib.sha256(valeur.encode('utf-8')).hexdigest()[:32]
+                resultat.append(('identifiant', f'{nom}:id:{empreinte}', config['identifiant']))
+            return resultat
+
+        def refus(type_cle, attente):
+            metriques.incrementer('limitation_rejets_total', vue=nom, cle=type_cle)
+            return reponse_trop_de_requetes(attente)
+
+        if iscoroutinefunction(vue):
+            @wraps(vue)
+            async def vue_limitee(request, *args, **kwargs):
+                for type_cle, cle, taux in regles(request):
+                    depasse, attente = await acompter(cle, *analyser_taux(taux))
+                    if depasse:
+                        return refus(type_cle, attente)
+                return await vue(request, *args, **kwargs)
+        else:
+            @wraps(vue)
+            def vue_limitee(request, *args, **kwargs):
+                for type_cle, cle, taux in regles(request):
+                    depasse, attente = compter(cle, *analyser_taux(taux))
+                    if depasse:
+                        return refus(type_cle, attente)
+                return vue(request, *args, **kwargs)
+        return vue_limitee
+    return decorateur
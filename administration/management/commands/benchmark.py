@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.benchmark import BenchmarkService
+
+
+class Command(BaseCommand):
+    help = 'Mesure p50/p95 et requêtes SQL des vues les plus sollicitées et écrit le résultat en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repetitions', type=int, default=20, help='Appels chronométrés par scénario')
+        parser.add_argument('--sortie', default='benchmark.json', help='Fichier JSON de résultat')
+        parser.add_argument('--reference', help='Fichier JSON d\'une exécution précédente à comparer')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20,
+            help='Hausse de p95 (ou baisse de débit sous charge) tolérée par rapport à la référence (en %%)',
+        )
+        parser.add_argument(
+            '--concurrence',
+            type=int,
+            default=0,
+            help='Ajoute une mesure de débit avec ce nombre de requêtes simultanées (gestionnaire ASGI)',
+        )
+        parser.add_argument('--requetes', type=int, default=200, help='Requêtes par scénario pour la mesure de charge')
+
+    def handle(self, *args, **options):
+        try:
+            resultat = BenchmarkService.executer(repetitions=options['repetitions'], stdout=self.stdout)
+            if options['concurrence'] > 0:
+                self.stdout.write(f"Mesure de charge ({options['concurrence']} requêtes simultanées)...")
+                resultat['charge'] = BenchmarkService.executer_charge(
+                    options['concurrence'], options['requetes'], stdout=self.stdout
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        BenchmarkService.ecrire(resultat, options['sortie'])
+        self.stdout.write(f"Résultat écrit dans {options['sortie']}")
+
+        if options['reference']:
+            reference = BenchmarkService.lire(options['reference'])
+            for nom, avant, apres, variation in BenchmarkService.ecarts_charge(resultat, reference):
+                self.stdout.write(f"{nom:<26} {avant:>8.1f} -> {apres:>8.1f} req/s ({variation:+.1f} %)")
+            regressions = BenchmarkService.comparer(resultat, reference, options['tolerance'])
+            if regressions:
+                for message in regressions:
+                    self.stdout.write(self.style.ERROR(message))
+                raise CommandError(f"{len(regressions)} régression(s) par rapport à {options['reference']}")
+            self.stdout.write(self.style.SUCCESS('Aucune régression par rapport à la référence.'))
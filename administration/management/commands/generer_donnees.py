@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from administration.donnees_synthetiques import DonneesSynthetiquesService, MOT_DE_PASSE, PREFIXE
+
+
+class Command(BaseCommand):
+    help = 'Génère un jeu de données synthétique aux volumes de production (tests de charge)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filieres', type=int, default=8, help='Nombre de filières')
+        parser.add_argument('--etudiants', type=int, default=100000, help='Nombre d\'étudiants (7 documents chacun)')
+        parser.add_argument('--notifications', type=int, default=1000000, help='Nombre de notifications')
+        parser.add_argument('--articles', type=int, default=200, help='Nombre d\'articles de blog')
+        parser.add_argument('--commentaires', type=int, default=20, help='Commentaires par article')
+        parser.add_argument('--graine', type=int, default=42, help='Graine aléatoire (données reproductibles)')
+        parser.add_argument(
+            '--purger',
+            action='store_true',
+            help='Supprime les données synthétiques existantes au lieu d\'en générer',
+        )
+
+    def handle(self, *args, **options):
+        if options['purger']:
+            supprimes = DonneesSynthetiquesService.purger()
+            self.stdout.write(self.style.SUCCESS(f"Données synthétiques supprimées : {supprimes}"))
+            return
+
+        volumes = DonneesSynthetiquesService.generer(
+            filieres=options['filieres'],
+            etudiants=options['etudiants'],
+            notifications=options['notifications'],
+            articles=options['articles'],
+            commentaires_par_article=options['commentaires'],
+            graine=options['graine'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Données générées : {volumes}"))
+        self.stdout.write(f"Comptes : {PREFIXE}-admin / {PREFIXE}-etu-000000 ..., mot de passe « {MOT_DE_PASSE} »")
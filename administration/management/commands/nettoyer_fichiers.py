@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.stockage import NettoyageFichiers
+from administration.televersements import TeleversementService
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime de MEDIA_ROOT les fichiers qu'aucune ligne ne référence, recale les compteurs "
+        "de références et purge les téléversements fragmentés abandonnés"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--age-min', type=int, default=24,
+                            help='Âge minimum (heures) d\'un fichier orphelin avant suppression (défaut : 24)')
+        parser.add_argument('--lot', type=int, default=1000,
+                            help='Nombre de fichiers vérifiés par requête (défaut : 1000)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Liste les fichiers orphelins sans les supprimer')
+
+    def handle(self, *args, **options):
+        if options['lot'] < 1 or options['age_min'] < 0:
+            raise CommandError('--lot doit être positif et --age-min ne peut pas être négatif')
+
+        nettoyage = NettoyageFichiers(
+            age_minimum_heures=options['age_min'],
+            taille_lot=options['lot'],
+            simulation=options['dry_run'],
+            stdout=self.stdout,
+        )
+        resultat = nettoyage.executer()
+        if not options['dry_run']:
+            abandonnes = TeleversementService.purger(heures=options['age_min'])
+            self.stdout.write(f"{abandonnes} téléversement(s) fragmenté(s) abandonné(s) supprimé(s).")
+        verbe = 'à supprimer' if options['dry_run'] else 'supprimé(s)'
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultat['parcourus']} fichier(s) parcouru(s), {resultat['orphelins']} orphelin(s) {verbe} "
+            f"({resultat['octets_liberes'] / 1024 / 1024:.1f} Mo), "
+            f"{resultat['recents_ignores']} orphelin(s) récent(s) conservé(s)."
+        ))
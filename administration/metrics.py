@@ -0,0 +1,194 @@
+# administration/metrics.py
+"""
+Registre de métriques partagé entre les workers uvicorn.
+
+Chaque processus accumule ses compteurs et histogrammes en mémoire et les
+écrit (au plus une fois par METRIQUES_INTERVALLE_ECRITURE secondes) dans son
+propre fichier `<pid>.json` de METRIQUES_DOSSIER. L'endpoint /metrics lit
+tous les fichiers et additionne les valeurs avant de les exposer au format
+texte Prometheus. Les fichiers des workers arrêtés restent comptés : vider
+le dossier au déploiement (comme le mode multiprocess de prometheus_client).
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIXE = 'iutessa_'
+
+# Bornes des histogrammes de durée (secondes)
+SEUILS_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIQUES = {
+    'requete_duree_secondes': ('histogram', "Durée des requêtes HTTP par vue"),
+    'requetes_sql_total': ('counter', "Requêtes SQL exécutées, par vue"),
+    'emails_total': ('counter', "Emails de notification, par statut (envoye, echec)"),
+    'import_lignes_total': ('counter', "Lignes traitées par les imports, par source et statut"),
+    'cache_requetes_total': ('counter', "Lectures du cache, par usage et résultat (hit, miss)"),
+    'limitation_rejets_total': ('counter', "Requêtes refusées (429) par la limitation de débit, par vue et clé"),
+}
+
+
+def _cle(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    paires = list(labels) + list(extra)
+    if not paires:
+        return ''
+    contenu = ','.join(
+        '{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in paires
+    )
+    return '{' + contenu + '}'
+
+
+def _format_nombre(valeur):
+    return repr(float(valeur)) if valeur != int(valeur) else str(int(valeur))
+
+
+class RegistreMetriques:
+    """Compteurs et histogrammes du processus courant, persistés dans un fichier par pid"""
+
+    def __init__(self, dossier=None, intervalle=None):
+        self.dossier = dossier
+        self.intervalle = intervalle
+        self._verrou = threading.Lock()
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self._pid = os.getpid()
+        self._compteurs = defaultdict(float)
+        self._histogrammes = {}
+        self._derniere_ecriture = 0.0
+        self._minuteur = None
+
+    def _dossier(self):
+        if self.dossier is None:
+            self.dossier = getattr(settings, 'METRIQUES_DOSSIER', None) or os.path.join(
+                tempfile.gettempdir(), 'iutessa-metriques'
+            )
+        os.makedirs(self.dossier, exist_ok=True)
+        return self.dossier
+
+    def _verifier_processus(self):
+        # Après un fork, ne pas republier les valeurs héritées du parent sous un autre pid
+        if self._pid != os.getpid():
+            self._reinitialiser()
+
+    def incrementer(self, nom, valeur=1, **labels):
+        with self._verrou:
+            self._verifier_processus()
+            self._compteurs[(nom, _cle(labels))] += valeur
+        self.enregistrer()
+
+    def observer(self, nom, valeur, **labels):
+        with self._verrou:
+            self._verifier_processus()
+            cle = (nom, _cle(labels))
+            histo = self._histogrammes.get(cle)
+            if histo is None:
+                histo = self._histogrammes[cle] = {'seaux': [0] * len(SEUILS_DUREE), 'somme': 0.0, 'nombre': 0}
+            for i, seuil in enumerate(SEUILS_DUREE):
+                if valeur <= seuil:
+                    histo['seaux'][i] += 1
+            histo['somme'] += valeur
+            histo['nombre'] += 1
+        self.enregistrer()
+
+    def enregistrer(self, force=False):
+        """Écrit le fichier du processus (remplacement atomique), au plus une fois par intervalle"""
+        intervalle = self.intervalle
+        if intervalle is None:
+            intervalle = getattr(settings, 'METRIQUES_INTERVALLE_ECRITURE', 1.0)
+        maintenant = time.monotonic()
+        if not force and maintenant - self._derniere_ecriture < intervalle:
+            # Écriture différée : un worker inactif publie quand même ses dernières valeurs
+            with self._verrou:
+                if self._minuteur is None:
+                    self._minuteur = threading.Timer(intervalle, self.enregistrer, kwargs={'force': True})
+                    self._minuteur.daemon = True
+                    self._minuteur.start()
+            return
+
+        with self._verrou:
+            self._verifier_processus()
+            self._derniere_ecriture = maintenant
+            self._minuteur = None
+            donnees = {
+                'compteurs': [[nom, list(labels), valeur] for (nom, labels), valeur in self._compteurs.items()],
+                'histogrammes': [[nom, list(labels), histo] for (nom, labels), histo in self._histogrammes.items()],
+            }
+
+        try:
+            dossier = self._dossier()
+            fd, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(donnees, f)
+            os.replace(temporaire, os.path.join(dossier, f'{self._pid}.json'))
+        except OSError as e:
+            logger.warning(f"Métriques : écriture impossible ({e})")
+
+    def agreger(self):
+        """Somme des fichiers de tous les processus : (compteurs, histogrammes)"""
+        self.enregistrer(force=True)
+        compteurs = defaultdict(float)
+        histogrammes = {}
+        for chemin in glob.glob(os.path.join(self._dossier(), '*.json')):
+            try:
+                with open(chemin) as f:
+                    donnees = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nom, labels, valeur in donnees.get('compteurs', []):
+                compteurs[(nom, tuple(map(tuple, labels)))] += valeur
+            for nom, labels, histo in donnees.get('histogrammes', []):
+                cle = (nom, tuple(map(tuple, labels)))
+                total = histogrammes.setdefault(cle, {'seaux': [0] * len(SEUILS_DUREE), 'somme': 0.0, 'nombre': 0})
+                total['seaux'] = [a + b for a, b in zip(total['seaux'], histo['seaux'])]
+                total['somme'] += histo['somme']
+                total['nombre'] += histo['nombre']
+        return compteurs, histogrammes
+
+    def exposition(self):
+        """Texte au format d'exposition Prometheus (version 0.0.4)"""
+        compteurs, histogrammes = self.agreger()
+        lignes = []
+        for nom, (type_metrique, aide) in METRIQUES.items():
+            lignes.append(f'# HELP {PREFIXE}{nom} {aide}')
+            lignes.append(f'# TYPE {PREFIXE}{nom} {type_metrique}')
+            if type_metrique == 'counter':
+                for (n, labels), valeur in sorted(compteurs.items()):
+                    if n == nom:
+                        lignes.append(f'{PREFIXE}{nom}{_format_labels(labels)} {_format_nombre(valeur)}')
+            else:
+                for (n, labels), histo in sorted(histogrammes.items()):
+                    if n != nom:
+                        continue
+                    for seuil, cumul in zip(SEUILS_DUREE, histo['seaux']):
+                        lignes.append(f'{PREFIXE}{nom}_bucket{_format_labels(labels, [("le", str(seuil))])} {cumul}')
+                    lignes.append(f'{PREFIXE}{nom}_bucket{_format_labels(labels, [("le", "+Inf")])} {histo["nombre"]}')
+                    lignes.append(f'{PREFIXE}{nom}_sum{_format_labels(labels)} {_format_nombre(histo["somme"])}')
+                    lignes.append(f'{PREFIXE}{nom}_count{_format_labels(labels)} {histo["nombre"]}')
+        return '\n'.join(lignes) + '\n'
+
+
+metriques = RegistreMetriques()
+atexit.register(metriques.enregistrer, force=True)
+
+
+def cache_get(cache, cle, usage):
+    """cache.get() compté dans cache_requetes_total (hit/miss) sous le label `usage`"""
+    valeur = cache.get(cle)
+    metriques.incrementer('cache_requetes_total', usage=usage, resultat='miss' if valeur is None else 'hit')
+    return valeur
@@ -0,0 +1,183 @@
+# administration/middleware.py
+"""
+Profilage des requêtes.
+
+Pour chaque requête : nom de la vue résolue, durée totale, nombre de requêtes
+SQL et temps passé en base, mesurés via connection.execute_wrapper sur toutes
+les connexions. Une même requête SQL (au texte paramétré identique) exécutée
+PROFILAGE_SEUIL_DOUBLONS fois ou plus est signalée comme N+1.
+
+Le résultat est exposé dans l'en-tête Server-Timing (visible dans l'onglet
+Réseau du navigateur) et dans `request.profil` ; les requêtes lentes ou avec
+N+1 sont journalisées sur une ligne clé=valeur (logger `administration.profilage`).
+
+Le middleware fonctionne en mode synchrone et asynchrone. Les connexions étant
+propres à chaque thread, et les vues asynchrones exécutant leurs requêtes SQL
+dans un autre thread que celui du middleware, le profil de la requête en cours
+est porté par une ContextVar (propagée par sync_to_async) et lu par un
+execute_wrapper posé sur chaque connexion à sa création.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import metriques
+
+logger = logging.getLogger('administration.profilage')
+
+profil_courant = ContextVar('profil_courant', default=None)
+
+
+def mesurer_sql(execute, sql, params, many, context):
+    """execute_wrapper permanent : mesure la requête si un profil est actif"""
+    profil = profil_courant.get()
+    if profil is None:
+        return execute(sql, params, many, context)
+    return profil(execute, sql, params, many, context)
+
+
+def installer_mesure(connection, **kwargs):
+    if mesurer_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(mesurer_sql)
+
+
+connection_created.connect(installer_mesure, dispatch_uid='administration_profilage')
+
+
+class ProfilRequete:
+    """Mesures d'une requête HTTP"""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.duree = 0.0
+        self.nombre_requetes = 0
+        self.duree_sql = 0.0
+        self.requetes = Counter()
+        self.vue = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree_sql += time.perf_counter() - debut
+            self.nombre_requetes += 1
+            self.requetes[sql] += 1
+
+    def doublons(self, seuil):
+        """[(sql, nombre d'exécutions)] des requêtes répétées au moins `seuil` fois"""
+        return [(sql, n) for sql, n in self.requetes.most_common() if n >= seuil]
+
+    def server_timing(self):
+        return (
+            f'total;dur={self.duree * 1000:.1f}, '
+            f'db;dur={self.duree_sql * 1000:.1f};desc="{self.nombre_requetes} requetes SQL"'
+        )
+
+
+class ProfilingMiddleware:
+    """Mesure durée et requêtes SQL de chaque requête (à placer en tête de MIDDLEWARE)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.seuil_lent = getattr(settings, 'PROFILAGE_SEUIL_LENT_MS', 500) / 1000
+        self.seuil_doublons = getattr(settings, 'PROFILAGE_SEUIL_DOUBLONS', 5)
+        self.asynchrone = iscoroutinefunction(get_response)
+        if self.asynchrone:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asynchrone:
+            return self.__acall__(request)
+
+        # Connexions ouvertes avant le chargement de ce module (tests, shell)
+        for alias in connections:
+            installer_mesure(connections[alias])
+        profil, jeton = self._debut(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profil_courant.reset(jeton)
+        return self._fin(request, profil, response)
+
+    async def __acall__(self, request):
+        profil, jeton = self._debut(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profil_courant.reset(jeton)
+        return self._fin(request, profil, response)
+
+    def _debut(self, request):
+        profil = ProfilRequete()
+        request.profil = profil
+        return profil, profil_courant.set(profil)
+
+    def _fin(self, request, profil, response):
+        profil.duree = time.perf_counter() - profil.debut
+        if request.resolver_match:
+            profil.vue = request.resolver_match.view_name or request.resolver_match._func_path
+
+        response['Server-Timing'] = profil.server_timing()
+
+        # Les URL non résolues (404) sont regroupées pour borner le nombre de séries
+        vue = profil.vue or 'non_resolue'
+        metriques.observer('requete_duree_secondes', profil.duree, vue=vue)
+        metriques.incrementer('requetes_sql_total', profil.nombre_requetes, vue=vue)
+
+        doublons = profil.doublons(self.seuil_doublons)
+        if profil.duree >= self.seuil_lent or doublons:
+            niveau = logging.WARNING if doublons else logging.INFO
+            ligne = (
+                f'requete_lente vue={profil.vue or "-"} methode={request.method} '
+                f'chemin="{request.path}" statut={response.status_code} '
+                f'duree_ms={profil.duree * 1000:.0f} requetes={profil.nombre_requetes} '
+                f'sql_ms={profil.duree_sql * 1000:.0f} doublons={len(doublons)}'
+            )
+            if doublons:
+                sql, nombre = doublons[0]
+                ligne += f' n_plus_un={nombre} sql="{sql[:200]}"'
+            logger.log(niveau, ligne)
+
+        return response
+
+
+class StaticAsyncMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware utilisable en mode asynchrone. L'original est synchrone
+    uniquement : placé dans MIDDLEWARE, il ferait exécuter toute la suite de la
+    chaîne (vues asynchrones comprises) dans un thread bloqué par requête.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.asynchrone = iscoroutinefunction(get_response)
+        if self.asynchrone:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asynchrone:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceFichier',
+            fields=[
+                ('nom', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('references', models.PositiveIntegerField(default=0)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Référence de fichier',
+                'verbose_name_plural': 'Références de fichiers',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:19
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0001_references_fichiers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Televersement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cible', models.CharField(max_length=30, verbose_name='Champ cible')),
+                ('nom_fichier', models.CharField(max_length=255)),
+                ('taille', models.PositiveBigIntegerField(verbose_name='Taille (octets)')),
+                ('recu', models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('statut', models.CharField(choices=[('en_cours', 'En cours'), ('termine', 'Terminé')], default='en_cours', max_length=10)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='televersements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Téléversement',
+                'verbose_name_plural': 'Téléversements',
+                'indexes': [models.Index(fields=['date_maj'], name='administrat_date_ma_021739_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,44 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReferenceFichier(models.Model):
+    """Nombre de lignes qui référencent un fichier du stockage adressé par contenu"""
+    nom = models.CharField(max_length=255, primary_key=True)
+    references = models.PositiveIntegerField(default=0)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Référence de fichier"
+        verbose_name_plural = "Références de fichiers"
+
+    def __str__(self):
+        return f"{self.nom} ({self.references})"
+
+
+class Televersement(models.Model):
+    """Téléversement fragmenté et reprenable d'un fichier volumineux (voir televersements.py)"""
+    STATUT_CHOICES = [
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    utilisateur = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='televersements')
+    cible = models.CharField(max_length=30, verbose_name="Champ cible")
+    nom_fichier = models.CharField(max_length=255)
+    taille = models.PositiveBigIntegerField(verbose_name="Taille (octets)")
+    recu = models.PositiveBigIntegerField(default=0, verbose_name="Octets reçus")
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default='en_cours')
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Téléversement"
+        verbose_name_plural = "Téléversements"
+        indexes = [models.Index(fields=['date_maj'])]
+
+    def __str__(self):
+        return f"{self.nom_fichier} ({self.recu}/{self.taille})"
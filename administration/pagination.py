@@ -0,0 +1,240 @@
+# administration/pagination.py
+"""
+Pagination par curseur (keyset) pour les grandes listes de l'administration.
+
+Contrairement à Paginator, aucune page ne déclenche de COUNT(*) ni d'OFFSET :
+la page suivante est lue avec une condition sur les valeurs de tri de la
+dernière ligne affichée, ce qui reste en temps constant quelle que soit la
+profondeur. Le curseur transmis dans l'URL est signé et opaque.
+
+Les champs de tri doivent être non nuls et le dernier doit être unique
+(typiquement `id`) pour que l'ordre soit total.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .metrics import cache_get
+
+PARAM_CURSEUR = 'curseur'
+SIGNING_SALT = 'administration.pagination'
+
+
+def estimer_total(queryset):
+    """
+    Nombre approximatif de lignes d'un queryset.
+    Table entière sous PostgreSQL : statistique `reltuples` du planificateur.
+    Sinon : COUNT(*) mis en cache PAGINATION_COUNT_TIMEOUT secondes.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # -1 tant que la table n'a jamais été analysée
+        if row and row[0] >= 0:
+            return row[0]
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    cle = 'pagination:total:' + hashlib.sha256(f"{sql}|{params!r}".encode('utf-8')).hexdigest()
+    total = cache_get(cache, cle, 'pagination')
+    if total is None:
+        total = queryset.count()
+        cache.set(cle, total, getattr(settings, 'PAGINATION_COUNT_TIMEOUT', 300))
+    return total
+
+
+class KeysetPage:
+    """Une page de résultats ; s'utilise dans les templates comme une page de Paginator"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.url_suivante = ''
+        self.url_precedente = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def curseur_suivant(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encoder_curseur(self.object_list[-1], 'n')
+
+    @property
+    def curseur_precedent(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encoder_curseur(self.object_list[0], 'p')
+
+    @cached_property
+    def total_estime(self):
+        return self.paginator.total_estime
+
+    def construire_urls(self, params):
+        """Liens vers les pages voisines en conservant les autres paramètres GET (filtres)"""
+        params = params.copy()
+        params.pop('page', None)
+        for attribut, curseur in (('url_suivante', self.curseur_suivant), ('url_precedente', self.curseur_precedent)):
+            if curseur:
+                params[PARAM_CURSEUR] = curseur
+                setattr(self, attribut, '?' + params.urlencode())
+        return self
+
+
+class KeysetPaginator:
+    """
+    Paginateur par curseur.
+    `ordering` : champs de tri, sens mélangés possibles, ex. ('-date_inscription', 'id').
+    """
+
+    def __init__(self, queryset, per_page, ordering, estimation=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [(champ.lstrip('-'), champ.startswith('-')) for champ in ordering]
+        self.estimation = estimation
+
+    @cached_property
+    def total_estime(self):
+        if not self.estimation:
+            return None
+        return estimer_total(self.queryset.order_by())
+
+    def get_page(self, curseur=None):
+        direction, valeurs = self.decoder_curseur(curseur)
+        arriere = direction == 'p'
+
+        queryset = self._queryset_page(valeurs, arriere)
+        lignes = list(queryset[:self.per_page + 1])
+        return self._page(lignes, valeurs, arriere)
+
+    async def aget_page(self, curseur=None):
+        """get_page() pour les vues asynchrones (itération async du queryset)"""
+        direction, valeurs = self.decoder_curseur(curseur)
+        arriere = direction == 'p'
+        queryset = self._queryset_page(valeurs, arriere)
+        lignes = [obj async for obj in queryset[:self.per_page + 1]]
+        return self._page(lignes, valeurs, arriere)
+
+    def _queryset_page(self, valeurs, arriere):
+        queryset = self.queryset
+        if valeurs is not None:
+            queryset = queryset.filter(self._condition(valeurs, arriere))
+        return queryset.order_by(*self._tri(arriere))
+
+    def _page(self, lignes, valeurs, arriere):
+        encore = len(lignes) > self.per_page
+        lignes = lignes[:self.per_page]
+
+        if not lignes:
+            # Curseur valide mais plus aucune ligne de son côté (lignes supprimées
+            # ou sorties du filtre depuis) : aucune ligne d'où repartir
+            return KeysetPage(lignes, self, has_next=False, has_previous=False)
+        if arriere:
+            lignes.reverse()
+            return KeysetPage(lignes, self, has_next=True, has_previous=encore)
+        return KeysetPage(lignes, self, has_next=encore, has_previous=valeurs is not None)
+
+    # ------------------------------------------------------------------
+    # Curseurs
+    # ------------------------------------------------------------------
+
+    def encoder_curseur(self, obj, direction):
+        valeurs = []
+        for champ, _ in self.ordering:
+            valeur = getattr(obj, champ)
+            # isoformat conserve les microsecondes (DjangoJSONEncoder les tronque)
+            valeurs.append(valeur.isoformat() if hasattr(valeur, 'isoformat') else valeur)
+        return signing.dumps({'d': direction, 'v': valeurs}, salt=SIGNING_SALT, compress=True)
+
+    def decoder_curseur(self, curseur):
+        """Retourne (direction, valeurs) ; un curseur absent ou invalide renvoie à la première page"""
+        if not curseur:
+            return 'n', None
+        try:
+            data = signing.loads(curseur, salt=SIGNING_SALT)
+            direction = data['d']
+            brutes = data['v']
+            if direction not in ('n', 'p') or len(brutes) != len(self.ordering):
+                raise ValueError
+            valeurs = [
+                self.queryset.model._meta.get_field(champ).to_python(valeur)
+                for (champ, _), valeur in zip(self.ordering, brutes)
+            ]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            return 'n', None
+        return direction, valeurs
+
+    # ------------------------------------------------------------------
+    # Requête
+    # ------------------------------------------------------------------
+
+    def _tri(self, arriere):
+        tri = []
+        for champ, descendant in self.ordering:
+            if descendant != arriere:
+                tri.append(f'-{champ}')
+            else:
+                tri.append(champ)
+        return tri
+
+    def _condition(self, valeurs, arriere):
+        """
+        Lignes situées après (ou avant) le curseur dans l'ordre de tri :
+        (a > x) OU (a = x ET b > y) OU ..., chaque comparaison dans le sens de son champ.
+        """
+        condition = Q()
+        egalites = {}
+        for (champ, descendant), valeur in zip(self.ordering, valeurs):
+            operateur = 'lt' if descendant != arriere else 'gt'
+            condition |= Q(**egalites, **{f'{champ}__{operateur}': valeur})
+            egalites[champ] = valeur
+        return condition
+
+
+def paginer(request, queryset, ordering, per_page=20, estimation=True):
+    """Raccourci pour les vues : page courante lue dans ?curseur=, liens prêts pour le template"""
+    paginator = KeysetPaginator(queryset, per_page, ordering, estimation=estimation)
+    page = paginator.get_page(request.GET.get(PARAM_CURSEUR))
+    return page.construire_urls(request.GET)
+
+
+async def apaginer(request, queryset, ordering, per_page=20):
+    """paginer() pour les vues asynchrones (sans estimation du total)"""
+    paginator = KeysetPaginator(queryset, per_page, ordering, estimation=False)
+    page = await paginator.aget_page(request.GET.get(PARAM_CURSEUR))
+    return page.construire_urls(request.GET)
@@ -0,0 +1,140 @@
+# administration/routage.py
+"""
+Lectures sur un réplica PostgreSQL.
+
+Les pages publiques et les rapports (statistiques, exports) ne font que lire :
+leurs requêtes peuvent partir vers un réplica en lecture (alias `replica` de
+DATABASES), ce qui décharge la base principale. Les écritures vont toujours
+vers `default`.
+
+Le choix est fait par requête HTTP : RoutageRepliqueMiddleware active le
+réplica pour les requêtes GET/HEAD dont la vue correspond à un motif de
+REPLIQUE_VUES (ex. 'pages:*'). Le reste du code y passe explicitement via
+utiliser_replique(). Sans alias `replica` configuré, tout reste sur `default`.
+
+Lecture de ses propres écritures : le réplica peut avoir un léger retard. Après
+une requête d'écriture (POST, PUT, PATCH, DELETE) d'un utilisateur ayant une
+session, celle-ci est épinglée à la base principale pendant
+REPLIQUE_EPINGLAGE_SECONDES : l'auteur voit immédiatement sa modification.
+
+Sessions, utilisateurs et permissions sont toujours lus sur la base principale :
+lus sur un réplica en retard, un utilisateur qui vient de se connecter
+apparaîtrait déconnecté.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import Resolver404, resolve
+
+lecture_replique = ContextVar('lecture_replique', default=False)
+
+CLE_SESSION = '_primaire_jusqua'
+METHODES_LECTURE = ('GET', 'HEAD')
+# Applications jamais lues sur le réplica (session et authentification de la requête)
+APPS_PRINCIPALES = {'sessions', 'auth', 'users'}
+
+
+def alias_replique():
+    """Alias du réplica s'il est configuré, sinon None"""
+    alias = getattr(settings, 'REPLIQUE_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def utiliser_replique(actif=True):
+    """Lectures du bloc envoyées au réplica (propagé aux threads de sync_to_async)"""
+    jeton = lecture_replique.set(actif)
+    try:
+        yield
+    finally:
+        lecture_replique.reset(jeton)
+
+
+class RouteurReplique:
+    """Routeur de DATABASE_ROUTERS"""
+
+    def db_for_read(self, model, **hints):
+        if lecture_replique.get() and model._meta.app_label not in APPS_PRINCIPALES:
+            return alias_replique()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicite : un objet lu sur le réplica puis modifié est écrit sur la base principale
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, alias_replique()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # En production le réplica est alimenté par la réplication ; en local, un second
+        # fichier SQLite peut être créé avec `migrate --database replica`
+        return None
+
+
+class RoutageRepliqueMiddleware:
+    """Active le réplica pour les vues de REPLIQUE_VUES (à placer après SessionMiddleware)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.motifs = list(getattr(settings, 'REPLIQUE_VUES', []))
+        self.epinglage = getattr(settings, 'REPLIQUE_EPINGLAGE_SECONDES', 15)
+        self.asynchrone = iscoroutinefunction(get_response)
+        if self.asynchrone:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asynchrone:
+            return self.__acall__(request)
+        if alias_replique() is None:
+            return self.get_response(request)
+
+        epingle = self._epingle(request.session.get(CLE_SESSION))
+        with utiliser_replique(self._vers_replique(request, epingle)):
+            response = self.get_response(request)
+        if self._a_epingler(request):
+            request.session[CLE_SESSION] = time.time() + self.epinglage
+        return response
+
+    async def __acall__(self, request):
+        if alias_replique() is None:
+            return await self.get_response(request)
+        # La session est lue avec l'API asynchrone : pas d'accès base bloquant dans la boucle
+        epingle = self._epingle(await request.session.aget(CLE_SESSION))
+        with utiliser_replique(self._vers_replique(request, epingle)):
+            response = await self.get_response(request)
+        if self._a_epingler(request):
+            await request.session.aset(CLE_SESSION, time.time() + self.epinglage)
+        return response
+
+    @staticmethod
+    def _epingle(jusqua):
+        return bool(jusqua and jusqua > time.time())
+
+    def _vers_replique(self, request, epingle):
+        if epingle or request.method not in METHODES_LECTURE:
+            return False
+        try:
+            vue = resolve(request.path_info).view_name
+        except Resolver404:
+            return False
+        return any(fnmatchcase(vue, motif) for motif in self.motifs)
+
+    @staticmethod
+    def _a_epingler(request):
+        # Sans session (visiteur anonyme), rien à épingler : pas de session créée pour cela
+        return (
+            request.method not in METHODES_LECTURE
+            and request.method != 'OPTIONS'
+            and request.session.session_key is not None
+        )
@@ -0,0 +1,302 @@
+# administration/stockage.py
+"""
+Stockage des fichiers adressé par leur contenu.
+
+Chaque fichier enregistré via un FileField/ImageField est rangé sous
+`cas/<2 car.>/<2 car.>/<sha256><extension>` : un même contenu déposé
+plusieurs fois (document remplacé par le même PDF, import Excel rejoué)
+n'est écrit qu'une fois. Le nombre de lignes qui référencent chaque fichier
+est tenu dans ReferenceFichier par des signaux branchés sur tous les modèles
+à champ fichier ; quand il tombe à zéro (suppression, rejet, remplacement),
+le fichier est supprimé après la validation de la transaction.
+
+Les écritures faites hors FileField (update(), bulk_create, SQL) ne sont pas
+comptées : la commande nettoyer_fichiers parcourt MEDIA_ROOT par lots, en
+mémoire bornée, supprime les fichiers qu'aucune ligne ne référence et
+recale les compteurs. Les fichiers à chemin fixe (cache des fiches PDF,
+fichiers de CKEditor) passent par le stockage `chemins` et ne sont pas
+concernés.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage, storages
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+PREFIXE_CAS = 'cas'
+
+# Un fichier modifié plus récemment n'est jamais supprimé : un dépôt concurrent du
+# même contenu peut l'avoir réutilisé sans être encore validé en base
+DELAI_GRACE_SECONDES = 60
+
+
+@deconstructible
+class StockageAdresseContenu(FileSystemStorage):
+    """FileSystemStorage qui range chaque fichier sous l'empreinte SHA-256 de son contenu"""
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom définitif est calculé dans _save() à partir du contenu
+        return name
+
+    @staticmethod
+    def nom_contenu(empreinte, extension):
+        return f"{PREFIXE_CAS}/{empreinte[:2]}/{empreinte[2:4]}/{empreinte}{extension}"
+
+    def _save(self, name, content):
+        empreinte = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for morceau in content.chunks():
+            empreinte.update(morceau)
+        extension = os.path.splitext(name)[1].lower()
+        nom = self.nom_contenu(empreinte.hexdigest(), extension)
+        chemin = self.path(nom)
+
+        if os.path.exists(chemin):
+            # Contenu déjà présent : pas de réécriture, horodatage rafraîchi (voir DELAI_GRACE_SECONDES)
+            os.utime(chemin, None)
+            return nom
+
+        dossier = os.path.dirname(chemin)
+        os.makedirs(dossier, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(dossier, self.directory_permissions_mode)
+
+        # Écriture dans un fichier temporaire puis renommage atomique : deux dépôts
+        # simultanés du même contenu produisent le même fichier complet
+        content.seek(0)
+        fd, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for morceau in content.chunks():
+                    f.write(morceau)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporaire, self.file_permissions_mode)
+            os.replace(temporaire, chemin)
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+            raise
+        return nom
+
+
+def champs_fichiers():
+    """[(modèle, nom du champ)] des FileField/ImageField servis par le stockage par défaut"""
+    return [
+        (modele, champ.name)
+        for modele in apps.get_models()
+        for champ in modele._meta.get_fields()
+        if isinstance(champ, models.FileField)
+        and (champ.storage is default_storage or champ.storage is storages['default'])
+    ]
+
+
+def _compte(nom):
+    return isinstance(default_storage, StockageAdresseContenu) and nom.startswith(PREFIXE_CAS + '/')
+
+
+def incrementer_reference(nom):
+    from .models import ReferenceFichier
+
+    if not _compte(nom):
+        return
+    if ReferenceFichier.objects.filter(nom=nom).update(references=F('references') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ReferenceFichier.objects.create(nom=nom, references=1)
+    except IntegrityError:
+        # Créée entre-temps par un dépôt concurrent
+        ReferenceFichier.objects.filter(nom=nom).update(references=F('references') + 1)
+
+
+def decrementer_reference(nom):
+    from .models import ReferenceFichier
+
+    if not _compte(nom):
+        return
+    ReferenceFichier.objects.filter(nom=nom, references__gt=0).update(references=F('references') - 1)
+    transaction.on_commit(lambda: supprimer_si_orphelin(nom))
+
+
+def supprimer_si_orphelin(nom):
+    """Supprime le fichier et son compteur si plus aucune ligne ne le référence"""
+    from .models import ReferenceFichier
+
+    with transaction.atomic():
+        reference = ReferenceFichier.objects.select_for_update().filter(nom=nom).first()
+        if reference is None or reference.references > 0:
+            return False
+        try:
+            if time.time() - os.path.getmtime(default_storage.path(nom)) < DELAI_GRACE_SECONDES:
+                # Réutilisé à l'instant : laissé au prochain nettoyer_fichiers
+                return False
+            default_storage.delete(nom)
+        except FileNotFoundError:
+            pass
+        reference.delete()
+    return True
+
+
+def _noms(instance, champs):
+    return {champ: getattr(instance, champ).name or '' for champ in champs}
+
+
+def _avant_enregistrement(sender, instance, raw=False, update_fields=None, **kwargs):
+    champs = CHAMPS_PAR_MODELE[sender]
+    if update_fields is not None:
+        champs = [c for c in champs if c in update_fields]
+    instance._fichiers_avant = {}
+    if raw or instance._state.adding or not champs or instance.pk is None:
+        return
+    avant = sender._base_manager.filter(pk=instance.pk).values(*champs).first()
+    instance._fichiers_avant = {c: v or '' for c, v in (avant or {}).items()}
+
+
+def _apres_enregistrement(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    champs = CHAMPS_PAR_MODELE[sender]
+    if update_fields is not None:
+        champs = [c for c in champs if c in update_fields]
+    avant = getattr(instance, '_fichiers_avant', {})
+    for champ, nom in _noms(instance, champs).items():
+        ancien = '' if created else avant.get(champ, nom)
+        if nom == ancien:
+            continue
+        if nom:
+            incrementer_reference(nom)
+        if ancien:
+            decrementer_reference(ancien)
+
+
+def _apres_suppression(sender, instance, **kwargs):
+    for nom in _noms(instance, CHAMPS_PAR_MODELE[sender]).values():
+        if nom:
+            decrementer_reference(nom)
+
+
+CHAMPS_PAR_MODELE = {}
+
+
+def connecter_signaux():
+    """Branche le comptage des références sur tous les modèles à champ fichier"""
+    for modele, champ in champs_fichiers():
+        CHAMPS_PAR_MODELE.setdefault(modele, []).append(champ)
+    for modele in CHAMPS_PAR_MODELE:
+        pre_save.connect(_avant_enregistrement, sender=modele, dispatch_uid=f'stockage_avant_{modele._meta.label}')
+        post_save.connect(_apres_enregistrement, sender=modele, dispatch_uid=f'stockage_apres_{modele._meta.label}')
+        post_delete.connect(_apres_suppression, sender=modele, dispatch_uid=f'stockage_suppr_{modele._meta.label}')
+
+
+def prefixes_geres():
+    """Dossiers de MEDIA_ROOT écrits par des FileField (hors stockage `chemins`)"""
+    prefixes = {PREFIXE_CAS}
+    for modele, nom_champ in champs_fichiers():
+        upload_to = modele._meta.get_field(nom_champ).upload_to
+        if isinstance(upload_to, str) and upload_to:
+            prefixe = upload_to.split('%')[0].strip('/')
+            if prefixe:
+                prefixes.add(prefixe)
+    # Les dossiers imbriqués sont couverts par leur parent
+    return sorted(p for p in prefixes if not any(p != q and p.startswith(q + '/') for q in prefixes))
+
+
+class NettoyageFichiers:
+    """Suppression des fichiers orphelins de MEDIA_ROOT, par lots de taille fixe"""
+
+    def __init__(self, age_minimum_heures=24, taille_lot=1000, simulation=False, stdout=None):
+        self.age_minimum = age_minimum_heures * 3600
+        self.taille_lot = taille_lot
+        self.simulation = simulation
+        self.stdout = stdout
+        self.champs = champs_fichiers()
+        self.resultat = {'parcourus': 0, 'orphelins': 0, 'octets_liberes': 0, 'recents_ignores': 0}
+
+    def fichiers(self):
+        """Générateur (nom relatif, chemin absolu) : un seul dossier en mémoire à la fois"""
+        racine = str(settings.MEDIA_ROOT)
+        for prefixe in prefixes_geres():
+            a_visiter = [os.path.join(racine, prefixe)]
+            while a_visiter:
+                dossier = a_visiter.pop()
+                try:
+                    entrees = os.scandir(dossier)
+                except FileNotFoundError:
+                    continue
+                with entrees:
+                    for entree in entrees:
+                        if entree.is_dir(follow_symlinks=False):
+                            a_visiter.append(entree.path)
+                        elif entree.is_file(follow_symlinks=False) and not entree.name.endswith('.tmp'):
+                            nom = os.path.relpath(entree.path, racine).replace(os.sep, '/')
+                            yield nom, entree.path
+
+    def references(self, noms):
+        """{nom: nombre de lignes qui le référencent} pour un lot de noms"""
+        comptes = {}
+        for modele, champ in self.champs:
+            lignes = modele._base_manager.filter(**{f'{champ}__in': noms}).values(champ).annotate(
+                n=Count('pk')
+            ).order_by()
+            for ligne in lignes:
+                comptes[ligne[champ]] = comptes.get(ligne[champ], 0) + ligne['n']
+        return comptes
+
+    def traiter_lot(self, lot):
+        from .models import ReferenceFichier
+
+        comptes = self.references([nom for nom, _ in lot])
+        maintenant = time.time()
+        orphelins = []
+        for nom, chemin in lot:
+            if comptes.get(nom):
+                continue
+            try:
+                statistiques = os.stat(chemin)
+            except FileNotFoundError:
+                continue
+            if maintenant - statistiques.st_mtime < self.age_minimum:
+                self.resultat['recents_ignores'] += 1
+                continue
+            orphelins.append(nom)
+            self.resultat['octets_liberes'] += statistiques.st_size
+
+        self.resultat['orphelins'] += len(orphelins)
+        if self.simulation:
+            for nom in orphelins:
+                self.stdout and self.stdout.write(f"  orphelin : {nom}")
+            return
+
+        for nom in orphelins:
+            default_storage.delete(nom)
+        # Compteurs recalés sur les références réelles du lot
+        ReferenceFichier.objects.filter(nom__in=[nom for nom, _ in lot if not comptes.get(nom)]).delete()
+        comptes_cas = {nom: n for nom, n in comptes.items() if nom.startswith(PREFIXE_CAS + '/')}
+        if comptes_cas:
+            ReferenceFichier.objects.bulk_create(
+                [ReferenceFichier(nom=nom, references=n) for nom, n in comptes_cas.items()],
+                update_conflicts=True, unique_fields=['nom'], update_fields=['references'],
+            )
+
+    def executer(self):
+        lot = []
+        for entree in self.fichiers():
+            lot.append(entree)
+            self.resultat['parcourus'] += 1
+            if len(lot) >= self.taille_lot:
+                self.traiter_lot(lot)
+                lot = []
+        if lot:
+            self.traiter_lot(lot)
+        return self.resultat
@@ -0,0 +1,252 @@
+# administration/televersements.py
+"""
+Téléversement fragmenté et reprenable des fichiers volumineux (vidéos).
+
+Le client ouvre une session (nom, taille, champ cible), puis envoie le fichier
+par fragments successifs (PUT, corps brut) accompagnés de leur position et de
+leur empreinte SHA-256. Chaque fragment est lu par blocs dans un fichier
+temporaire et vérifié avant d'être ajouté au fichier en cours : la mémoire
+utilisée par un téléversement ne dépend pas de la taille du fichier. Après une
+coupure, le client relit la position atteinte (GET) et reprend de là.
+
+Une fois le fichier complet, il est attaché au champ cible (Post.video_file,
+PageBlock.video_file) en passant par le stockage par défaut. La session et le
+fichier temporaire ne sont supprimés qu'à la validation de la transaction qui
+enregistre l'objet : si l'enregistrement échoue, le téléversement peut être
+attaché de nouveau. Les sessions abandonnées sont purgées par
+nettoyer_fichiers.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Televersement
+
+TAILLE_BLOC = 64 * 1024
+
+EXTENSIONS_VIDEO = ['mp4', 'webm', 'avi', 'mov']
+
+# Champs pouvant recevoir un fichier téléversé par fragments : (modèle, champ, extensions)
+CIBLES = {
+    'post_video': ('pages.Post', 'video_file', EXTENSIONS_VIDEO),
+    'bloc_video': ('academique.PageBlock', 'video_file', EXTENSIONS_VIDEO),
+}
+
+
+class TeleversementErreur(Exception):
+    """Demande invalide ; `statut` est le code HTTP à renvoyer"""
+
+    def __init__(self, message, statut=400):
+        super().__init__(message)
+        self.statut = statut
+
+
+class PositionInvalide(TeleversementErreur):
+    """Fragment envoyé à une autre position que celle attendue (reprise, doublon)"""
+
+    def __init__(self, attendue):
+        super().__init__(f"Position attendue : {attendue}", statut=409)
+        self.attendue = attendue
+
+
+def taille_fragment():
+    return getattr(settings, 'TELEVERSEMENTS_TAILLE_FRAGMENT', 4 * 1024 * 1024)
+
+
+def taille_max():
+    return getattr(settings, 'TELEVERSEMENTS_TAILLE_MAX', 1024 * 1024 * 1024)
+
+
+def dossier():
+    chemin = getattr(settings, 'TELEVERSEMENTS_DOSSIER', None) or os.path.join(
+        tempfile.gettempdir(), 'iutessa_televersements'
+    )
+    os.makedirs(chemin, exist_ok=True)
+    return chemin
+
+
+def chemin_temporaire(televersement):
+    return os.path.join(dossier(), f"{televersement.pk}.part")
+
+
+class TeleversementService:
+    """Sessions de téléversement fragmenté"""
+
+    @staticmethod
+    def creer(utilisateur, cible, nom_fichier, taille):
+        if cible not in CIBLES:
+            raise TeleversementErreur(f"Cible inconnue : {cible}")
+        nom_fichier = os.path.basename(str(nom_fichier or '')).strip()[:255]
+        extension = os.path.splitext(nom_fichier)[1].lstrip('.').lower()
+        extensions = CIBLES[cible][2]
+        if extension not in extensions:
+            raise TeleversementErreur(f"Format non autorisé. Utilisez : {', '.join(extensions)}")
+        try:
+            taille = int(taille)
+        except (TypeError, ValueError):
+            raise TeleversementErreur("Taille invalide")
+        if taille <= 0:
+            raise TeleversementErreur("Fichier vide")
+        if taille > taille_max():
+            raise TeleversementErreur(
+                f"Le fichier ne doit pas dépasser {taille_max() // (1024 * 1024)} Mo", statut=413
+            )
+
+        televersement = Televersement.objects.create(
+            utilisateur=utilisateur, cible=cible, nom_fichier=nom_fichier, taille=taille
+        )
+        open(chemin_temporaire(televersement), 'wb').close()
+        return televersement
+
+    @staticmethod
+    def obtenir(televersement_id, utilisateur):
+        televersement = Televersement.objects.filter(pk=televersement_id, utilisateur=utilisateur).first()
+        if televersement is None:
+            raise TeleversementErreur("Téléversement introuvable", statut=404)
+        return televersement
+
+    @staticmethod
+    def recevoir_fragment(televersement, position, longueur, empreinte, flux):
+        """
+        Ajoute un fragment lu depuis `flux` (longueur octets, position dans le fichier).
+        Retourne le nombre d'octets reçus après ajout.
+        """
+        if televersement.statut != 'en_cours':
+            raise TeleversementErreur("Téléversement déjà terminé", statut=409)
+        if position != televersement.recu:
+            raise PositionInvalide(televersement.recu)
+        if longueur <= 0 or longueur > taille_fragment() or position + longueur > televersement.taille:
+            raise TeleversementErreur("Taille de fragment invalide", statut=413)
+        if not empreinte:
+            raise TeleversementErreur("Empreinte SHA-256 du fragment manquante")
+
+        # Lecture du réseau hors verrou, dans un fichier à part : un fragment corrompu
+        # ou interrompu ne touche pas au fichier en cours
+        fd, chemin_fragment = tempfile.mkstemp(dir=dossier(), suffix='.fragment')
+        try:
+            calcul = hashlib.sha256()
+            restant = longueur
+            with os.fdopen(fd, 'wb') as sortie:
+                while restant:
+                    bloc = flux.read(min(TAILLE_BLOC, restant))
+                    if not bloc:
+                        break
+                    calcul.update(bloc)
+                    sortie.write(bloc)
+                    restant -= len(bloc)
+            if restant:
+                raise TeleversementErreur("Fragment incomplet")
+            if calcul.hexdigest() != empreinte.strip().lower():
+                raise TeleversementErreur("Empreinte du fragment incorrecte : renvoyer le fragment", statut=422)
+
+            with transaction.atomic():
+                verrou = Televersement.objects.select_for_update().get(pk=televersement.pk)
+                if verrou.statut != 'en_cours':
+                    raise TeleversementErreur("Téléversement déjà terminé", statut=409)
+                if verrou.recu != position:
+                    # Fragment déjà ajouté par une requête concurrente (renvoi après délai)
+                    raise PositionInvalide(verrou.recu)
+                with open(chemin_temporaire(verrou), 'r+b') as fichier, open(chemin_fragment, 'rb') as fragment:
+                    fichier.seek(position)
+                    fichier.truncate()
+                    shutil.copyfileobj(fragment, fichier, TAILLE_BLOC)
+                verrou.recu = position + longueur
+                verrou.save(update_fields=['recu', 'date_maj'])
+            televersement.recu = verrou.recu
+            return televersement.recu
+        finally:
+            if os.path.exists(chemin_fragment):
+                os.remove(chemin_fragment)
+
+    @staticmethod
+    def terminer(televersement, empreinte=None):
+        """Marque le fichier complet ; vérifie l'empreinte du fichier entier si elle est fournie"""
+        if televersement.statut == 'termine':
+            return televersement
+        if televersement.recu != televersement.taille:
+            raise TeleversementErreur(
+                f"Fichier incomplet ({televersement.recu}/{televersement.taille} octets)", statut=409
+            )
+        if empreinte:
+            calcul = hashlib.sha256()
+            with open(chemin_temporaire(televersement), 'rb') as fichier:
+                for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b''):
+                    calcul.update(bloc)
+            if calcul.hexdigest() != empreinte.strip().lower():
+                raise TeleversementErreur("Empreinte du fichier incorrecte", statut=422)
+        Televersement.objects.filter(pk=televersement.pk, statut='en_cours').update(
+            statut='termine', date_maj=timezone.now()
+        )
+        televersement.statut = 'termine'
+        return televersement
+
+    @staticmethod
+    def attacher(televersement_id, utilisateur, instance, cible):
+        """
+        Attache un téléversement terminé au champ de `instance` (sans l'enregistrer).
+        La session est supprimée à la validation de la transaction en cours : à appeler
+        dans le même bloc atomique que l'enregistrement de `instance`. Retourne le champ fichier.
+        """
+        televersement = TeleversementService.obtenir(televersement_id, utilisateur)
+        modele, champ, _ = CIBLES[cible]
+        if televersement.cible != cible or instance._meta.label != modele:
+            raise TeleversementErreur("Ce téléversement est destiné à un autre champ")
+        if televersement.statut != 'termine':
+            raise TeleversementErreur("Téléversement inachevé", statut=409)
+
+        chemin = chemin_temporaire(televersement)
+        fichier_champ = getattr(instance, champ)
+        # Copie par blocs vers le stockage (File.chunks), pas de lecture complète en mémoire
+        with open(chemin, 'rb') as source:
+            fichier_champ.save(televersement.nom_fichier, File(source), save=False)
+
+        def nettoyer():
+            Televersement.objects.filter(pk=televersement.pk).delete()
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+        transaction.on_commit(nettoyer)
+        return fichier_champ
+
+    @staticmethod
+    def attacher_objet(televersement, objet_id):
+        """Attache le fichier à un objet existant de la cible et l'enregistre"""
+        modele, champ, _ = CIBLES[televersement.cible]
+        instance = apps.get_model(modele).objects.filter(pk=objet_id).first()
+        if instance is None:
+            raise TeleversementErreur("Objet cible introuvable", statut=404)
+        with transaction.atomic():
+            TeleversementService.attacher(televersement.pk, televersement.utilisateur, instance, televersement.cible)
+            instance.save(update_fields=[champ])
+        return instance
+
+    @staticmethod
+    def purger(heures=24):
+        """Supprime les sessions inactives depuis `heures` heures et leurs fichiers temporaires"""
+        limite = timezone.now() - timedelta(hours=heures)
+        anciens = list(Televersement.objects.filter(date_maj__lt=limite).values_list('pk', flat=True))
+        for pk in anciens:
+            chemin = os.path.join(dossier(), f"{pk}.part")
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        Televersement.objects.filter(pk__in=anciens).delete()
+        return len(anciens)
+
+    @staticmethod
+    def etat(televersement):
+        return {
+            'id': str(televersement.pk),
+            'nom': televersement.nom_fichier,
+            'taille': televersement.taille,
+            'recu': televersement.recu,
+            'statut': televersement.statut,
+            'taille_fragment': taille_fragment(),
+        }
@@ -1,3 +1,716 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from academique.models import EtudiantAcademique, PageBlock
+from pages.models import Post
+from . import routage
+from .compteurs import CLE_VERSION, compteurs, version
+from .limitation import analyser_taux
+from .middleware import ProfilingMiddleware
+from .models import ReferenceFichier, Televersement
+from .televersements import TeleversementService, chemin_temporaire
+from .benchmark import BUDGETS_REQUETES
+from .donnees_synthetiques import DonneesSynthetiquesService, PREFIXE
+from .pagination import PARAM_CURSEUR, SIGNING_SALT, KeysetPaginator, paginer
+from .stockage import PREFIXE_CAS
+from .views import sante_view
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BudgetRequetesTests(TestCase):
+    """Chaque vue reste dans son budget de requêtes SQL, quel que soit le volume de données"""
+
+    # Volumes cumulés : le second ajoute des filières, des étudiants et des articles au premier
+    VOLUMES = [
+        {'filieres': 2, 'etudiants': 6, 'notifications': 30, 'articles': 3, 'commentaires_par_article': 2},
+        {'filieres': 6, 'etudiants': 40, 'notifications': 300, 'articles': 10, 'commentaires_par_article': 8},
+    ]
+
+    # Clés de session posées par les vues après leur premier affichage (rappels déjà envoyés)
+    SESSION_REGIME_ETABLI = {'docs_reminder_sent': True, 'rappel_documents_sent': True}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _requete(self, path, user):
+        request = self.factory.get(path)
+        request.user = user
+        request.auser = sync_to_async(lambda: user)
+        SessionMiddleware(lambda r: None).process_request(request)
+        request.session.update(self.SESSION_REGIME_ETABLI)
+        request._messages = FallbackStorage(request)
+        return request
+
+    @staticmethod
+    async def _attendre(coroutine):
+        return await coroutine
+
+    def _compter(self, nom_url, user, kwargs=None):
+        path = reverse(nom_url, kwargs=kwargs)
+        request = self._requete(path, user)
+        match = resolve(path)
+        with CaptureQueriesContext(connection) as requetes:
+            response = match.func(request, *match.args, **match.kwargs)
+            if asyncio.iscoroutine(response):
+                # Vue asynchrone : ses requêtes passent par ce thread (sync_to_async thread_sensitive)
+                response = async_to_sync(self._attendre)(response)
+        self.assertEqual(response.status_code, 200, nom_url)
+        return len(requetes), requetes
+
+    def _utilisateurs(self):
+        admin = get_user_model().objects.get(username=f'{PREFIXE}-admin')
+        etudiant = EtudiantAcademique.objects.select_related('user').order_by('id').first().user
+        return admin, etudiant
+
+    def test_budgets_independants_du_volume(self):
+        for volume in self.VOLUMES:
+            DonneesSynthetiquesService.generer(graine=len(volume), **volume)
+            admin, etudiant = self._utilisateurs()
+            article = Post.objects.filter(slug__startswith=f'{PREFIXE}-').order_by('-published_at').first()
+
+            scenarios = {
+                'administration:dashboard': (admin, None),
+                'academique:etudiant_profile': (etudiant, None),
+                'academique:admin_etudiants_list': (admin, None),
+                'academique:admin_etudiant_detail': (admin, {'etudiant_id': etudiant.etudiant_academique.id}),
+                'notifications:ajax_unread_count': (etudiant, None),
+                'notifications:ajax_recent': (etudiant, None),
+                'pages:blog': (etudiant, None),
+                'pages:blog_detail': (etudiant, {'slug': article.slug}),
+                'academique:filieres_list_public': (etudiant, None),
+            }
+            self.assertEqual(set(scenarios), set(BUDGETS_REQUETES))
+
+            for nom_url, (user, kwargs) in scenarios.items():
+                with self.subTest(vue=nom_url, etudiants=EtudiantAcademique.objects.count()):
+                    nombre, requetes = self._compter(nom_url, user, kwargs)
+                    self.assertLessEqual(
+                        nombre, BUDGETS_REQUETES[nom_url],
+                        f"{nom_url} : {nombre} requêtes pour un budget de {BUDGETS_REQUETES[nom_url]}\n"
+                        + '\n'.join(q['sql'] for q in requetes.captured_queries)
+                    )
+
+
+class PaginationCurseurTests(TestCase):
+    """Pagination par curseur : ordre total sur des clés de tri ex æquo, curseurs signés"""
+
+    ORDRE = ('-date_joined', 'id')
+
+    def setUp(self):
+        User = get_user_model()
+        # Deux dates seulement : la plupart des lignes sont départagées par l'id
+        for i in range(8):
+            User.objects.create_user(f'pagine-{i}')
+        self.users = User.objects.filter(username__startswith='pagine-')
+        ids = list(self.users.order_by('id').values_list('id', flat=True))
+        self.users.filter(id__in=ids[:5]).update(date_joined=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.users.filter(id__in=ids[5:]).update(date_joined=datetime(2025, 6, 1, tzinfo=timezone.utc))
+        self.attendus = list(self.users.order_by(*self.ORDRE).values_list('id', flat=True))
+        self.paginator = KeysetPaginator(self.users, 3, self.ORDRE, estimation=False)
+
+    def ids(self, page):
+        return [u.id for u in page]
+
+    def test_pages_suivantes_sans_doublon_ni_oubli(self):
+        vus = []
+        page = self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            vus.extend(self.ids(page))
+            if not page.has_next():
+                break
+            page = self.paginator.get_page(page.curseur_suivant)
+            self.assertTrue(page.has_previous())
+        self.assertEqual(vus, self.attendus)
+
+    def test_page_precedente(self):
+        premiere = self.paginator.get_page()
+        deuxieme = self.paginator.get_page(premiere.curseur_suivant)
+        troisieme = self.paginator.get_page(deuxieme.curseur_suivant)
+
+        retour = self.paginator.get_page(troisieme.curseur_precedent)
+        self.assertEqual(self.ids(retour), self.ids(deuxieme))
+        self.assertTrue(retour.has_next())
+
+        debut = self.paginator.get_page(retour.curseur_precedent)
+        self.assertEqual(self.ids(debut), self.attendus[:3])
+        self.assertFalse(debut.has_previous())
+
+    def test_curseur_signe_et_opaque(self):
+        curseur = self.paginator.get_page().curseur_suivant
+        self.assertEqual(signing.loads(curseur, salt=SIGNING_SALT)['d'], 'n')
+        with self.assertRaises(signing.BadSignature):
+            signing.loads(curseur, salt='autre')
+
+    def test_curseur_invalide_renvoie_a_la_premiere_page(self):
+        curseur = self.paginator.get_page().curseur_suivant
+        invalides = [
+            curseur[:-2] + ('AA' if curseur[-2:] != 'AA' else 'BB'),    # signature altérée
+            signing.dumps({'d': 'n', 'v': ['2025-01-01T00:00:00+00:00', 1]}, salt='autre'),
+            signing.dumps({'d': 'n', 'v': [1]}, salt=SIGNING_SALT),     # nombre de valeurs
+            signing.dumps({'d': 'x', 'v': ['2025-01-01T00:00:00+00:00', 1]}, salt=SIGNING_SALT),
+            signing.dumps({'d': 'n', 'v': ['pas une date', 1]}, salt=SIGNING_SALT),
+            'nimporte-quoi',
+        ]
+        for curseur in invalides:
+            with self.subTest(curseur=curseur):
+                page = self.paginator.get_page(curseur)
+                self.assertEqual(self.ids(page), self.attendus[:3])
+                self.assertFalse(page.has_previous())
+
+    def test_curseur_valide_vers_une_page_vide(self):
+        premiere = self.paginator.get_page()
+        deuxieme = self.paginator.get_page(premiere.curseur_suivant)
+        suivant, precedent = deuxieme.curseur_suivant, deuxieme.curseur_precedent
+        # Les lignes de part et d'autre de la page affichée sortent de la liste
+        self.users.exclude(id__in=self.ids(deuxieme)).delete()
+
+        for curseur in (suivant, precedent):
+            with self.subTest(direction=signing.loads(curseur, salt=SIGNING_SALT)['d']):
+                request = RequestFactory().get('/', {PARAM_CURSEUR: curseur})
+                page = paginer(request, self.users, self.ORDRE, per_page=3, estimation=False)
+                self.assertEqual(len(page), 0)
+                self.assertFalse(page.has_other_pages())
+                self.assertEqual((page.url_suivante, page.url_precedente), ('', ''))
+
+    def test_paginer_conserve_les_filtres(self):
+        request = RequestFactory().get('/', {'role': 'ETUDIANT', 'page': '4'})
+        page = paginer(request, self.users, self.ORDRE, per_page=3, estimation=False)
+
+        self.assertIn('role=ETUDIANT', page.url_suivante)
+        self.assertNotIn('page=', page.url_suivante)
+        self.assertIn(f'{PARAM_CURSEUR}=', page.url_suivante)
+        self.assertEqual(page.url_precedente, '')
+
+
+@override_settings(
+    LIMITATION_DEBIT_ACTIVE=True,
+    LIMITATION_DEBIT={},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LimitationDebitTests(TestCase):
+    """Limitation de débit des vues de connexion et de commentaire"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Horloge figée en début de fenêtre : pas de bascule de minute pendant le test
+        horloge = mock.patch('administration.limitation.time')
+        horloge.start().time.return_value = 60 * 1_000_000 + 5
+        self.addCleanup(horloge.stop)
+        self.url_connexion = reverse('users:login')
+
+    def connexion(self, username, ip='10.0.0.1'):
+        return self.client.post(
+            self.url_connexion, {'username': username, 'password': 'faux'}, REMOTE_ADDR=ip
+        )
+
+    def test_analyser_taux(self):
+        self.assertEqual(analyser_taux('10/m'), (10, 60))
+        self.assertEqual(analyser_taux('20/5m'), (20, 300))
+        with self.assertRaises(ValueError):
+            analyser_taux('10 par minute')
+
+    def test_trente_et_unieme_connexion_refusee(self):
+        for i in range(30):
+            self.assertNotEqual(self.connexion(f'robot-{i}').status_code, 429)
+
+        response = self.connexion('robot-30')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '55')
+
+        # Une autre adresse n'est pas concernée
+        self.assertNotEqual(self.connexion('robot-31', ip='10.0.0.2').status_code, 429)
+
+    def test_limite_par_identifiant_toutes_adresses(self):
+        for i in range(10):
+            self.assertNotEqual(self.connexion('Victime', ip=f'10.0.1.{i}').status_code, 429)
+        self.assertEqual(self.connexion('victime', ip='10.0.1.99').status_code, 429)
+
+    def test_get_non_comptes(self):
+        for _ in range(40):
+            self.assertEqual(self.client.get(self.url_connexion, REMOTE_ADDR='10.0.0.1').status_code, 200)
+        self.assertNotEqual(self.connexion('robot').status_code, 429)
+
+    @override_settings(LIMITATION_DEBIT={'connexion': {'ip': '3/m'}})
+    def test_limite_remplacee_par_les_reglages(self):
+        for i in range(3):
+            self.assertNotEqual(self.connexion(f'robot-{i}').status_code, 429)
+        self.assertEqual(self.connexion('robot-3').status_code, 429)
+
+    @override_settings(LIMITATION_DEBIT_ACTIVE=False)
+    def test_limitation_desactivee(self):
+        for i in range(35):
+            self.assertNotEqual(self.connexion(f'robot-{i}').status_code, 429)
+
+    @override_settings(LIMITATION_DEBIT={'commentaire': {'ip': '2/m'}})
+    def test_commentaires_limites_par_adresse(self):
+        auteur = get_user_model().objects.create_user('auteur-blog')
+        post = Post.objects.create(
+            title='Article limité', author=auteur, excerpt='Extrait', content='Contenu', status='published'
+        )
+        url = reverse('pages:blog_detail', args=[post.slug])
+
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+        for _ in range(2):
+            self.assertNotEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code, 429)
+        response = self.client.post(url, {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # La lecture de l'article reste possible
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TELEVERSEMENTS_DOSSIER=tempfile.mkdtemp())
+class TeleversementAttacheTests(TestCase):
+    """Le téléversement n'est supprimé qu'une fois l'objet cible enregistré"""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user('admin-video', role='ADMIN')
+        contenu = b'video'
+        self.televersement = TeleversementService.creer(self.admin, 'post_video', 'film.mp4', len(contenu))
+        TeleversementService.recevoir_fragment(
+            self.televersement, 0, len(contenu), hashlib.sha256(contenu).hexdigest(), BytesIO(contenu)
+        )
+        TeleversementService.terminer(self.televersement)
+        self.chemin = chemin_temporaire(self.televersement)
+
+    def article(self):
+        return Post(title='Article vidéo', author=self.admin, excerpt='Extrait', content='Contenu')
+
+    def test_echec_de_l_enregistrement_conserve_le_televersement(self):
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    TeleversementService.attacher(self.televersement.pk, self.admin, self.article(), 'post_video')
+                    raise RuntimeError("échec de l'enregistrement de l'article")
+
+        self.assertEqual(rappels, [])
+        self.assertTrue(Televersement.objects.filter(pk=self.televersement.pk).exists())
+        self.assertTrue(os.path.exists(self.chemin))
+
+    def test_session_supprimee_apres_enregistrement(self):
+        post = self.article()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                TeleversementService.attacher(self.televersement.pk, self.admin, post, 'post_video')
+                post.save()
+            self.assertTrue(Televersement.objects.filter(pk=self.televersement.pk).exists())
+
+        self.assertFalse(Televersement.objects.filter(pk=self.televersement.pk).exists())
+        self.assertFalse(os.path.exists(self.chemin))
+        with Post.objects.get(pk=post.pk).video_file.open('rb') as f:
+            self.assertEqual(f.read(), b'video')
+
+
+@override_settings(METRIQUES_JETON='secret-scraper', METRIQUES_IPS_AUTORISEES=['10.1.0.0/16', '192.168.1.5'])
+class AccesMetriquesTests(TestCase):
+    """Accès à /metrics : administrateur, jeton ou adresse autorisée, jamais l'adresse locale d'office"""
+
+    def get(self, **extra):
+        return self.client.get(reverse('metrics'), **extra)
+
+    def test_adresse_locale_refusee(self):
+        self.assertEqual(self.get(REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.get(REMOTE_ADDR='::1').status_code, 403)
+
+    def test_jeton(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer secret-scraper').status_code, 200)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer autre').status_code, 403)
+
+    @override_settings(METRIQUES_JETON='')
+    def test_jeton_vide_jamais_accepte(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_adresses_autorisees(self):
+        self.assertEqual(self.get(REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.get(REMOTE_ADDR='192.168.1.5').status_code, 200)
+        self.assertEqual(self.get(REMOTE_ADDR='192.168.1.6').status_code, 403)
+
+    def test_administrateur(self):
+        self.client.force_login(get_user_model().objects.create_user('admin-metriques', role='ADMIN'))
+        self.assertEqual(self.get(REMOTE_ADDR='203.0.113.9').status_code, 200)
+
+
+class StockageDedupliqueTests(TestCase):
+    """Stockage adressé par contenu : déduplication, comptage des références et nettoyage"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.auteur = get_user_model().objects.create_user('auteur-stockage')
+
+    def article(self, contenu, **champs):
+        return Post.objects.create(
+            title=f'Article {Post.objects.count()}', author=self.auteur, excerpt='Extrait', content='Contenu',
+            featured_image=ContentFile(contenu, name='image.jpg'), **champs
+        )
+
+    def references(self, nom):
+        return ReferenceFichier.objects.filter(nom=nom).values_list('references', flat=True).first()
+
+    def fichiers(self):
+        return sorted(
+            os.path.relpath(os.path.join(dossier, nom), self.media).replace(os.sep, '/')
+            for dossier, _, noms in os.walk(self.media) for nom in noms
+        )
+
+    def vieillir(self, nom, heures=48):
+        date = time.time() - heures * 3600
+        os.utime(default_storage.path(nom), (date, date))
+
+    def nettoyer(self, *options):
+        call_command('nettoyer_fichiers', *options, stdout=StringIO())
+
+    def test_contenu_identique_stocke_une_fois(self):
+        premier = self.article(b'meme image')
+        second = self.article(b'meme image')
+
+        nom = premier.featured_image.name
+        self.assertEqual(second.featured_image.name, nom)
+        self.assertTrue(nom.startswith(PREFIXE_CAS + '/'))
+        self.assertEqual(self.fichiers(), [nom])
+        self.assertEqual(self.references(nom), 2)
+
+    def test_remplacement_et_suppression_decrementent(self):
+        premier = self.article(b'meme image')
+        second = self.article(b'meme image')
+        nom = premier.featured_image.name
+        self.vieillir(nom)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            premier.featured_image = ContentFile(b'autre image', name='image.jpg')
+            premier.save()
+        self.assertEqual(self.references(nom), 1)
+        self.assertEqual(self.references(premier.featured_image.name), 1)
+        self.assertTrue(default_storage.exists(nom))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertIsNone(self.references(nom))
+        self.assertFalse(default_storage.exists(nom))
+        self.assertEqual(self.fichiers(), [premier.featured_image.name])
+
+    def test_orphelin_recent_conserve_jusqu_a_l_age_minimum(self):
+        nom = default_storage.save('blog/featured/orphelin.jpg', ContentFile(b'jamais rattache'))
+        self.vieillir(nom, heures=2)
+
+        self.nettoyer('--age-min', '3')
+        self.assertTrue(default_storage.exists(nom))
+
+        self.nettoyer('--age-min', '1')
+        self.assertFalse(default_storage.exists(nom))
+
+    def test_fichiers_references_hors_signaux_conserves(self):
+        # Chemin historique, antérieur au stockage par adresse de contenu
+        ancien = FileSystemStorage(location=self.media).save('blog/featured/ancien.jpg', ContentFile(b'ancien'))
+        historique = self.article(b'provisoire')
+        Post.objects.filter(pk=historique.pk).update(featured_image=ancien)
+        # Ligne écrite par update() (import, SQL) : aucun compteur tenu
+        nom = default_storage.save('blog/featured/importe.jpg', ContentFile(b'importe'))
+        importe = self.article(b'provisoire')
+        Post.objects.filter(pk=importe.pk).update(featured_image=nom)
+        for fichier in self.fichiers():
+            self.vieillir(fichier)
+
+        self.nettoyer('--age-min', '1')
+
+        self.assertTrue(default_storage.exists(ancien))
+        self.assertTrue(default_storage.exists(nom))
+        self.assertEqual(self.fichiers(), sorted([ancien, nom]))
+        # Compteurs recalés sur les lignes réelles ; ancien chemin hors comptage
+        self.assertEqual(self.references(nom), 1)
+        self.assertIsNone(self.references(ancien))
+
+
+@override_settings(REPLIQUE_VUES=['pages:blog*'], REPLIQUE_EPINGLAGE_SECONDES=15)
+class RoutageRepliqueTests(TestCase):
+    """Routage des lectures vers le réplica : vues choisies, écritures et épinglage après un POST"""
+
+    def setUp(self):
+        # Réplica simulé : seul le choix d'alias est vérifié ici
+        self.enterContext(mock.patch.object(routage, 'alias_replique', return_value='replica'))
+        self.routeur = routage.RouteurReplique()
+        self.lectures = []
+
+        def vue(request):
+            self.lectures.append(routage.lecture_replique.get())
+            return HttpResponse()
+
+        self.middleware = SessionMiddleware(routage.RoutageRepliqueMiddleware(vue))
+
+    def requete(self, methode, nom_url, session=None, **kwargs):
+        request = getattr(RequestFactory(), methode)(reverse(nom_url, **kwargs))
+        if session:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = session
+        response = self.middleware(request)
+        return self.lectures[-1], response.cookies.get(settings.SESSION_COOKIE_NAME)
+
+    def session(self):
+        store = SessionStore()
+        store['connecte'] = True
+        store.save()
+        return store.session_key
+
+    def test_ecritures_sur_la_base_principale(self):
+        with routage.utiliser_replique():
+            self.assertEqual(self.routeur.db_for_read(Post), 'replica')
+            self.assertEqual(self.routeur.db_for_write(Post), 'default')
+        self.assertIsNone(self.routeur.db_for_read(Post))
+
+    def test_session_et_authentification_sur_la_base_principale(self):
+        with routage.utiliser_replique():
+            for modele in (get_user_model(), Group, Session):
+                with self.subTest(modele=modele.__name__):
+                    self.assertIsNone(self.routeur.db_for_read(modele))
+
+    def test_selection_par_replique_vues(self):
+        self.assertTrue(self.requete('get', 'pages:blog')[0])
+        self.assertFalse(self.requete('get', 'pages:home')[0])
+        self.assertFalse(self.requete('get', 'academique:filieres_list_public')[0])
+
+    def test_requetes_d_ecriture_sur_la_base_principale(self):
+        for methode in ('post', 'put', 'delete'):
+            with self.subTest(methode=methode):
+                self.assertFalse(self.requete(methode, 'pages:blog')[0])
+
+    def test_epinglage_apres_un_post(self):
+        session = self.session()
+        self.assertTrue(self.requete('get', 'pages:blog', session)[0])
+
+        self.requete('post', 'pages:blog', session)
+        self.assertFalse(self.requete('get', 'pages:blog', session)[0])
+
+        with mock.patch.object(routage.time, 'time', return_value=time.time() + 16):
+            self.assertTrue(self.requete('get', 'pages:blog', session)[0])
+
+    def test_pas_de_session_creee_pour_un_anonyme(self):
+        _, cookie = self.requete('post', 'pages:blog')
+        self.assertIsNone(cookie)
+        self.assertTrue(self.requete('get', 'pages:blog')[0])
+
+    def test_sans_replique_configure(self):
+        with mock.patch.object(routage, 'alias_replique', return_value=None):
+            self.assertFalse(self.requete('get', 'pages:blog')[0])
+
+
+@skipUnless('replica' in settings.DATABASES, "réplica non configuré (DB_REPLICA_SQLITE)")
+class RepliqueMiroirTests(TransactionTestCase):
+    """
+    Bout en bout sur le réplica de test (TEST MIRROR de `default`, connexion distincte).
+    TransactionTestCase : le réplica ne voit que les données validées.
+    """
+
+    # Sans réplica, la classe est ignorée : l'alias ne doit pas être réclamé au lanceur de tests
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def test_utilisateur_connecte_lu_sur_la_base_principale(self):
+        admin = get_user_model().objects.create_user('admin-replique', role='ADMIN')
+        self.client.force_login(admin)
+
+        with CaptureQueriesContext(connections['default']) as principale, \
+                CaptureQueriesContext(connections['replica']) as replique:
+            response = self.client.get(reverse('administration:statistics'))
+
+        self.assertEqual(response.status_code, 200)
+        # Rapport lu sur le réplica ; session et utilisateur de la requête sur la principale
+        self.assertTrue(replique.captured_queries)
+        sql_replique = ' '.join(q['sql'] for q in replique)
+        self.assertNotIn('"django_session"', sql_replique)
+        self.assertNotIn('FROM "users_user" WHERE "users_user"."id" =', sql_replique)
+        sql_principale = ' '.join(q['sql'] for q in principale)
+        self.assertIn('FROM "users_user" WHERE "users_user"."id" =', sql_principale)
+
+
+@override_settings(PROFILAGE_SEUIL_DOUBLONS=3, PROFILAGE_SEUIL_LENT_MS=60000)
+class ProfilingMiddlewareTests(TestCase):
+    """En-tête Server-Timing et détection des requêtes N+1"""
+
+    def middleware(self, nombre):
+        def vue(request):
+            for i in range(nombre):
+                list(get_user_model().objects.filter(pk=i))
+            return HttpResponse()
+
+        return ProfilingMiddleware(vue)
+
+    def test_en_tete_server_timing(self):
+        request = RequestFactory().get('/')
+        response = self.middleware(2)(request)
+
+        self.assertRegex(
+            response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="2 requetes SQL"$'
+        )
+        self.assertEqual(request.profil.nombre_requetes, 2)
+
+    def test_n_plus_un_signale_a_partir_du_seuil(self):
+        with self.assertNoLogs('administration.profilage'):
+            self.middleware(2)(RequestFactory().get('/'))
+
+        with self.assertLogs('administration.profilage', 'WARNING') as journal:
+            self.middleware(3)(RequestFactory().get('/liste/'))
+        self.assertIn('n_plus_un=3', journal.output[0])
+        self.assertIn('chemin="/liste/"', journal.output[0])
+        self.assertIn('sql="SELECT "users_user"', journal.output[0])
+
+
+class CompteursGlobauxTests(TestCase):
+    """Compteurs de l'administration : mémo par requête, cache versionné invalidé par PageBlock"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def lire(self):
+        request = RequestFactory().get('/')
+        valeurs = compteurs(request)
+        return valeurs['total_blocks'], valeurs['active_blocks']
+
+    def test_calcul_unique_par_requete_puis_cache(self):
+        request = RequestFactory().get('/')
+        with self.assertNumQueries(1):
+            self.assertIs(compteurs(request), compteurs(request))
+            self.assertEqual(compteurs(request)['total_blocks'], 0)
+            self.assertEqual(compteurs(request)['active_blocks'], 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lire(), (0, 0))
+
+    def test_nouvelle_version_a_chaque_modification(self):
+        self.assertEqual(self.lire(), (0, 0))
+        avant = version()
+
+        bloc = PageBlock.objects.create(title='Bloc', status='active')
+        self.assertEqual(version(), avant + 1)
+        self.assertEqual(self.lire(), (1, 1))
+
+        bloc.status = 'inactive'
+        bloc.save()
+        self.assertEqual(self.lire(), (1, 0))
+
+        bloc.delete()
+        self.assertEqual(self.lire(), (0, 0))
+
+    def test_version_perdue_par_le_cache(self):
+        self.assertEqual(self.lire(), (0, 0))
+        cache.delete(CLE_VERSION)
+
+        PageBlock.objects.create(title='Bloc', status='active')
+        self.assertEqual(self.lire(), (1, 1))
+
+
+class MediaAsynchroneTests(TestCase):
+    """Vue asynchrone des fichiers de MEDIA_ROOT : plages, cache HTTP, chemins refusés"""
+
+    CONTENU = b'0123456789' * 100
+
+    def setUp(self):
+        self.racine = tempfile.mkdtemp()
+        self.media = os.path.join(self.racine, 'media')
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        os.makedirs(os.path.join(self.media, 'blog', 'documents'))
+        with open(os.path.join(self.media, 'blog', 'documents', 'guide.pdf'), 'wb') as f:
+            f.write(self.CONTENU)
+        self.url = '/media/blog/documents/guide.pdf'
+
+    @staticmethod
+    async def corps(response):
+        return b''.join([bloc async for bloc in response.streaming_content])
+
+    async def test_fichier_entier(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Length'], str(len(self.CONTENU)))
+        self.assertEqual(await self.corps(response), self.CONTENU)
+        self.assertNotIn('Cache-Control', response)
+
+    async def test_plages(self):
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.CONTENU)}')
+        self.assertEqual(await self.corps(response), b'0123456789')
+
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(await self.corps(response), b'56789')
+
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=5000-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.CONTENU)}')
+
+    async def test_non_modifie(self):
+        response = await self.async_client.get(self.url)
+        response = await self.async_client.get(
+            self.url, headers={'If-Modified-Since': response['Last-Modified']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_chemins_refuses(self):
+        with open(os.path.join(self.racine, 'secret.txt'), 'w') as f:
+            f.write('hors de MEDIA_ROOT')
+        for chemin in ('/media/absent.pdf', '/media/blog/documents/', '/media/../secret.txt',
+                       '/media/blog/../../secret.txt', '/media//etc/passwd'):
+            with self.subTest(chemin=chemin):
+                response = await self.async_client.get(chemin)
+                self.assertEqual(response.status_code, 404)
+
+    async def test_fichier_adresse_par_contenu_immuable(self):
+        nom = await sync_to_async(default_storage.save)('blog/documents/guide.pdf', ContentFile(self.CONTENU))
+
+        response = await self.async_client.get(f'/media/{nom}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+
+class SanteTests(TestCase):
+    """Sonde /sante du healthcheck Docker"""
+
+    def test_base_joignable(self):
+        response = self.client.get(reverse('sante'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['base'], 'ok')
+
+    def test_base_indisponible(self):
+        with mock.patch.object(connection, 'cursor', side_effect=DatabaseError('connexion refusée')):
+            response = sante_view(RequestFactory().get('/sante'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)['base'], 'indisponible')
+
+    def test_etat_du_pool(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {'pool_min': 2, 'pool_max': 10, 'pool_size': 3, 'pool_available': 1}
+        with mock.patch.object(connection, 'pool', pool, create=True):
+            response = self.client.get(reverse('sante'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pool'], {
+            'pool_min': 2, 'pool_max': 10, 'pool_size': 3, 'pool_available': 1,
+            'requests_waiting': 0, 'connections_errors': 0,
+        })
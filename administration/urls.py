@@ -26,6 +26,11 @@ urlpatterns = [
     path('blog/nouveau/', views.blog_create, name='blog_create'),
     path('blog/<int:post_id>/modifier/', views.blog_edit, name='blog_edit'),
     path('blog/<int:post_id>/supprimer/', views.blog_delete, name='blog_delete'),
+
+    # Téléversements fragmentés (vidéos)
+    path('televersements/', views.televersement_creer, name='televersement_creer'),
+    path('televersements/<uuid:televersement_id>/', views.televersement_fragment, name='televersement_fragment'),
+    path('televersements/<uuid:televersement_id>/terminer/', views.televersement_terminer, name='televersement_terminer'),
     
     # Commentaires
     path('blog/commentaires/', views.blog_comments, name='blog_comments'),
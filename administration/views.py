@@ -2,23 +2,148 @@
 from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import (
+    Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse, StreamingHttpResponse,
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
-from django.db import models
+from django.db.models.functions import TruncDate
+from django.db import DatabaseError, connection, models, transaction
 from django.urls import reverse_lazy
+import hmac
+import ipaddress
 import json
+import mimetypes
+import os
+import re
+import stat
 from datetime import timedelta
 from django.utils import timezone
 from notifications.services import NotificationService
 from users.decorators import admin_required, role_required
+from .pagination import paginer
+from .asynchrone import flux_fichier
+from .metrics import metriques
+from .stockage import PREFIXE_CAS
+from .televersements import PositionInvalide, TeleversementErreur, TeleversementService
 
 from pages.models import Post, Category, PostImage, PostDocument, Comment, Project
 from pages.forms import PostForm, PostImageFormSet, PostDocumentFormSet
 
 
 
+def _scraper_autorise(request):
+    """
+    Scraper Prometheus reconnu par son jeton (Authorization: Bearer METRIQUES_JETON) ou
+    par une adresse de METRIQUES_IPS_AUTORISEES. L'adresse locale n'est pas acceptée
+    d'office : derrière un proxy qui ne transmet pas l'adresse du client, tout le monde
+    semble venir de 127.0.0.1.
+    """
+    jeton = getattr(settings, 'METRIQUES_JETON', '')
+    autorisation = request.META.get('HTTP_AUTHORIZATION', '')
+    if jeton and autorisation.startswith('Bearer ') and hmac.compare_digest(
+        autorisation[len('Bearer '):].strip().encode(), jeton.encode()
+    ):
+        return True
+
+    try:
+        adresse = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    for reseau in getattr(settings, 'METRIQUES_IPS_AUTORISEES', []):
+        try:
+            if adresse in ipaddress.ip_network(reseau, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def metrics_view(request):
+    """Métriques au format Prometheus (administrateurs ou scraper autorisé uniquement)"""
+    est_admin = request.user.is_authenticated and request.user.role == 'ADMIN'
+    if not est_admin and not _scraper_autorise(request):
+        return HttpResponseForbidden("Accès réservé")
+    return HttpResponse(metriques.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def sante_view(request):
+    """
+    Sonde de santé du worker (Docker, répartiteur de charge) : base joignable et,
+    avec le pool psycopg 3, son état. 503 si la base ne répond pas.
+    """
+    etat = {'base': 'ok'}
+    statut = 200
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        etat['base'] = 'indisponible'
+        statut = 503
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats = pool.get_stats()
+        etat['pool'] = {
+            cle: stats.get(cle, 0)
+            for cle in ('pool_min', 'pool_max', 'pool_size', 'pool_available', 'requests_waiting', 'connections_errors')
+        }
+    return JsonResponse(etat, status=statut)
+
+
+async def media_view(request, path):
+    """
+    Fichiers de MEDIA_ROOT, lus par blocs sans bloquer la boucle d'événements.
+    Gère If-Modified-Since et les requêtes Range (lecture et avance rapide des vidéos).
+    """
+    try:
+        chemin = safe_join(settings.MEDIA_ROOT, path)
+        statistiques = os.stat(chemin)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+        raise Http404("Fichier introuvable")
+    if not stat.S_ISREG(statistiques.st_mode):
+        raise Http404("Fichier introuvable")
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), statistiques.st_mtime):
+        return HttpResponseNotModified()
+
+    taille = statistiques.st_size
+    debut, fin, statut = 0, taille - 1, 200
+    plage = re.fullmatch(r'bytes=(\d*)-(\d*)', request.headers.get('Range', '').strip())
+    if plage and taille and any(plage.groups()):
+        premier, dernier = plage.groups()
+        if premier:
+            debut, fin = int(premier), min(int(dernier), taille - 1) if dernier else taille - 1
+        else:
+            # bytes=-N : les N derniers octets
+            debut = max(taille - int(dernier), 0)
+        if debut > fin:
+            return HttpResponse(status=416, headers={'Content-Range': f'bytes */{taille}'})
+        statut = 206
+
+    content_type, encoding = mimetypes.guess_type(chemin)
+    response = StreamingHttpResponse(
+        flux_fichier(request, chemin, debut, fin - debut + 1),
+        status=statut,
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Content-Length'] = str(max(fin - debut + 1, 0))
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(statistiques.st_mtime)
+    if statut == 206:
+        response['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if path.startswith(PREFIXE_CAS + '/'):
+        # Nom = empreinte du contenu : le fichier ne change jamais
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 @admin_required
 def dashboard_view(request):
     """Dashboard administration centré sur l'académique"""
@@ -27,25 +152,36 @@ def dashboard_view(request):
     
     user_model = get_user_model()
     
-    # Statistiques utilisateurs
-    user_stats = {
-        'total_users': user_model.objects.count(),
-        'admin_count': user_model.objects.filter(role='ADMIN').count(),
-        'etudiant_count': user_model.objects.filter(role='ETUDIANT').count(),
-        'visiteur_count': user_model.objects.filter(role='VISITEUR').count(),
-        'active_users': user_model.objects.filter(is_active=True).count(),
-    }
+    # Statistiques utilisateurs (une requête agrégée)
+    user_stats = user_model.objects.aggregate(
+        total_users=Count('id'),
+        admin_count=Count('id', filter=Q(role='ADMIN')),
+        etudiant_count=Count('id', filter=Q(role='ETUDIANT')),
+        visiteur_count=Count('id', filter=Q(role='VISITEUR')),
+        active_users=Count('id', filter=Q(is_active=True)),
+    )
+    
+    # Filières avec leurs effectifs, en une requête : sert aux totaux, au top 5 et aux statistiques par filière
+    filieres = list(Filiere.objects.annotate(
+        nb_etudiants=Count('etudiants'),
+        nb_en_attente=Count('etudiants', filter=Q(etudiants__statut_validation='en_attente')),
+        nb_valides=Count('etudiants', filter=Q(etudiants__statut_validation='valide')),
+    ).order_by('nom'))
     
     # Statistiques académiques principales
     academic_stats = {
-        'total_filieres': Filiere.objects.count(),
-        'filieres_actives': Filiere.objects.filter(statut='active').count(),
-        'total_etudiants': EtudiantAcademique.objects.count(),
-        'etudiants_en_attente': EtudiantAcademique.objects.filter(statut_validation='en_attente').count(),
-        'etudiants_valides': EtudiantAcademique.objects.filter(statut_validation='valide').count(),
-        'etudiants_rejetes': EtudiantAcademique.objects.filter(statut_validation='rejete').count(),
-        'documents_en_attente': DocumentEtudiant.objects.filter(valide=False).count(),
-        'documents_valides': DocumentEtudiant.objects.filter(valide=True).count(),
+        'total_filieres': len(filieres),
+        'filieres_actives': sum(1 for f in filieres if f.statut == 'active'),
+        **EtudiantAcademique.objects.aggregate(
+            total_etudiants=Count('id'),
+            etudiants_en_attente=Count('id', filter=Q(statut_validation='en_attente')),
+            etudiants_valides=Count('id', filter=Q(statut_validation='valide')),
+            etudiants_rejetes=Count('id', filter=Q(statut_validation='rejete')),
+        ),
+        **DocumentEtudiant.objects.aggregate(
+            documents_en_attente=Count('id', filter=Q(valide=False)),
+            documents_valides=Count('id', filter=Q(valide=True)),
+        ),
         'taux_validation': 0
     }
     
@@ -68,23 +204,25 @@ def dashboard_view(request):
         request.session['docs_reminder_sent'] = True
     
     # Top filières par étudiants
-    top_filieres = Filiere.objects.annotate(
-        nb_etudiants=Count('etudiants')
-    ).order_by('-nb_etudiants')[:5]
+    top_filieres = sorted(filieres, key=lambda f: -f.nb_etudiants)[:5]
     
-    # Évolution inscriptions (7 derniers jours)
+    # Évolution inscriptions (7 derniers jours), regroupées par jour en une requête
     today = timezone.now().date()
     week_ago = today - timedelta(days=7)
     
+    par_jour = dict(
+        EtudiantAcademique.objects.filter(
+            date_inscription__date__gte=week_ago, date_inscription__date__lt=today
+        ).annotate(jour=TruncDate('date_inscription')).values('jour').annotate(
+            count=Count('id')
+        ).values_list('jour', 'count')
+    )
     inscriptions_semaine = []
     for i in range(7):
         date = week_ago + timedelta(days=i)
-        count = EtudiantAcademique.objects.filter(
-            date_inscription__date=date
-        ).count()
         inscriptions_semaine.append({
             'date': date.strftime('%d/%m'),
-            'count': count
+            'count': par_jour.get(date, 0)
         })
     
     # Derniers étudiants inscrits
@@ -97,16 +235,17 @@ def dashboard_view(request):
         'etudiant', 'etudiant__filiere'
     ).order_by('-date_upload')[:10]
     
-    # Statistiques par filière
-    filieres_stats = []
-    for filiere in Filiere.objects.filter(statut='active'):
-        filieres_stats.append({
+    # Statistiques par filière (effectifs déjà annotés)
+    filieres_stats = [
+        {
             'filiere': filiere,
-            'etudiants': filiere.etudiants.count(),
-            'en_attente': filiere.etudiants.filter(statut_validation='en_attente').count(),
-            'valides': filiere.etudiants.filter(statut_validation='valide').count(),
+            'etudiants': filiere.nb_etudiants,
+            'en_attente': filiere.nb_en_attente,
+            'valides': filiere.nb_valides,
             'taux_occupation': filiere.taux_occupation,
-        })
+        }
+        for filiere in filieres if filiere.statut == 'active'
+    ]
     
     context = {
         'user_stats': user_stats,
@@ -127,9 +266,15 @@ def academic_overview(request):
     """Vue d'ensemble académique détaillée"""
     from academique.models import Filiere, EtudiantAcademique, DocumentEtudiant
     
+    from academique.dossiers import ETAT_DOSSIER_CHOICES, TRI_CHOICES, TRIS_ETUDIANTS, filtrer_dossiers
+    
     # Filtres
     filiere_filter = request.GET.get('filiere')
     statut_filter = request.GET.get('statut')
+    dossier_filter = request.GET.get('dossier')
+    tri = request.GET.get('tri')
+    if tri not in TRIS_ETUDIANTS:
+        tri = 'recents'
     
     etudiants = EtudiantAcademique.objects.select_related('filiere', 'user')
     
@@ -137,11 +282,11 @@ def academic_overview(request):
         etudiants = etudiants.filter(filiere_id=filiere_filter)
     if statut_filter:
         etudiants = etudiants.filter(statut_validation=statut_filter)
+    # État du dossier : colonnes dénormalisées, sans sous-requête sur les documents
+    etudiants = filtrer_dossiers(etudiants, dossier_filter)
     
     # Pagination
-    paginator = Paginator(etudiants.order_by('-date_inscription'), 20)
-    page = request.GET.get('page')
-    etudiants = paginator.get_page(page)
+    etudiants = paginer(request, etudiants, TRIS_ETUDIANTS[tri], 20)
     
     context = {
         'etudiants': etudiants,
@@ -149,8 +294,12 @@ def academic_overview(request):
         'current_filters': {
             'filiere': filiere_filter,
             'statut': statut_filter,
+            'dossier': dossier_filter,
+            'tri': tri,
         },
         'statut_choices': EtudiantAcademique.STATUT_VALIDATION_CHOICES,
+        'dossier_choices': ETAT_DOSSIER_CHOICES,
+        'tri_choices': TRI_CHOICES,
     }
     
     return render(request, 'administration/academic_overview.html', context)
@@ -176,9 +325,7 @@ def documents_validation(request):
         documents = documents.filter(etudiant__filiere_id=filiere_filter)
     
     # Pagination
-    paginator = Paginator(documents, 20)
-    page = request.GET.get('page')
-    documents = paginator.get_page(page)
+    documents = paginer(request, documents, ('-date_upload', 'id'), 20)
     
     context = {
         'documents': documents,
@@ -394,7 +541,24 @@ def blog_management(request):
     })
 
 
+def _attacher_video_televersee(request, form):
+    """
+    Attache à l'article (form.instance) la vidéo envoyée par fragments, le cas échéant.
+    Les vues appelantes sont atomiques : le téléversement n'est supprimé qu'une fois l'article enregistré.
+    """
+    televersement_id = form.cleaned_data.get('video_televersement')
+    if not televersement_id:
+        return True
+    try:
+        TeleversementService.attacher(televersement_id, request.user, form.instance, 'post_video')
+    except TeleversementErreur as e:
+        form.add_error(None, f"Vidéo : {e}")
+        return False
+    return True
+
+
 @admin_required
+@transaction.atomic
 def blog_create(request):
     """Créer un nouvel article"""
     if request.method == 'POST':
@@ -402,7 +566,8 @@ def blog_create(request):
         image_formset = PostImageFormSet(request.POST, request.FILES)
         document_formset = PostDocumentFormSet(request.POST, request.FILES)
         
-        if form.is_valid() and image_formset.is_valid() and document_formset.is_valid():
+        if form.is_valid() and image_formset.is_valid() and document_formset.is_valid() \
+                and _attacher_video_televersee(request, form):
             post = form.save(commit=False)
             post.author = request.user
             
@@ -436,6 +601,7 @@ def blog_create(request):
 
 
 @admin_required
+@transaction.atomic
 def blog_edit(request, post_id):
     """Modifier un article existant"""
     post = get_object_or_404(Post, id=post_id)
@@ -445,7 +611,8 @@ def blog_edit(request, post_id):
         image_formset = PostImageFormSet(request.POST, request.FILES, instance=post)
         document_formset = PostDocumentFormSet(request.POST, request.FILES, instance=post)
         
-        if form.is_valid() and image_formset.is_valid() and document_formset.is_valid():
+        if form.is_valid() and image_formset.is_valid() and document_formset.is_valid() \
+                and _attacher_video_televersee(request, form):
             post = form.save(commit=False)
             
             # Mettre à jour la date de publication
@@ -498,9 +665,7 @@ def blog_comments(request):
     elif status == 'approved':
         comments = comments.filter(is_approved=True)
     
-    paginator = Paginator(comments, 30)
-    page = request.GET.get('page')
-    comments_page = paginator.get_page(page)
+    comments_page = paginer(request, comments, ('-created_at', 'id'), 30)
     
     stats = {
         'total': Comment.objects.count(),
@@ -534,6 +699,70 @@ def comment_delete(request, comment_id):
     return redirect('administration:blog_comments')
 
 
+# ============================================
+# TÉLÉVERSEMENTS FRAGMENTÉS (vidéos volumineuses)
+# ============================================
+
+@admin_required
+@require_http_methods(["POST"])
+def televersement_creer(request):
+    """Ouvre une session de téléversement fragmenté : {cible, nom, taille}"""
+    try:
+        donnees = json.loads(request.body or b'{}')
+        televersement = TeleversementService.creer(
+            request.user, donnees.get('cible'), donnees.get('nom'), donnees.get('taille')
+        )
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Requête invalide'}, status=400)
+    except TeleversementErreur as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.statut)
+    return JsonResponse({'success': True, **TeleversementService.etat(televersement)}, status=201)
+
+
+@admin_required
+@require_http_methods(["GET", "PUT"])
+def televersement_fragment(request, televersement_id):
+    """
+    GET : position atteinte (reprise après coupure).
+    PUT : fragment brut, en-têtes Upload-Offset et X-Chunk-Sha256.
+    """
+    try:
+        televersement = TeleversementService.obtenir(televersement_id, request.user)
+        if request.method == 'PUT':
+            TeleversementService.recevoir_fragment(
+                televersement,
+                position=int(request.headers.get('Upload-Offset', '')),
+                longueur=int(request.META.get('CONTENT_LENGTH') or 0),
+                empreinte=request.headers.get('X-Chunk-Sha256', ''),
+                flux=request,
+            )
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'En-tête Upload-Offset invalide'}, status=400)
+    except PositionInvalide as e:
+        return JsonResponse({'success': False, 'error': str(e), 'recu': e.attendue}, status=e.statut)
+    except TeleversementErreur as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.statut)
+    return JsonResponse({'success': True, **TeleversementService.etat(televersement)})
+
+
+@admin_required
+@require_http_methods(["POST"])
+def televersement_terminer(request, televersement_id):
+    """Clôt le téléversement : {empreinte (SHA-256 du fichier, facultative), objet_id (facultatif)}"""
+    try:
+        donnees = json.loads(request.body or b'{}')
+        televersement = TeleversementService.obtenir(televersement_id, request.user)
+        TeleversementService.terminer(televersement, donnees.get('empreinte'))
+        if donnees.get('objet_id'):
+            instance = TeleversementService.attacher_objet(televersement, donnees['objet_id'])
+            return JsonResponse({'success': True, 'statut': 'attache', 'objet_id': instance.pk})
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Requête invalide'}, status=400)
+    except TeleversementErreur as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.statut)
+    return JsonResponse({'success': True, **TeleversementService.etat(televersement)})
+
+
 # ============================================
 # GESTION CATÉGORIES
 # ============================================
@@ -1,3 +1,106 @@
-from django.contrib import admin
+# concours/admin.py
+from django.contrib import admin, messages
+from .models import SessionConcours, Matiere, Candidat, Note, VoeuCandidat, ListeAttente
+from .classement import ClassementService
+from .affectation import AffectationService
 
-# Register your models here.
+
+class MatiereInline(admin.TabularInline):
+    model = Matiere
+    extra = 0
+    fields = ['code', 'nom', 'coefficient', 'note_eliminatoire', 'ordre']
+
+
+@admin.register(SessionConcours)
+class SessionConcoursAdmin(admin.ModelAdmin):
+    list_display = ['nom', 'annee', 'date_epreuves', 'moyenne_admission', 'statut', 'date_classement']
+    list_filter = ['statut', 'annee']
+    search_fields = ['nom']
+    readonly_fields = ['date_classement']
+    inlines = [MatiereInline]
+    
+    actions = ['calculer_classement', 'affecter_places', 'preinscrire_affectes']
+    
+    def calculer_classement(self, request, queryset):
+        for session in queryset:
+            try:
+                stats = ClassementService.classer_session(session)
+            except ValueError as e:
+                self.message_user(request, f'{session} : {e}', level=messages.ERROR)
+                continue
+            self.message_user(
+                request,
+                f"{session} : {stats['candidats']} candidat(s) classé(s), "
+                f"{stats['admissibles']} admissible(s), {stats['elimines']} éliminé(s)."
+            )
+    calculer_classement.short_description = "Calculer le classement des sessions sélectionnées"
+    
+    def affecter_places(self, request, queryset):
+        for session in queryset:
+            stats = AffectationService.affecter_session(session)
+            self.message_user(
+                request,
+                f"{session} : {stats['affectes']} candidat(s) affecté(s), "
+                f"{stats['non_affectes']} sans place, {stats['en_attente']} inscription(s) en liste d'attente."
+            )
+    affecter_places.short_description = "Affecter les admissibles dans les filières"
+    
+    def preinscrire_affectes(self, request, queryset):
+        for session in queryset:
+            stats = AffectationService.preinscrire(session)
+            self.message_user(
+                request,
+                f"{session} : {stats['preinscrits']} pré-inscription(s) créée(s), "
+                f"{stats['ignores']} candidat(s) ignoré(s) (CNI ou date de naissance manquante, CNI déjà inscrite)."
+            )
+    preinscrire_affectes.short_description = "Créer les pré-inscriptions des candidats affectés"
+
+
+class VoeuCandidatInline(admin.TabularInline):
+    model = VoeuCandidat
+    extra = 0
+    fields = ['ordre', 'filiere']
+
+
+@admin.register(Candidat)
+class CandidatAdmin(admin.ModelAdmin):
+    list_display = [
+        'numero', 'nom', 'prenoms', 'session', 'domaine', 'moyenne', 'rang',
+        'resultat', 'filiere_affectee', 'voeu_obtenu', 'desiste'
+    ]
+    list_filter = ['session', 'resultat', 'domaine', 'elimine', 'desiste', 'filiere_affectee']
+    search_fields = ['numero', 'nom', 'prenoms', 'cni']
+    list_select_related = ['session', 'filiere_affectee']
+    readonly_fields = [
+        'moyenne', 'rang', 'elimine', 'resultat', 'filiere_affectee',
+        'voeu_obtenu', 'desiste', 'etudiant', 'date_inscription'
+    ]
+    raw_id_fields = ['user']
+    inlines = [VoeuCandidatInline]
+    
+    actions = ['enregistrer_desistement']
+    
+    def enregistrer_desistement(self, request, queryset):
+        total = 0
+        for candidat in queryset:
+            mouvements = AffectationService.desister(candidat)
+            total += len(mouvements)
+        self.message_user(request, f'Désistement(s) enregistré(s) : {total} candidat(s) remonté(s) depuis les listes d\'attente.')
+    enregistrer_desistement.short_description = "Enregistrer le désistement des candidats sélectionnés"
+
+
+@admin.register(ListeAttente)
+class ListeAttenteAdmin(admin.ModelAdmin):
+    list_display = ['filiere', 'rang', 'candidat', 'ordre_voeu', 'session']
+    list_filter = ['session', 'filiere']
+    search_fields = ['candidat__numero', 'candidat__nom']
+    list_select_related = ['filiere', 'candidat', 'session']
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ['candidat', 'matiere', 'valeur']
+    list_filter = ['matiere__session', 'matiere']
+    search_fields = ['candidat__numero', 'candidat__nom']
+    list_select_related = ['candidat', 'matiere']
+    raw_id_fields = ['candidat']
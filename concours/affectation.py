@@ -0,0 +1,333 @@
+# concours/affectation.py
+"""
+Affectation des candidats admissibles dans les filières.
+
+Tous les établissements classant les candidats dans le même ordre (le rang
+du concours), l'acceptation différée se réduit à une dictature séquentielle :
+les candidats sont servis par rang croissant et obtiennent leur premier vœu
+encore ouvert et compatible avec leur domaine. Un passage suffit, en
+O(candidats × vœux).
+
+Un candidat est placé sur la liste d'attente de chaque vœu complet qu'il
+préfère à celui obtenu. Lors d'un désistement, la place libérée revient à la
+tête de la liste d'attente, qui libère à son tour sa place précédente :
+seule la chaîne de places vacantes est recalculée.
+"""
+import logging
+from collections import Counter, defaultdict, deque
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from academique.models import EtudiantAcademique, Filiere
+from academique.search import RechercheService
+from users.roles import ajouter_au_groupe
+from .models import Candidat, ListeAttente, VoeuCandidat
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+TAILLE_LOT = 2000
+
+
+def domaine_compatible(filiere_domaine, candidat_domaine):
+    return filiere_domaine == 'tous' or filiere_domaine == candidat_domaine
+
+
+def affecter(candidats, voeux, capacites, domaines):
+    """
+    Dictature séquentielle pure (sans base de données).
+
+    candidats : [(id, rang, domaine)] déjà triés par rang
+    voeux : {candidat_id: [(filiere_id, ordre), ...]} triés par ordre
+    capacites : {filiere_id: places libres} (modifié en place)
+    domaines : {filiere_id: domaine_requis}
+    Retourne ({candidat_id: (filiere_id, ordre)}, [(filiere_id, candidat_id, ordre, rang)]).
+    """
+    affectations = {}
+    attentes = []
+    for candidat_id, rang, domaine in candidats:
+        refusees = []
+        for filiere_id, ordre in voeux.get(candidat_id, ()):
+            if filiere_id not in capacites or not domaine_compatible(domaines[filiere_id], domaine):
+                continue
+            if capacites[filiere_id] > 0:
+                capacites[filiere_id] -= 1
+                affectations[candidat_id] = (filiere_id, ordre)
+                break
+            refusees.append((filiere_id, candidat_id, ordre, rang))
+        attentes.extend(refusees)
+    return affectations, attentes
+
+
+class AffectationService:
+    """Affectation, désistements et pré-inscriptions d'une session de concours"""
+
+    @staticmethod
+    def places_libres():
+        """Places libres par filière active (les pré-inscrits sont déjà dans places_occupees)"""
+        filieres = Filiere.objects.filter(statut='active').values_list(
+            'id', 'places_disponibles', 'places_occupees', 'domaine_requis'
+        )
+        capacites = {}
+        domaines = {}
+        for filiere_id, disponibles, occupees, domaine in filieres:
+            capacites[filiere_id] = max(disponibles - occupees, 0)
+            domaines[filiere_id] = domaine
+        return capacites, domaines
+
+    @staticmethod
+    def affecter_session(session):
+        """Recalcule toutes les affectations et listes d'attente de la session"""
+        capacites, domaines = AffectationService.places_libres()
+
+        # Les candidats déjà pré-inscrits gardent leur place (comptée dans places_occupees)
+        candidats = list(
+            Candidat.objects.filter(
+                session=session, resultat='admissible', desiste=False, etudiant__isnull=True
+            ).order_by('rang', 'numero').values_list('id', 'rang', 'domaine')
+        )
+
+        voeux = defaultdict(list)
+        for candidat_id, filiere_id, ordre in VoeuCandidat.objects.filter(
+            candidat__session=session, candidat__resultat='admissible',
+            candidat__desiste=False, candidat__etudiant__isnull=True
+        ).order_by('candidat_id', 'ordre').values_list('candidat_id', 'filiere_id', 'ordre').iterator(chunk_size=TAILLE_LOT):
+            voeux[candidat_id].append((filiere_id, ordre))
+
+        affectations, attentes = affecter(candidats, voeux, capacites, domaines)
+
+        with transaction.atomic():
+            Candidat.objects.filter(session=session, etudiant__isnull=True).exclude(
+                filiere_affectee__isnull=True, voeu_obtenu__isnull=True
+            ).update(filiere_affectee=None, voeu_obtenu=None)
+
+            # Une requête par (filière, vœu) plutôt qu'une ligne par candidat
+            groupes = defaultdict(list)
+            for candidat_id, cle in affectations.items():
+                groupes[cle].append(candidat_id)
+            for (filiere_id, ordre), ids in groupes.items():
+                for i in range(0, len(ids), TAILLE_LOT):
+                    Candidat.objects.filter(id__in=ids[i:i + TAILLE_LOT]).update(
+                        filiere_affectee_id=filiere_id, voeu_obtenu=ordre
+                    )
+
+            ListeAttente.objects.filter(session=session).delete()
+            ListeAttente.objects.bulk_create([
+                ListeAttente(session=session, filiere_id=filiere_id, candidat_id=candidat_id, ordre_voeu=ordre, rang=rang)
+                for filiere_id, candidat_id, ordre, rang in attentes
+            ], batch_size=TAILLE_LOT)
+
+        stats = {
+            'candidats': len(candidats),
+            'affectes': len(affectations),
+            'non_affectes': len(candidats) - len(affectations),
+            'en_attente': len(attentes),
+        }
+        logger.info(f"Affectation de la session #{session.pk} : {stats}")
+        return stats
+
+    @staticmethod
+    @transaction.atomic
+    def desister(candidat):
+        """
+        Retire un candidat et propage la place libérée le long des listes d'attente.
+        Retourne la liste des mouvements [(candidat, ancienne filière, nouvelle filière)].
+        """
+        candidat = Candidat.objects.select_for_update().select_related('etudiant').get(pk=candidat.pk)
+        if candidat.desiste:
+            return []
+
+        vacantes = deque()
+        if candidat.filiere_affectee_id:
+            vacantes.append(candidat.filiere_affectee_id)
+        if candidat.etudiant_id:
+            etudiant = candidat.etudiant
+            etudiant.statut_inscription = 'annule'
+            etudiant.save(update_fields=['statut_inscription'])
+            Filiere.objects.filter(pk=etudiant.filiere_id, places_occupees__gt=0).update(
+                places_occupees=F('places_occupees') - 1
+            )
+
+        candidat.desiste = True
+        candidat.filiere_affectee = None
+        candidat.voeu_obtenu = None
+        candidat.save(update_fields=['desiste', 'filiere_affectee', 'voeu_obtenu'])
+        ListeAttente.objects.filter(candidat=candidat).delete()
+
+        mouvements = []
+        while vacantes:
+            filiere_id = vacantes.popleft()
+            tete = ListeAttente.objects.filter(
+                session_id=candidat.session_id, filiere_id=filiere_id
+            ).select_related('candidat').order_by('rang', 'candidat__numero').first()
+            if tete is None:
+                continue
+
+            suivant = tete.candidat
+            ancienne = suivant.filiere_affectee_id
+            suivant.filiere_affectee_id = filiere_id
+            suivant.voeu_obtenu = tete.ordre_voeu
+            suivant.save(update_fields=['filiere_affectee', 'voeu_obtenu'])
+
+            # Il ne reste en attente que sur les vœux qu'il préfère encore
+            ListeAttente.objects.filter(candidat=suivant, ordre_voeu__gte=tete.ordre_voeu).delete()
+
+            if suivant.etudiant_id:
+                EtudiantAcademique.objects.filter(pk=suivant.etudiant_id).update(filiere_id=filiere_id)
+                Filiere.objects.filter(pk=filiere_id).update(places_occupees=F('places_occupees') + 1)
+                if ancienne:
+                    Filiere.objects.filter(pk=ancienne, places_occupees__gt=0).update(
+                        places_occupees=F('places_occupees') - 1
+                    )
+
+            mouvements.append((suivant, ancienne, filiere_id))
+            if ancienne:
+                vacantes.append(ancienne)
+
+        logger.info(f"Désistement du candidat #{candidat.pk} : {len(mouvements)} mouvement(s)")
+        return mouvements
+
+    @staticmethod
+    def preinscrire(session):
+        """
+        Crée en masse les comptes et les EtudiantAcademique des candidats affectés.
+        Les candidats sans CNI ou date de naissance sont ignorés (à compléter avant),
+        de même que ceux dont la CNI est déjà celle d'un étudiant (ancien étudiant
+        qui recandidate, doublon de saisie) : à rattacher à la main.
+        """
+        a_inscrire = list(
+            Candidat.objects.filter(
+                session=session, filiere_affectee__isnull=False, etudiant__isnull=True, desiste=False
+            ).select_related('user', 'filiere_affectee').order_by('rang', 'numero')
+        )
+        complets = [c for c in a_inscrire if c.cni and c.date_naissance]
+
+        # EtudiantAcademique.cni est unique : une seule collision annulerait tout le lot
+        cni_pris = set(
+            EtudiantAcademique.objects.filter(cni__in=[c.cni for c in complets]).values_list('cni', flat=True)
+        )
+        retenus, doublons = [], []
+        for candidat in complets:
+            if candidat.cni in cni_pris:
+                doublons.append(candidat.numero)
+                continue
+            cni_pris.add(candidat.cni)
+            retenus.append(candidat)
+        if doublons:
+            logger.warning(
+                f"Session #{session.pk} : CNI déjà inscrite, candidat(s) ignoré(s) : {', '.join(doublons)}"
+            )
+        complets = retenus
+        ignores = len(a_inscrire) - len(complets)
+        if not complets:
+            return {'preinscrits': 0, 'ignores': ignores}
+
+        with transaction.atomic():
+            AffectationService._creer_comptes(session, complets)
+
+            prefixe = f"IUTESSA-{session.annee}-"
+            suivant = AffectationService.dernier_numero(prefixe) + 1
+
+            etudiants = []
+            for i, candidat in enumerate(complets):
+                etudiants.append(EtudiantAcademique(
+                    user_id=candidat.user_id,
+                    filiere_id=candidat.filiere_affectee_id,
+                    nom=candidat.nom,
+                    prenoms=candidat.prenoms,
+                    date_naissance=candidat.date_naissance,
+                    lieu_naissance='',
+                    region_origine='',
+                    cni=candidat.cni,
+                    telephone=candidat.telephone,
+                    email_personnel=candidat.email,
+                    adresse='',
+                    nom_pere='',
+                    nom_mere='',
+                    diplome_obtenu='',
+                    annee_obtention=session.annee,
+                    numero_matricule=f"{prefixe}{suivant + i:04d}",
+                ))
+            # bulk_create n'appelle pas save() : progression calculée ici
+            for etudiant in etudiants:
+                etudiant.progression = etudiant.calculer_progression()
+            EtudiantAcademique.objects.bulk_create(etudiants, batch_size=TAILLE_LOT)
+
+            matricules = [e.numero_matricule for e in etudiants]
+            par_matricule = dict(
+                EtudiantAcademique.objects.filter(numero_matricule__in=matricules).values_list('numero_matricule', 'id')
+            )
+            for candidat, etudiant in zip(complets, etudiants):
+                candidat.etudiant_id = par_matricule[etudiant.numero_matricule]
+            Candidat.objects.bulk_update(complets, ['etudiant'], batch_size=500)
+
+            for filiere_id, nombre in Counter(c.filiere_affectee_id for c in complets).items():
+                Filiere.objects.filter(pk=filiere_id).update(places_occupees=F('places_occupees') + nombre)
+
+            RechercheService.reconstruire(EtudiantAcademique.objects.filter(id__in=par_matricule.values()))
+
+        return {'preinscrits': len(complets), 'ignores': ignores}
+
+    @staticmethod
+    def dernier_numero(prefixe):
+        """
+        Plus grand numéro des matricules `prefixe`NNNN. Comparé en nombre : au-delà
+        de 9999, '10000' se trie avant '9999' dans l'ordre des chaînes.
+        """
+        suffixes = EtudiantAcademique.objects.filter(
+            numero_matricule__startswith=prefixe
+        ).values_list('numero_matricule', flat=True).iterator(chunk_size=TAILLE_LOT)
+        return max(
+            (int(m[len(prefixe):]) for m in suffixes if m[len(prefixe):].isdigit()),
+            default=0,
+        )
+
+    @staticmethod
+    def _creer_comptes(session, candidats):
+        """Comptes étudiants (sans mot de passe utilisable) pour les candidats qui n'en ont pas"""
+        sans_compte = [c for c in candidats if not c.user_id]
+        if not sans_compte:
+            return
+
+        # Un identifiant déjà pris (compte créé à la main, autre session) reçoit un suffixe
+        # plutôt que de faire échouer tout le lot sur la contrainte d'unicité
+        souhaites = {c.pk: f"c{session.annee}-{c.numero}".lower() for c in sans_compte}
+        pris = set(
+            User.objects.filter(username__in=souhaites.values()).values_list('username', flat=True)
+        )
+        for username in list(pris):
+            pris.update(
+                User.objects.filter(username__startswith=f"{username}-").values_list('username', flat=True)
+            )
+
+        users = []
+        for candidat in sans_compte:
+            username = souhaites[candidat.pk]
+            suffixe = 1
+            while username in pris:
+                suffixe += 1
+                username = f"{souhaites[candidat.pk]}-{suffixe}"
+            pris.add(username)
+            user = User(
+                username=username,
+                email=candidat.email,
+                first_name=candidat.prenoms[:150],
+                last_name=candidat.nom[:150],
+                role='ETUDIANT',
+            )
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=TAILLE_LOT)
+
+        par_username = dict(
+            User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'id')
+        )
+        for candidat, user in zip(sans_compte, users):
+            candidat.user_id = par_username[user.username]
+        Candidat.objects.bulk_update(sans_compte, ['user'], batch_size=500)
+
+        # bulk_create n'envoie pas post_save : groupe ajouté directement dans la table de liaison
+        ajouter_au_groupe('ETUDIANT', par_username.values(), batch_size=TAILLE_LOT)
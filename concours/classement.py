@@ -0,0 +1,179 @@
+# concours/classement.py
+"""
+Moteur de calcul des résultats du concours.
+
+Les notes d'une session sont chargées une fois dans une matrice
+candidats × matières ; moyennes pondérées, éliminations et rangs sont
+ensuite calculés en opérations vectorielles NumPy sur tous les candidats
+à la fois. Seuls les résultats qui changent sont réécrits : regroupés par
+valeurs identiques (un UPDATE ... WHERE id IN par groupe, les moyennes au
+centième ne prenant que quelques milliers de valeurs), le reste avec bulk_update.
+
+Règles :
+- une note absente (ou non saisie) élimine le candidat ;
+- une note strictement inférieure à la note éliminatoire de la matière élimine ;
+- les candidats non éliminés sont classés par moyenne décroissante,
+  les ex æquo partagent le même rang (1, 2, 2, 4...) ;
+- est admissible tout candidat classé dont la moyenne atteint la moyenne d'admission.
+"""
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Candidat, Matiere, Note
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LOT = 2000
+
+
+def calculer_resultats(notes, coefficients, seuils, moyenne_admission):
+    """
+    Calcul vectoriel pur (sans base de données).
+
+    notes : matrice (candidats × matières), NaN pour une note absente
+    coefficients : vecteur (matières)
+    seuils : vecteur (matières), NaN quand la matière n'est pas éliminatoire
+    Retourne (moyennes arrondies au centième, elimines, rangs [0 si éliminé], admissibles).
+    """
+    notes = np.asarray(notes, dtype=np.float64)
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    seuils = np.asarray(seuils, dtype=np.float64)
+
+    absents = np.isnan(notes)
+    sous_seuil = np.less(notes, seuils, where=~absents & ~np.isnan(seuils), out=np.zeros_like(absents))
+    elimines = (absents | sous_seuil).any(axis=1)
+
+    total_coefficients = coefficients.sum()
+    if total_coefficients <= 0:
+        raise ValueError("La somme des coefficients doit être strictement positive")
+    moyennes = np.round(np.nan_to_num(notes) @ coefficients / total_coefficients, 2)
+
+    # Rang = 1 + nombre de candidats classés ayant une moyenne strictement supérieure
+    rangs = np.zeros(len(moyennes), dtype=np.int64)
+    classes = ~elimines
+    if classes.any():
+        moyennes_classees = moyennes[classes]
+        decroissantes = -np.sort(moyennes_classees)[::-1]
+        rangs[classes] = np.searchsorted(decroissantes, -moyennes_classees, side='left') + 1
+
+    admissibles = classes & (moyennes >= float(moyenne_admission))
+    return moyennes, elimines, rangs, admissibles
+
+
+class ClassementService:
+    """Calcul et enregistrement du classement d'une session"""
+
+    @staticmethod
+    def charger_matrice(session):
+        """Retourne (ids des candidats triés, matrice des notes, coefficients, seuils)"""
+        matieres = list(
+            Matiere.objects.filter(session=session).order_by('id').values_list('id', 'coefficient', 'note_eliminatoire')
+        )
+        if not matieres:
+            raise ValueError("La session n'a aucune matière")
+
+        matiere_ids = np.array([m[0] for m in matieres], dtype=np.int64)
+        coefficients = np.array([float(m[1]) for m in matieres], dtype=np.float64)
+        seuils = np.array([np.nan if m[2] is None else float(m[2]) for m in matieres], dtype=np.float64)
+
+        candidat_ids = np.fromiter(
+            Candidat.objects.filter(session=session).order_by('id').values_list('id', flat=True).iterator(chunk_size=TAILLE_LOT),
+            dtype=np.int64
+        )
+
+        notes = np.full((len(candidat_ids), len(matiere_ids)), np.nan)
+        lignes = Note.objects.filter(
+            candidat__session=session, valeur__isnull=False
+        ).annotate(
+            valeur_float=Cast('valeur', FloatField())
+        ).values_list('candidat_id', 'matiere_id', 'valeur_float')
+
+        brut = np.array(list(lignes.iterator(chunk_size=TAILLE_LOT * 5)), dtype=np.float64).reshape(-1, 3)
+        if len(brut):
+            i = np.searchsorted(candidat_ids, brut[:, 0].astype(np.int64))
+            j = np.searchsorted(matiere_ids, brut[:, 1].astype(np.int64))
+            notes[i, j] = brut[:, 2]
+
+        return candidat_ids, notes, coefficients, seuils
+
+    @staticmethod
+    def classer_session(session):
+        """Calcule moyennes, éliminations et rangs de tous les candidats de la session"""
+        debut = time.perf_counter()
+        candidat_ids, notes, coefficients, seuils = ClassementService.charger_matrice(session)
+        chargement = time.perf_counter()
+
+        moyennes, elimines, rangs, admissibles = calculer_resultats(
+            notes, coefficients, seuils, session.moyenne_admission
+        )
+        calcul = time.perf_counter()
+
+        actuels = dict(
+            (cid, (moyenne, rang, elimine, resultat))
+            for cid, moyenne, rang, elimine, resultat in Candidat.objects.filter(
+                session=session
+            ).values_list('id', 'moyenne', 'rang', 'elimine', 'resultat').iterator(chunk_size=TAILLE_LOT)
+        )
+
+        groupes = defaultdict(list)
+        for cid, moyenne, elimine, rang, admissible in zip(
+            candidat_ids.tolist(), moyennes.tolist(), elimines.tolist(), rangs.tolist(), admissibles.tolist()
+        ):
+            if elimine:
+                resultat = 'elimine'
+            elif admissible:
+                resultat = 'admissible'
+            else:
+                resultat = 'non_admis'
+            valeurs = (Decimal(f"{moyenne:.2f}"), rang or None, elimine, resultat)
+            if actuels.get(cid) != valeurs:
+                groupes[valeurs].append(cid)
+
+        with transaction.atomic():
+            modifies = ClassementService._enregistrer_resultats(groupes)
+            session.statut = 'classe'
+            session.date_classement = timezone.now()
+            session.save(update_fields=['statut', 'date_classement', 'updated_at'])
+        fin = time.perf_counter()
+
+        stats = {
+            'candidats': len(candidat_ids),
+            'modifies': modifies,
+            'elimines': int(elimines.sum()),
+            'admissibles': int(admissibles.sum()),
+            'duree_chargement': round(chargement - debut, 3),
+            'duree_calcul': round(calcul - chargement, 3),
+            'duree_enregistrement': round(fin - calcul, 3),
+        }
+        logger.info(f"Classement de la session #{session.pk} : {stats}")
+        return stats
+
+    @staticmethod
+    def _enregistrer_resultats(groupes):
+        """
+        Écrit les résultats modifiés. `groupes` : {(moyenne, rang, elimine, resultat): [ids]}.
+        Un groupe partagé par plusieurs candidats (ex æquo, éliminés de même moyenne) tient en
+        un UPDATE ; les valeurs isolées passent par bulk_update.
+        """
+        champs = ['moyenne', 'rang', 'elimine', 'resultat']
+        isoles = []
+        total = 0
+        for valeurs, ids in groupes.items():
+            total += len(ids)
+            if len(ids) == 1:
+                isoles.append(Candidat(id=ids[0], **dict(zip(champs, valeurs))))
+                continue
+            for i in range(0, len(ids), TAILLE_LOT):
+                Candidat.objects.filter(id__in=ids[i:i + TAILLE_LOT]).update(**dict(zip(champs, valeurs)))
+
+        if isoles:
+            Candidat.objects.bulk_update(isoles, champs, batch_size=500)
+        return total
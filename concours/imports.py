@@ -0,0 +1,249 @@
+# concours/imports.py
+"""
+Import des notes du concours depuis des tableurs (un fichier par matière et par centre).
+
+Chaque fichier est lu par blocs (openpyxl en lecture seule pour les .xlsx,
+pandas par `chunksize` pour les .csv), validé colonne par colonne sur le bloc
+entier, puis écrit par bulk_create(update_conflicts=True) : une note déjà
+saisie est remplacée.
+
+La matière est lue dans une colonne `matiere` ou, à défaut, dans le nom du
+fichier (`MATH_centre-douala.xlsx` -> matière MATH). Les fichiers de matières
+différentes ne touchent pas les mêmes lignes : ils sont importés en parallèle
+dans un pool de processus (sous PostgreSQL ; SQLite n'accepte qu'un écrivain).
+"""
+import csv
+import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import openpyxl
+import pandas as pd
+from django.db import connection, connections, transaction
+
+from academique.search import normaliser
+from administration.metrics import metriques
+from .models import Candidat, Matiere, Note
+
+logger = logging.getLogger(__name__)
+
+TAILLE_BLOC = 20000
+MAX_ERREURS_RAPPORT = 100
+
+COLONNES_NUMERO = ('numero', 'numero_table', 'numero_de_table', 'n_table', 'table')
+COLONNES_NOTE = ('note', 'valeur', 'note_sur_20')
+COLONNES_MATIERE = ('matiere', 'code_matiere')
+VALEURS_ABSENT = {'', 'abs', 'absent', 'nan', 'none'}
+
+
+def _nom_colonne(valeur):
+    return normaliser(valeur).replace(' ', '_')
+
+
+def _trouver_colonne(colonnes, alias):
+    for nom in alias:
+        if nom in colonnes:
+            return nom
+    return None
+
+
+def matiere_du_fichier(chemin):
+    """Code matière déduit du nom de fichier : tout ce qui précède le premier '_'"""
+    return os.path.splitext(os.path.basename(chemin))[0].split('_')[0].upper()
+
+
+def lire_blocs(chemin, taille=TAILLE_BLOC):
+    """Générateur de DataFrames (colonnes normalisées, valeurs en chaînes) lus en flux"""
+    extension = os.path.splitext(chemin)[1].lower()
+
+    if extension == '.csv':
+        with open(chemin, newline='', encoding='utf-8-sig') as f:
+            try:
+                separateur = csv.Sniffer().sniff(f.readline(), delimiters=';,\t').delimiter
+            except csv.Error:
+                separateur = ';'
+        lecteur = pd.read_csv(
+            chemin, sep=separateur, dtype=str, keep_default_na=False,
+            chunksize=taille, encoding='utf-8-sig'
+        )
+        for bloc in lecteur:
+            bloc.columns = [_nom_colonne(c) for c in bloc.columns]
+            yield bloc
+
+    elif extension in ('.xlsx', '.xlsm'):
+        wb = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            lignes = wb.active.iter_rows(values_only=True)
+            entete = [_nom_colonne(c) for c in next(lignes, ())]
+            tampon = []
+            for ligne in lignes:
+                tampon.append(['' if v is None else str(v) for v in ligne[:len(entete)]])
+                if len(tampon) >= taille:
+                    yield pd.DataFrame(tampon, columns=entete)
+                    tampon = []
+            if tampon:
+                yield pd.DataFrame(tampon, columns=entete)
+        finally:
+            wb.close()
+
+    else:
+        raise ValueError(f"Format non supporté : {extension} (attendu .xlsx ou .csv)")
+
+
+def valider_bloc(bloc, candidats, premiere_ligne):
+    """
+    Valide un bloc en opérations vectorielles.
+    Retourne (DataFrame [candidat_id, valeur] des lignes valides, liste d'erreurs, nombre d'erreurs).
+    """
+    col_numero = _trouver_colonne(bloc.columns, COLONNES_NUMERO)
+    col_note = _trouver_colonne(bloc.columns, COLONNES_NOTE)
+    if col_numero is None or col_note is None:
+        raise ValueError("Colonnes requises : numero (numéro de table) et note")
+
+    numeros = bloc[col_numero].astype(str).str.strip().str.upper()
+    brut = bloc[col_note].astype(str).str.strip().str.replace(',', '.', regex=False)
+
+    absent = brut.str.lower().isin(VALEURS_ABSENT)
+    valeurs = pd.to_numeric(brut.where(~absent), errors='coerce')
+    candidat_ids = numeros.map(candidats)
+
+    anomalies = {
+        'numéro de table vide': numeros.eq(''),
+        'candidat inconnu': numeros.ne('') & candidat_ids.isna(),
+        'note illisible': ~absent & valeurs.isna(),
+        'note hors de [0, 20]': valeurs.notna() & ((valeurs < 0) | (valeurs > 20)),
+    }
+    invalide = pd.Series(False, index=bloc.index)
+    erreurs = []
+    for message, masque in anomalies.items():
+        invalide |= masque
+        for position in masque.to_numpy().nonzero()[0][:MAX_ERREURS_RAPPORT]:
+            erreurs.append((premiere_ligne + int(position), f"{message} ({numeros.iat[position]} : {bloc[col_note].iat[position]})"))
+
+    valides = pd.DataFrame({
+        'candidat_id': candidat_ids[~invalide].astype('int64'),
+        'valeur': valeurs[~invalide].round(2),
+    })
+    # Une même copie ne doit apparaître qu'une fois dans un INSERT ... ON CONFLICT
+    valides = valides.drop_duplicates('candidat_id', keep='last')
+    return valides, erreurs, int(invalide.sum())
+
+
+def importer_fichiers_matiere(session_id, code_matiere, chemins):
+    """
+    Importe les fichiers d'une matière (exécutable dans un sous-processus).
+    Retourne un rapport par fichier.
+    """
+    rapports = []
+    try:
+        matiere = Matiere.objects.get(session_id=session_id, code=code_matiere)
+    except Matiere.DoesNotExist:
+        for chemin in chemins:
+            rapports.append({
+                'fichier': chemin, 'matiere': code_matiere, 'lignes': 0, 'importees': 0,
+                'nombre_erreurs': 1, 'erreurs': [(0, f"Matière {code_matiere} inconnue pour cette session")],
+            })
+        return rapports
+
+    candidats = dict(
+        (numero.upper(), candidat_id)
+        for numero, candidat_id in Candidat.objects.filter(session_id=session_id).values_list('numero', 'id')
+    )
+
+    for chemin in chemins:
+        rapport = {'fichier': chemin, 'matiere': code_matiere, 'lignes': 0, 'importees': 0,
+                   'nombre_erreurs': 0, 'erreurs': []}
+        try:
+            # Un fichier est importé entièrement ou pas du tout
+            with transaction.atomic():
+                for bloc in lire_blocs(chemin):
+                    valides, erreurs, nombre_erreurs = valider_bloc(bloc, candidats, rapport['lignes'] + 2)
+                    rapport['lignes'] += len(bloc)
+                    rapport['nombre_erreurs'] += nombre_erreurs
+                    rapport['erreurs'].extend(erreurs[:MAX_ERREURS_RAPPORT - len(rapport['erreurs'])])
+
+                    Note.objects.bulk_create(
+                        [
+                            Note(
+                                candidat_id=candidat_id,
+                                matiere_id=matiere.id,
+                                valeur=None if pd.isna(valeur) else Decimal(f"{valeur:.2f}"),
+                            )
+                            for candidat_id, valeur in zip(valides['candidat_id'].tolist(), valides['valeur'].tolist())
+                        ],
+                        update_conflicts=True,
+                        unique_fields=['candidat', 'matiere'],
+                        update_fields=['valeur'],
+                        batch_size=5000,
+                    )
+                    rapport['importees'] += len(valides)
+        except Exception as e:
+            rapport['importees'] = 0
+            logger.exception(f"Import des notes : erreur sur {chemin}")
+            rapport['nombre_erreurs'] += 1
+            rapport['erreurs'].append((0, str(e)))
+        rapports.append(rapport)
+    return rapports
+
+
+class ImportNotesService:
+    """Répartition des fichiers de notes par matière et import parallèle"""
+
+    @staticmethod
+    def regrouper_par_matiere(chemins, matiere=None):
+        groupes = defaultdict(list)
+        for chemin in chemins:
+            code = (matiere or ImportNotesService._matiere_colonne(chemin) or matiere_du_fichier(chemin)).upper()
+            groupes[code].append(chemin)
+        return groupes
+
+    @staticmethod
+    def _matiere_colonne(chemin):
+        """Code matière lu dans la première ligne de données, si le fichier a une colonne matiere"""
+        try:
+            bloc = next(lire_blocs(chemin, taille=1), None)
+        except (ValueError, OSError):
+            return None
+        if bloc is None or bloc.empty:
+            return None
+        colonne = _trouver_colonne(bloc.columns, COLONNES_MATIERE)
+        return str(bloc[colonne].iat[0]).strip() if colonne else None
+
+    @staticmethod
+    def importer(session, chemins, workers=None, matiere=None):
+        """Importe les fichiers et retourne la liste des rapports (un par fichier)"""
+        rapports = ImportNotesService._importer(session, chemins, workers, matiere)
+        metriques.incrementer('import_lignes_total', sum(r['importees'] for r in rapports),
+                              source='notes_concours', statut='importee')
+        metriques.incrementer('import_lignes_total', sum(r['nombre_erreurs'] for r in rapports),
+                              source='notes_concours', statut='erreur')
+        return rapports
+
+    @staticmethod
+    def _importer(session, chemins, workers, matiere):
+        groupes = ImportNotesService.regrouper_par_matiere(chemins, matiere)
+
+        if connection.vendor == 'sqlite' or len(groupes) == 1 or workers == 1:
+            rapports = []
+            for code, fichiers in groupes.items():
+                rapports.extend(importer_fichiers_matiere(session.pk, code, fichiers))
+            return rapports
+
+        # Les processus (fork : Django déjà configuré) ouvrent leurs propres connexions,
+        # celles du parent ne doivent pas être partagées
+        connections.close_all()
+        rapports = []
+        with ProcessPoolExecutor(
+            max_workers=workers or min(len(groupes), os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context('fork'),
+        ) as executor:
+            futures = [
+                executor.submit(importer_fichiers_matiere, session.pk, code, fichiers)
+                for code, fichiers in groupes.items()
+            ]
+            for future in futures:
+                rapports.extend(future.result())
+        return rapports
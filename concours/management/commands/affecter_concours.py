@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from concours.affectation import AffectationService
+from concours.models import SessionConcours
+
+
+class Command(BaseCommand):
+    help = 'Affecte les candidats admissibles d\'une session dans les filières (par rang et par vœux)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int, help='Identifiant de la session de concours')
+        parser.add_argument(
+            '--preinscrire',
+            action='store_true',
+            help='Crée ensuite les pré-inscriptions (EtudiantAcademique) des candidats affectés',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            session = SessionConcours.objects.get(pk=options['session_id'])
+        except SessionConcours.DoesNotExist:
+            raise CommandError(f"Session de concours #{options['session_id']} introuvable")
+
+        stats = AffectationService.affecter_session(session)
+        self.stdout.write(
+            f"{stats['affectes']} candidat(s) affecté(s) sur {stats['candidats']}, "
+            f"{stats['en_attente']} inscription(s) en liste d'attente"
+        )
+
+        if options['preinscrire']:
+            stats = AffectationService.preinscrire(session)
+            self.stdout.write(
+                f"{stats['preinscrits']} pré-inscription(s) créée(s), {stats['ignores']} candidat(s) ignoré(s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Affectation terminée.'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from concours.classement import ClassementService
+from concours.models import SessionConcours
+
+
+class Command(BaseCommand):
+    help = 'Calcule moyennes, éliminations et rangs des candidats d\'une session de concours'
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int, help='Identifiant de la session de concours')
+
+    def handle(self, *args, **options):
+        try:
+            session = SessionConcours.objects.get(pk=options['session_id'])
+        except SessionConcours.DoesNotExist:
+            raise CommandError(f"Session de concours #{options['session_id']} introuvable")
+
+        try:
+            stats = ClassementService.classer_session(session)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{stats['candidats']} candidat(s) : {stats['admissibles']} admissible(s), "
+            f"{stats['elimines']} éliminé(s)"
+        )
+        self.stdout.write(
+            f"Chargement {stats['duree_chargement']}s, calcul {stats['duree_calcul']}s, "
+            f"enregistrement {stats['duree_enregistrement']}s"
+        )
+        self.stdout.write(self.style.SUCCESS('Classement terminé.'))
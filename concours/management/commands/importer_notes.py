@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from concours.imports import ImportNotesService
+from concours.models import SessionConcours
+
+
+class Command(BaseCommand):
+    help = 'Importe les notes du concours depuis des fichiers .xlsx / .csv (un fichier par matière et par centre)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int, help='Identifiant de la session de concours')
+        parser.add_argument('fichiers', nargs='+', help='Fichiers de notes (colonnes numero, note)')
+        parser.add_argument(
+            '--matiere',
+            help='Code matière de tous les fichiers (sinon colonne matiere ou préfixe du nom : MATH_centre.xlsx)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de processus (par défaut : un par matière, dans la limite des CPU)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            session = SessionConcours.objects.get(pk=options['session_id'])
+        except SessionConcours.DoesNotExist:
+            raise CommandError(f"Session de concours #{options['session_id']} introuvable")
+
+        rapports = ImportNotesService.importer(
+            session, options['fichiers'], workers=options['workers'], matiere=options['matiere']
+        )
+
+        total_importees = 0
+        total_erreurs = 0
+        for rapport in rapports:
+            total_importees += rapport['importees']
+            total_erreurs += rapport['nombre_erreurs']
+            self.stdout.write(
+                f"{rapport['fichier']} [{rapport['matiere']}] : {rapport['importees']}/{rapport['lignes']} "
+                f"note(s) importée(s), {rapport['nombre_erreurs']} erreur(s)"
+            )
+            for ligne, message in rapport['erreurs']:
+                self.stdout.write(self.style.WARNING(f"  ligne {ligne} : {message}" if ligne else f"  {message}"))
+
+        message = f"{total_importees} note(s) importée(s), {total_erreurs} erreur(s)."
+        if total_erreurs:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
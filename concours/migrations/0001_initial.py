@@ -0,0 +1,102 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:42
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionConcours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=150, verbose_name='Nom de la session')),
+                ('annee', models.PositiveIntegerField(verbose_name='Année')),
+                ('date_epreuves', models.DateField(blank=True, null=True, verbose_name='Date des épreuves')),
+                ('moyenne_admission', models.DecimalField(decimal_places=2, default=10, max_digits=4, verbose_name="Moyenne minimale d'admission")),
+                ('statut', models.CharField(choices=[('preparation', 'En préparation'), ('saisie', 'Saisie des notes'), ('classe', 'Classement calculé'), ('publie', 'Résultats publiés')], default='preparation', max_length=20, verbose_name='Statut')),
+                ('date_classement', models.DateTimeField(blank=True, null=True, verbose_name='Date du classement')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Session de concours',
+                'verbose_name_plural': 'Sessions de concours',
+                'ordering': ['-annee', 'nom'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Candidat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=20, verbose_name='Numéro de table')),
+                ('nom', models.CharField(max_length=50, verbose_name='Nom')),
+                ('prenoms', models.CharField(max_length=100, verbose_name='Prénoms')),
+                ('date_naissance', models.DateField(blank=True, null=True, verbose_name='Date de naissance')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('telephone', models.CharField(blank=True, max_length=15, verbose_name='Téléphone')),
+                ('domaine', models.CharField(choices=[('general', 'Général'), ('scientifique', 'Scientifique'), ('technique', 'Technique Industrielle')], default='general', max_length=20, verbose_name='Domaine du diplôme')),
+                ('moyenne', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Moyenne')),
+                ('rang', models.PositiveIntegerField(blank=True, null=True, verbose_name='Rang')),
+                ('elimine', models.BooleanField(default=False, verbose_name='Éliminé')),
+                ('resultat', models.CharField(choices=[('en_attente', 'En attente'), ('admissible', 'Admissible'), ('non_admis', 'Non admis'), ('elimine', 'Éliminé')], default='en_attente', max_length=20, verbose_name='Résultat')),
+                ('date_inscription', models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='candidatures', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidats', to='concours.sessionconcours')),
+            ],
+            options={
+                'verbose_name': 'Candidat',
+                'verbose_name_plural': 'Candidats',
+                'ordering': ['session', 'rang', 'numero'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Matiere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, verbose_name='Code')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom de la matière')),
+                ('coefficient', models.DecimalField(decimal_places=1, default=1, max_digits=4, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Coefficient')),
+                ('note_eliminatoire', models.DecimalField(blank=True, decimal_places=2, help_text='Une note strictement inférieure élimine le candidat', max_digits=4, null=True, verbose_name='Note éliminatoire')),
+                ('ordre', models.PositiveIntegerField(default=0, verbose_name="Ordre d'affichage")),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matieres', to='concours.sessionconcours')),
+            ],
+            options={
+                'verbose_name': 'Matière',
+                'verbose_name_plural': 'Matières',
+                'ordering': ['session', 'ordre', 'code'],
+                'unique_together': {('session', 'code')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valeur', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(20)], verbose_name='Note sur 20')),
+                ('candidat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='concours.candidat')),
+                ('matiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='concours.matiere')),
+            ],
+            options={
+                'verbose_name': 'Note',
+                'verbose_name_plural': 'Notes',
+                'unique_together': {('candidat', 'matiere')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='candidat',
+            index=models.Index(fields=['session', 'rang'], name='concours_ca_session_9b13c1_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='candidat',
+            unique_together={('session', 'numero')},
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0005_recherche_etudiants'),
+        ('concours', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListeAttente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordre_voeu', models.PositiveSmallIntegerField(verbose_name='Ordre du vœu')),
+                ('rang', models.PositiveIntegerField(verbose_name='Rang du candidat')),
+            ],
+            options={
+                'verbose_name': "Liste d'attente",
+                'verbose_name_plural': "Listes d'attente",
+                'ordering': ['session', 'filiere', 'rang', 'candidat'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VoeuCandidat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordre', models.PositiveSmallIntegerField(verbose_name='Ordre de préférence')),
+            ],
+            options={
+                'verbose_name': 'Vœu',
+                'verbose_name_plural': 'Vœux',
+                'ordering': ['candidat', 'ordre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='candidat',
+            name='cni',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Numéro CNI'),
+        ),
+        migrations.AddField(
+            model_name='candidat',
+            name='desiste',
+            field=models.BooleanField(default=False, verbose_name='Désisté'),
+        ),
+        migrations.AddField(
+            model_name='candidat',
+            name='etudiant',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='candidature', to='academique.etudiantacademique', verbose_name='Pré-inscription'),
+        ),
+        migrations.AddField(
+            model_name='candidat',
+            name='filiere_affectee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='candidats_affectes', to='academique.filiere', verbose_name='Filière obtenue'),
+        ),
+        migrations.AddField(
+            model_name='candidat',
+            name='voeu_obtenu',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Vœu obtenu'),
+        ),
+        migrations.AddIndex(
+            model_name='candidat',
+            index=models.Index(fields=['session', 'filiere_affectee'], name='concours_ca_session_fe0e17_idx'),
+        ),
+        migrations.AddField(
+            model_name='listeattente',
+            name='candidat',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attentes', to='concours.candidat'),
+        ),
+        migrations.AddField(
+            model_name='listeattente',
+            name='filiere',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listes_attente', to='academique.filiere'),
+        ),
+        migrations.AddField(
+            model_name='listeattente',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listes_attente', to='concours.sessionconcours'),
+        ),
+        migrations.AddField(
+            model_name='voeucandidat',
+            name='candidat',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voeux', to='concours.candidat'),
+        ),
+        migrations.AddField(
+            model_name='voeucandidat',
+            name='filiere',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voeux_concours', to='academique.filiere'),
+        ),
+        migrations.AddIndex(
+            model_name='listeattente',
+            index=models.Index(fields=['session', 'filiere', 'rang'], name='concours_li_session_c9a297_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='listeattente',
+            unique_together={('candidat', 'filiere')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='voeucandidat',
+            unique_together={('candidat', 'filiere'), ('candidat', 'ordre')},
+        ),
+    ]
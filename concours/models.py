@@ -1,3 +1,227 @@
+# concours/models.py
 from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator, MaxValueValidator
 
-# Create your models here.
+User = get_user_model()
+
+
+class SessionConcours(models.Model):
+    """Session du concours d'entrée (une par année et par campagne)"""
+    STATUT_CHOICES = [
+        ('preparation', 'En préparation'),
+        ('saisie', 'Saisie des notes'),
+        ('classe', 'Classement calculé'),
+        ('publie', 'Résultats publiés'),
+    ]
+
+    nom = models.CharField(max_length=150, verbose_name="Nom de la session")
+    annee = models.PositiveIntegerField(verbose_name="Année")
+    date_epreuves = models.DateField(null=True, blank=True, verbose_name="Date des épreuves")
+    moyenne_admission = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        default=10,
+        verbose_name="Moyenne minimale d'admission"
+    )
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='preparation',
+        verbose_name="Statut"
+    )
+    date_classement = models.DateTimeField(null=True, blank=True, verbose_name="Date du classement")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Session de concours"
+        verbose_name_plural = "Sessions de concours"
+        ordering = ['-annee', 'nom']
+
+    def __str__(self):
+        return f"{self.nom} ({self.annee})"
+
+
+class Matiere(models.Model):
+    """Épreuve du concours, avec son coefficient et sa note éliminatoire"""
+    session = models.ForeignKey(SessionConcours, on_delete=models.CASCADE, related_name='matieres')
+    code = models.CharField(max_length=10, verbose_name="Code")
+    nom = models.CharField(max_length=100, verbose_name="Nom de la matière")
+    coefficient = models.DecimalField(
+        max_digits=4,
+        decimal_places=1,
+        default=1,
+        validators=[MinValueValidator(0)],
+        verbose_name="Coefficient"
+    )
+    note_eliminatoire = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Note éliminatoire",
+        help_text="Une note strictement inférieure élimine le candidat"
+    )
+    ordre = models.PositiveIntegerField(default=0, verbose_name="Ordre d'affichage")
+
+    class Meta:
+        verbose_name = "Matière"
+        verbose_name_plural = "Matières"
+        ordering = ['session', 'ordre', 'code']
+        unique_together = ['session', 'code']
+
+    def __str__(self):
+        return f"{self.code} - {self.nom} (coef. {self.coefficient})"
+
+
+class Candidat(models.Model):
+    """Candidat inscrit à une session du concours"""
+    DOMAINE_CHOICES = [
+        ('general', 'Général'),
+        ('scientifique', 'Scientifique'),
+        ('technique', 'Technique Industrielle'),
+    ]
+
+    RESULTAT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('admissible', 'Admissible'),
+        ('non_admis', 'Non admis'),
+        ('elimine', 'Éliminé'),
+    ]
+
+    session = models.ForeignKey(SessionConcours, on_delete=models.CASCADE, related_name='candidats')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='candidatures'
+    )
+    numero = models.CharField(max_length=20, verbose_name="Numéro de table")
+
+    nom = models.CharField(max_length=50, verbose_name="Nom")
+    prenoms = models.CharField(max_length=100, verbose_name="Prénoms")
+    date_naissance = models.DateField(null=True, blank=True, verbose_name="Date de naissance")
+    cni = models.CharField(max_length=50, blank=True, verbose_name="Numéro CNI")
+    email = models.EmailField(blank=True, verbose_name="Email")
+    telephone = models.CharField(max_length=15, blank=True, verbose_name="Téléphone")
+    domaine = models.CharField(
+        max_length=20,
+        choices=DOMAINE_CHOICES,
+        default='general',
+        verbose_name="Domaine du diplôme"
+    )
+
+    # Résultats (écrits par le moteur de classement)
+    moyenne = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, verbose_name="Moyenne")
+    rang = models.PositiveIntegerField(null=True, blank=True, verbose_name="Rang")
+    elimine = models.BooleanField(default=False, verbose_name="Éliminé")
+    resultat = models.CharField(
+        max_length=20,
+        choices=RESULTAT_CHOICES,
+        default='en_attente',
+        verbose_name="Résultat"
+    )
+    
+    # Affectation (écrite par le moteur d'affectation)
+    filiere_affectee = models.ForeignKey(
+        'academique.Filiere',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='candidats_affectes',
+        verbose_name="Filière obtenue"
+    )
+    voeu_obtenu = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Vœu obtenu")
+    desiste = models.BooleanField(default=False, verbose_name="Désisté")
+    etudiant = models.OneToOneField(
+        'academique.EtudiantAcademique',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='candidature',
+        verbose_name="Pré-inscription"
+    )
+
+    date_inscription = models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")
+
+    class Meta:
+        verbose_name = "Candidat"
+        verbose_name_plural = "Candidats"
+        ordering = ['session', 'rang', 'numero']
+        unique_together = ['session', 'numero']
+        indexes = [
+            models.Index(fields=['session', 'rang']),
+            models.Index(fields=['session', 'filiere_affectee']),
+        ]
+
+    def __str__(self):
+        return f"{self.numero} - {self.nom} {self.prenoms}"
+
+    @property
+    def nom_complet(self):
+        return f"{self.nom} {self.prenoms}"
+
+
+class VoeuCandidat(models.Model):
+    """Choix de filière d'un candidat, par ordre de préférence (1 = premier choix)"""
+    candidat = models.ForeignKey(Candidat, on_delete=models.CASCADE, related_name='voeux')
+    filiere = models.ForeignKey('academique.Filiere', on_delete=models.CASCADE, related_name='voeux_concours')
+    ordre = models.PositiveSmallIntegerField(verbose_name="Ordre de préférence")
+
+    class Meta:
+        verbose_name = "Vœu"
+        verbose_name_plural = "Vœux"
+        ordering = ['candidat', 'ordre']
+        unique_together = [['candidat', 'ordre'], ['candidat', 'filiere']]
+
+    def __str__(self):
+        return f"{self.candidat.numero} - vœu {self.ordre} : {self.filiere.code}"
+
+
+class ListeAttente(models.Model):
+    """
+    Candidat en attente d'une place dans une filière qu'il préfère à celle obtenue.
+    La position se lit dans l'ordre (rang, numéro) du candidat.
+    """
+    session = models.ForeignKey(SessionConcours, on_delete=models.CASCADE, related_name='listes_attente')
+    filiere = models.ForeignKey('academique.Filiere', on_delete=models.CASCADE, related_name='listes_attente')
+    candidat = models.ForeignKey(Candidat, on_delete=models.CASCADE, related_name='attentes')
+    ordre_voeu = models.PositiveSmallIntegerField(verbose_name="Ordre du vœu")
+    rang = models.PositiveIntegerField(verbose_name="Rang du candidat")
+
+    class Meta:
+        verbose_name = "Liste d'attente"
+        verbose_name_plural = "Listes d'attente"
+        ordering = ['session', 'filiere', 'rang', 'candidat']
+        unique_together = ['candidat', 'filiere']
+        indexes = [
+            models.Index(fields=['session', 'filiere', 'rang']),
+        ]
+
+    def __str__(self):
+        return f"{self.filiere.code} - {self.candidat.numero} (rang {self.rang})"
+
+
+class Note(models.Model):
+    """Note brute d'un candidat dans une matière (vide = absent)"""
+    candidat = models.ForeignKey(Candidat, on_delete=models.CASCADE, related_name='notes')
+    matiere = models.ForeignKey(Matiere, on_delete=models.CASCADE, related_name='notes')
+    valeur = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(20)],
+        verbose_name="Note sur 20"
+    )
+
+    class Meta:
+        verbose_name = "Note"
+        verbose_name_plural = "Notes"
+        unique_together = ['candidat', 'matiere']
+
+    def __str__(self):
+        return f"{self.candidat.numero} - {self.matiere.code} : {self.valeur}"
@@ -1,3 +1,347 @@
+import datetime
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+import openpyxl
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from academique.models import EtudiantAcademique, Filiere
+
+from .affectation import AffectationService
+from .classement import ClassementService, calculer_resultats
+from .imports import ImportNotesService
+from .models import Candidat, ListeAttente, Matiere, Note, SessionConcours, VoeuCandidat
+
+
+class CalculResultatsTests(TestCase):
+    """Calcul vectoriel des moyennes, éliminations et rangs (sans base)"""
+
+    def test_rangs_ex_aequo_et_eliminations(self):
+        notes = [
+            [15, 12],
+            [14, 14],
+            [12, 6],
+            [4, 20],       # sous la note éliminatoire en première matière
+            [9, np.nan],   # absent en seconde matière
+            [9, 9],
+        ]
+        moyennes, elimines, rangs, admissibles = calculer_resultats(notes, [2, 1], [5, np.nan], 10)
+
+        self.assertEqual(moyennes.tolist(), [14.0, 14.0, 10.0, 9.33, 6.0, 9.0])
+        self.assertEqual(elimines.tolist(), [False, False, False, True, True, False])
+        self.assertEqual(rangs.tolist(), [1, 1, 3, 0, 0, 4])
+        self.assertEqual(admissibles.tolist(), [True, True, True, False, False, False])
+
+    def test_note_egale_au_seuil_non_eliminatoire(self):
+        _, elimines, rangs, _ = calculer_resultats([[5, 10]], [1, 1], [5, np.nan], 10)
+        self.assertFalse(elimines[0])
+        self.assertEqual(rangs[0], 1)
+
+    def test_coefficients_nuls_refuses(self):
+        with self.assertRaises(ValueError):
+            calculer_resultats([[10]], [0], [np.nan], 10)
+
+
+class ClassementSessionTests(TestCase):
+    """Classement d'une session enregistré en base"""
+
+    def setUp(self):
+        self.session = SessionConcours.objects.create(nom='Concours test', annee=2025, moyenne_admission=10)
+        maths = Matiere.objects.create(session=self.session, code='MATH', nom='Mathématiques',
+                                       coefficient=2, note_eliminatoire=5)
+        francais = Matiere.objects.create(session=self.session, code='FR', nom='Français', coefficient=1)
+
+        notes = {
+            'A': (15, 12),
+            'B': (14, 14),
+            'C': (12, 6),
+            'D': (4, 20),
+            'E': (9, None),
+            'F': (9, 9),
+        }
+        self.candidats = {}
+        for numero, (note_maths, note_francais) in notes.items():
+            candidat = Candidat.objects.create(session=self.session, numero=numero, nom=numero, prenoms='Test')
+            Note.objects.create(candidat=candidat, matiere=maths, valeur=note_maths)
+            if note_francais is not None:
+                Note.objects.create(candidat=candidat, matiere=francais, valeur=note_francais)
+            self.candidats[numero] = candidat
+
+    def resultats(self):
+        return {
+            c.numero: (c.moyenne, c.rang, c.elimine, c.resultat)
+            for c in Candidat.objects.filter(session=self.session)
+        }
+
+    def test_classement_de_la_session(self):
+        stats = ClassementService.classer_session(self.session)
+
+        self.assertEqual(stats['candidats'], 6)
+        self.assertEqual(stats['elimines'], 2)
+        self.assertEqual(stats['admissibles'], 3)
+        self.assertEqual(self.resultats(), {
+            'A': (Decimal('14.00'), 1, False, 'admissible'),
+            'B': (Decimal('14.00'), 1, False, 'admissible'),
+            'C': (Decimal('10.00'), 3, False, 'admissible'),
+            'D': (Decimal('9.33'), None, True, 'elimine'),
+            'E': (Decimal('6.00'), None, True, 'elimine'),
+            'F': (Decimal('9.00'), 4, False, 'non_admis'),
+        })
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.statut, 'classe')
+
+    def test_second_classement_ne_reecrit_que_les_changements(self):
+        ClassementService.classer_session(self.session)
+        self.assertEqual(ClassementService.classer_session(self.session)['modifies'], 0)
+
+        Note.objects.filter(candidat=self.candidats['F'], matiere__code='MATH').update(valeur=18)
+        stats = ClassementService.classer_session(self.session)
+
+        # F passe premier (15.00) : les rangs de A, B et C décalent
+        self.assertEqual(stats['modifies'], 4)
+        resultats = self.resultats()
+        self.assertEqual(resultats['F'], (Decimal('15.00'), 1, False, 'admissible'))
+        self.assertEqual([resultats[n][1] for n in 'ABC'], [2, 2, 4])
+
+
+class AffectationTests(TestCase):
+    """Affectation par rang, listes d'attente, désistements et pré-inscriptions"""
+
+    def setUp(self):
+        self.session = SessionConcours.objects.create(nom='Concours test', annee=2025, statut='classe')
+        self.filieres = {
+            code: Filiere.objects.create(code=code, nom=f'Filière {code}', places_disponibles=places, domaine_requis=domaine)
+            for code, places, domaine in [
+                ('AA', 1, 'tous'), ('BB', 1, 'tous'), ('CC', 2, 'tous'), ('TI', 5, 'technique'),
+            ]
+        }
+        self.candidats = {}
+        for rang, (numero, voeux) in enumerate([
+            ('N1', ['AA', 'BB']),
+            ('N2', ['AA', 'BB']),
+            ('N3', ['BB', 'CC']),
+            ('N4', ['AA', 'BB', 'CC']),
+            ('N5', ['CC']),
+            ('N6', ['TI']),   # domaine général : filière incompatible
+        ], start=1):
+            self.candidats[numero] = self.creer_candidat(numero, rang, voeux)
+        # Non admissible : jamais affecté
+        self.creer_candidat('X1', None, ['CC'], resultat='non_admis')
+
+    def creer_candidat(self, numero, rang, voeux, resultat='admissible'):
+        candidat = Candidat.objects.create(
+            session=self.session, numero=numero, nom=numero, prenoms='Test', rang=rang, resultat=resultat,
+            cni=f'CNI-{numero}', date_naissance=datetime.date(2005, 1, 1), email=f'{numero.lower()}@iutessa.test', telephone='690000000',
+        )
+        for ordre, code in enumerate(voeux, start=1):
+            VoeuCandidat.objects.create(candidat=candidat, filiere=self.filieres[code], ordre=ordre)
+        return candidat
+
+    def affectations(self):
+        return dict(
+            Candidat.objects.filter(session=self.session).values_list('numero', 'filiere_affectee__code')
+        )
+
+    def liste_attente(self, code):
+        return list(
+            ListeAttente.objects.filter(session=self.session, filiere=self.filieres[code])
+            .order_by('rang', 'candidat__numero').values_list('candidat__numero', flat=True)
+        )
+
+    def test_capacites_respectees(self):
+        stats = AffectationService.affecter_session(self.session)
+
+        self.assertEqual(stats['affectes'], 4)
+        self.assertEqual(stats['non_affectes'], 2)
+        self.assertEqual(self.affectations(), {
+            'N1': 'AA', 'N2': 'BB', 'N3': 'CC', 'N4': 'CC', 'N5': None, 'N6': None, 'X1': None,
+        })
+
+    def test_listes_d_attente_par_rang(self):
+        AffectationService.affecter_session(self.session)
+
+        self.assertEqual(self.liste_attente('AA'), ['N2', 'N4'])
+        self.assertEqual(self.liste_attente('BB'), ['N3', 'N4'])
+        self.assertEqual(self.liste_attente('CC'), ['N5'])
+        self.assertEqual(self.liste_attente('TI'), [])
+
+    def test_chaine_de_places_vacantes(self):
+        AffectationService.affecter_session(self.session)
+
+        mouvements = AffectationService.desister(self.candidats['N1'])
+
+        self.assertEqual(
+            [(c.numero, self.code(ancienne), self.code(nouvelle)) for c, ancienne, nouvelle in mouvements],
+            [('N2', 'BB', 'AA'), ('N3', 'CC', 'BB'), ('N5', None, 'CC')],
+        )
+        self.assertEqual(self.affectations(), {
+            'N1': None, 'N2': 'AA', 'N3': 'BB', 'N4': 'CC', 'N5': 'CC', 'N6': None, 'X1': None,
+        })
+        self.assertEqual(self.liste_attente('AA'), ['N4'])
+        self.assertEqual(self.liste_attente('BB'), ['N4'])
+        self.assertEqual(self.liste_attente('CC'), [])
+        # Un second désistement du même candidat ne fait rien
+        self.assertEqual(AffectationService.desister(self.candidats['N1']), [])
+
+    def test_preinscription_idempotente(self):
+        AffectationService.affecter_session(self.session)
+        Candidat.objects.filter(numero='N4').update(cni='')
+
+        self.assertEqual(AffectationService.preinscrire(self.session), {'preinscrits': 3, 'ignores': 1})
+        self.assertEqual(EtudiantAcademique.objects.count(), 3)
+        self.assertEqual(
+            dict(Filiere.objects.values_list('code', 'places_occupees')),
+            {'AA': 1, 'BB': 1, 'CC': 1, 'TI': 0},
+        )
+
+        self.assertEqual(AffectationService.preinscrire(self.session), {'preinscrits': 0, 'ignores': 1})
+        self.assertEqual(EtudiantAcademique.objects.count(), 3)
+        self.assertEqual(Filiere.objects.get(code='CC').places_occupees, 1)
+
+    def test_cni_deja_inscrite_ignoree(self):
+        # Ancien étudiant qui recandidate, et doublon de saisie dans la session
+        EtudiantAcademique.objects.create(
+            user=get_user_model().objects.create_user('ancien', role='ETUDIANT'),
+            filiere=self.filieres['AA'], nom='Ancien', prenoms='Etudiant',
+            date_naissance=datetime.date(2000, 1, 1), cni='CNI-N1', telephone='690000000',
+            email_personnel='ancien@iutessa.test', annee_obtention=2020,
+        )
+        Candidat.objects.filter(numero='N4').update(cni='CNI-N2')
+        AffectationService.affecter_session(self.session)
+
+        with self.assertLogs('concours.affectation', 'WARNING') as journal:
+            stats = AffectationService.preinscrire(self.session)
+
+        self.assertEqual(stats, {'preinscrits': 2, 'ignores': 2})
+        self.assertIn('N1, N4', journal.output[0])
+        self.assertEqual(
+            sorted(Candidat.objects.filter(etudiant__isnull=False).values_list('numero', flat=True)), ['N2', 'N3']
+        )
+
+    def test_preinscription_calcule_la_progression(self):
+        AffectationService.affecter_session(self.session)
+        AffectationService.preinscrire(self.session)
+
+        etudiant = EtudiantAcademique.objects.get(candidature__numero='N1')
+        self.assertEqual(etudiant.progression, etudiant.calculer_progression())
+        self.assertEqual(etudiant.progression, 50)
+
+    def test_matricules_au_dela_de_9999(self):
+        EtudiantAcademique.objects.create(
+            user=get_user_model().objects.create_user('ancien', password='x', role='ETUDIANT'),
+            filiere=self.filieres['AA'], nom='Ancien', prenoms='Etudiant',
+            date_naissance=datetime.date(2000, 1, 1), cni='CNI-ANCIEN', telephone='690000000',
+            email_personnel='ancien@iutessa.test', annee_obtention=2020,
+            numero_matricule='IUTESSA-2025-10000',
+        )
+        EtudiantAcademique.objects.create(
+            user=get_user_model().objects.create_user('ancien-2', password='x', role='ETUDIANT'),
+            filiere=self.filieres['AA'], nom='Ancien', prenoms='Etudiant 2',
+            date_naissance=datetime.date(2000, 1, 1), cni='CNI-ANCIEN-2', telephone='690000000',
+            email_personnel='ancien2@iutessa.test', annee_obtention=2020,
+            numero_matricule='IUTESSA-2025-9999',
+        )
+        AffectationService.affecter_session(self.session)
+        AffectationService.preinscrire(self.session)
+
+        self.assertEqual(
+            EtudiantAcademique.objects.get(candidature__numero='N1').numero_matricule, 'IUTESSA-2025-10001'
+        )
+
+    def test_identifiant_deja_pris_suffixe(self):
+        User = get_user_model()
+        User.objects.create_user('c2025-n1', password='x')
+        User.objects.create_user('c2025-n1-2', password='x')
+        AffectationService.affecter_session(self.session)
+
+        self.assertEqual(AffectationService.preinscrire(self.session)['preinscrits'], 4)
+        self.assertEqual(Candidat.objects.get(numero='N1').user.username, 'c2025-n1-3')
+        self.assertEqual(Candidat.objects.get(numero='N2').user.username, 'c2025-n2')
+
+    def code(self, filiere_id):
+        return Filiere.objects.get(pk=filiere_id).code if filiere_id else None
+
+
+class ImportNotesTests(TestCase):
+    """Import des notes depuis des fichiers CSV et xlsx"""
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier)
+        self.session = SessionConcours.objects.create(nom='Concours test', annee=2025)
+        self.maths = Matiere.objects.create(session=self.session, code='MATH', nom='Mathématiques')
+        self.francais = Matiere.objects.create(session=self.session, code='FR', nom='Français')
+        for numero in ('A001', 'A002', 'A003'):
+            Candidat.objects.create(session=self.session, numero=numero, nom=numero, prenoms='Test')
+
+    def csv(self, nom, contenu):
+        chemin = os.path.join(self.dossier, nom)
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+        return chemin
+
+    def xlsx(self, nom, lignes):
+        chemin = os.path.join(self.dossier, nom)
+        wb = openpyxl.Workbook()
+        for ligne in lignes:
+            wb.active.append(ligne)
+        wb.save(chemin)
+        return chemin
+
+    def notes(self, matiere):
+        return dict(Note.objects.filter(matiere=matiere).values_list('candidat__numero', 'valeur'))
+
+    def test_import_csv_alias_et_absents(self):
+        chemin = self.csv('MATH_centre-douala.csv', "Numéro de table;Note sur 20\nA001;12,5\na002;ABS\nA003;20\n")
+
+        [rapport] = ImportNotesService.importer(self.session, [chemin])
+
+        self.assertEqual(
+            (rapport['matiere'], rapport['lignes'], rapport['importees'], rapport['nombre_erreurs']),
+            ('MATH', 3, 3, 0),
+        )
+        self.assertEqual(self.notes(self.maths), {'A001': Decimal('12.50'), 'A002': None, 'A003': Decimal('20.00')})
+
+    def test_import_xlsx_matiere_en_colonne(self):
+        chemin = self.xlsx('centre-yaounde.xlsx', [
+            ('N° table', 'Matière', 'Valeur'),
+            ('A001', 'FR', 14),
+            ('A002', 'FR', 9.75),
+        ])
+
+        [rapport] = ImportNotesService.importer(self.session, [chemin])
+
+        self.assertEqual((rapport['matiere'], rapport['importees']), ('FR', 2))
+        self.assertEqual(self.notes(self.francais), {'A001': Decimal('14.00'), 'A002': Decimal('9.75')})
+
+    def test_reimport_remplace_les_notes(self):
+        ImportNotesService.importer(self.session, [self.csv('MATH_1.csv', "numero,note\nA001,8\nA002,11\n")])
+        ImportNotesService.importer(self.session, [self.csv('MATH_2.csv', "numero,note\nA001,13\n")])
+
+        self.assertEqual(Note.objects.count(), 2)
+        self.assertEqual(self.notes(self.maths), {'A001': Decimal('13.00'), 'A002': Decimal('11.00')})
+
+    def test_rapport_des_lignes_en_erreur(self):
+        chemin = self.csv('MATH_erreurs.csv', "numero;note\nA001;15\nZ999;10\nA002;dix\nA003;21\n;12\n")
+
+        [rapport] = ImportNotesService.importer(self.session, [chemin])
+
+        self.assertEqual((rapport['lignes'], rapport['importees'], rapport['nombre_erreurs']), (5, 1, 4))
+        self.assertEqual(sorted(rapport['erreurs']), [
+            (3, 'candidat inconnu (Z999 : 10)'),
+            (4, 'note illisible (A002 : dix)'),
+            (5, 'note hors de [0, 20] (A003 : 21)'),
+            (6, 'numéro de table vide ( : 12)'),
+        ])
+        self.assertEqual(self.notes(self.maths), {'A001': Decimal('15.00')})
+
+    def test_matiere_inconnue(self):
+        [rapport] = ImportNotesService.importer(self.session, [self.csv('PHYS_1.csv', "numero;note\nA001;10\n")])
+
+        self.assertEqual(rapport['importees'], 0)
+        self.assertEqual(rapport['erreurs'], [(0, 'Matière PHYS inconnue pour cette session')])
+        self.assertFalse(Note.objects.exists())
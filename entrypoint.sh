@@ -7,6 +7,13 @@ while ! nc -z ${POSTGRES_HOST:-localhost} ${POSTGRES_PORT:-5432}; do
 done
 echo "✅ Database is ready!"
 
+# Workers (docker-compose) : commande passée en argument ; migrations et fichiers
+# statiques restent à la charge du service web
+if [ "$#" -gt 0 ]; then
+  echo "🚀 Starting $*..."
+  exec "$@"
+fi
+
 # Fix permissions des volumes montés
 echo "🔧 Fixing permissions..."
 chown -R www-data:www-data /app/media /app/staticfiles 2>/dev/null || true
@@ -18,6 +25,9 @@ python manage.py migrate --noinput
 echo "🔄 Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Métriques : repartir de fichiers vides (un fichier par worker)
+rm -rf "${METRIQUES_DOSSIER:-/tmp/iutessa-metriques}"
+
 echo "🚀 Starting Uvicorn..."
 exec uvicorn iuttessa.asgi:application \
     --host 0.0.0.0 \
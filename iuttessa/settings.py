@@ -61,16 +61,31 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ====================
 MIDDLEWARE = [
+    'administration.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  
+    'administration.middleware.StaticAsyncMiddleware',  # WhiteNoise, compatible ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'administration.routage.RoutageRepliqueMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Profilage : requêtes journalisées au-delà de cette durée, ou quand une même
+# requête SQL est répétée au moins PROFILAGE_SEUIL_DOUBLONS fois (N+1)
+PROFILAGE_SEUIL_LENT_MS = int(os.getenv('PROFILAGE_SEUIL_LENT_MS', 500))
+PROFILAGE_SEUIL_DOUBLONS = int(os.getenv('PROFILAGE_SEUIL_DOUBLONS', 5))
+
+# Métriques (/metrics) : un fichier par worker dans ce dossier, à vider au démarrage
+METRIQUES_DOSSIER = os.getenv('METRIQUES_DOSSIER', '/tmp/iutessa-metriques')
+METRIQUES_INTERVALLE_ECRITURE = float(os.getenv('METRIQUES_INTERVALLE_ECRITURE', 1))
+# Accès du scraper (hors administrateurs connectés) : jeton Bearer et/ou adresses ou réseaux
+# autorisés, séparés par des virgules (ex. '10.0.0.5,192.168.1.0/24'). Vides : aucun scraper.
+METRIQUES_JETON = os.getenv('METRIQUES_JETON', '')
+METRIQUES_IPS_AUTORISEES = [ip.strip() for ip in os.getenv('METRIQUES_IPS_AUTORISEES', '').split(',') if ip.strip()]
+
 ROOT_URLCONF = 'iuttessa.urls'
 
 # ====================
@@ -87,6 +102,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'administration.context_processors.admin_context',
             ],
         },
     },
@@ -107,11 +123,38 @@ if IS_PRODUCTION:
             'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
             'PORT': os.getenv('POSTGRES_PORT', '5432'),
             'CONN_MAX_AGE': 600,
+            # Connexion persistante vérifiée avant réutilisation (redémarrage de PostgreSQL)
+            'CONN_HEALTH_CHECKS': True,
             'OPTIONS': {
                 'sslmode': 'prefer',
             }
         }
     }
+
+    # Pool de connexions (psycopg 3) : sous ASGI, les threads qui exécutent les requêtes
+    # vont et viennent et CONN_MAX_AGE y rouvre souvent une connexion (poignée de main TLS
+    # comprise). Un pool par worker uvicorn : prévoir workers x DB_POOL_MAX_SIZE connexions
+    # sous le max_connections de PostgreSQL. Avec psycopg2, le pool est ignoré et
+    # CONN_MAX_AGE reste en vigueur.
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        ConnectionPool = None
+
+    if ConnectionPool is not None and os.getenv('DB_POOL', 'True').lower() == 'true':
+        DATABASES['default']['CONN_MAX_AGE'] = 0  # incompatible avec le pool
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = False
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # Attente maximale d'une connexion libre avant erreur (secondes)
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            # Connexions inactives fermées au-delà de min_size, renouvelées périodiquement
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            # Vérification (SELECT 1 léger) de chaque connexion avant de la confier à une requête
+            'check': ConnectionPool.check_connection,
+        }
 else:
     DATABASES = {
         'default': {
@@ -120,6 +163,64 @@ else:
         }
     }
 
+# Réplica en lecture (voir administration/routage.py) : pages publiques et rapports.
+# En production, un serveur PostgreSQL répliqué (mêmes identifiants, pool compris) ;
+# en local, un second fichier SQLite peut en tenir lieu (DB_REPLICA_SQLITE), par
+# exemple une copie de db.sqlite3 pour observer les lectures en retard.
+if IS_PRODUCTION and os.getenv('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('POSTGRES_REPLICA_HOST'),
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+    }
+elif not IS_PRODUCTION and os.getenv('DB_REPLICA_SQLITE'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_REPLICA_SQLITE'),
+    }
+if 'replica' in DATABASES:
+    # Les tests lisent le réplica via la connexion principale
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['administration.routage.RouteurReplique']
+
+# Vues (espace:nom, motifs fnmatch) dont les lectures GET vont au réplica
+REPLIQUE_VUES = [
+    'pages:*',
+    'academique:filieres_list_public',
+    'academique:filiere_detail_public',
+    'administration:statistics',
+]
+# Après une écriture, la session de l'auteur lit la base principale pendant ce délai
+REPLIQUE_EPINGLAGE_SECONDES = int(os.getenv('REPLIQUE_EPINGLAGE_SECONDES', 15))
+
+# ====================
+# CACHE
+# ====================
+# Par défaut un cache mémoire par processus ; en production, pointer CACHE_BACKEND
+# vers un cache partagé entre les workers (ex. django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'iuttessa'),
+        'TIMEOUT': 300,
+    }
+}
+
+# Durée de mise en cache des totaux estimés des listes paginées (secondes)
+PAGINATION_COUNT_TIMEOUT = int(os.getenv('PAGINATION_COUNT_TIMEOUT', 300))
+
+# Limitation de débit (administration/limitation.py) : compteurs dans le cache ci-dessus,
+# à partager entre les workers en production. Limites par vue remplaçables ici,
+# ex. {'connexion': {'ip': '60/m', 'identifiant': '10/10m'}, 'commentaire': {'ip': '5/m'}}
+LIMITATION_DEBIT_ACTIVE = os.getenv('LIMITATION_DEBIT_ACTIVE', 'True').lower() == 'true'
+LIMITATION_DEBIT = {}
+
+# Compteurs globaux de l'administration : invalidés à chaque modification, ce délai
+# borne seulement l'écart entre workers sans cache partagé (secondes)
+COMPTEURS_TIMEOUT = int(os.getenv('COMPTEURS_TIMEOUT', 3600))
+
 # ====================
 # SÉCURITÉ
 # ====================
@@ -167,7 +268,6 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / "theme" / "static"]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # ====================
 # 🔥 MEDIA FILES - TOUJOURS LOCAL (pas de nginx)
@@ -175,9 +275,29 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Fichiers des FileField/ImageField adressés par leur contenu (dédupliqués, voir
+# administration/stockage.py). Les fichiers à chemin fixe (cache des fiches PDF)
+# passent par `chemins`. STORAGES remplace DEFAULT_FILE_STORAGE/STATICFILES_STORAGE
+# (ignorés depuis Django 5.1).
+STORAGES = {
+    'default': {'BACKEND': 'administration.stockage.StockageAdresseContenu'},
+    'chemins': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024
 
+# Vidéos volumineuses : envoi par fragments reprenables (administration/televersements.py)
+TELEVERSEMENTS_TAILLE_FRAGMENT = 4 * 1024 * 1024
+TELEVERSEMENTS_TAILLE_MAX = int(os.getenv('TELEVERSEMENTS_TAILLE_MAX', 1024 * 1024 * 1024))
+TELEVERSEMENTS_DOSSIER = os.getenv('TELEVERSEMENTS_DOSSIER') or None
+
+# Exports en arrière-plan : une demande identique dans cette fenêtre réutilise le fichier
+EXPORT_CACHE_MINUTES = int(os.getenv('EXPORT_CACHE_MINUTES', 30))
+# Job 'en_cours' depuis plus longtemps : considéré comme abandonné et remis en attente
+EXPORT_DELAI_BLOCAGE_MINUTES = int(os.getenv('EXPORT_DELAI_BLOCAGE_MINUTES', 60))
+
 # ====================
 # EMAIL
 # ====================
@@ -251,6 +371,9 @@ CKEDITOR_5_CONFIGS = {
         },
     }
 }
+# Images insérées dans le texte des articles : référencées par leur URL dans le HTML,
+# pas par un FileField, elles restent hors du stockage adressé par contenu
+CKEDITOR_5_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 # ====================
 # LOGGING
@@ -270,6 +393,11 @@ if IS_PRODUCTION:
                 'level': 'INFO',
                 'propagate': True,
             },
+            'administration.profilage': {
+                'handlers': ['console'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
 
@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
 from django.urls import re_path
+from administration.views import media_view, metrics_view, sante_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('sante', sante_view, name='sante'),
     path("ckeditor5/", include('django_ckeditor_5.urls')),
     path('administration/', include('administration.urls')),
     path('', include('pages.urls')),
@@ -18,11 +20,9 @@ urlpatterns = [
 # ====================
 # 🔥 MEDIA - TOUJOURS SERVIR (pas de nginx dans votre setup)
 # ====================
-# Que ce soit en DEV ou en PROD, Django sert les media
+# Que ce soit en DEV ou en PROD, Django sert les media (vue asynchrone, par blocs)
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
+    re_path(r'^media/(?P<path>.*)$', media_view, name='media'),
 ]
 
 # ====================
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.services import NotificationService
+
+
+class Command(BaseCommand):
+    help = 'Envoie en arrière-plan les emails de notification mis en file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Envoie les emails en attente puis s\'arrête',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Délai (secondes) entre deux consultations de la file vide',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker d\'emails démarré...')
+        total_envoyes = total_echecs = 0
+
+        while True:
+            envoyes, echecs = NotificationService.envoyer_emails_en_attente()
+            total_envoyes += envoyes
+            total_echecs += echecs
+            if echecs:
+                self.stdout.write(self.style.ERROR(f'{echecs} email(s) en échec'))
+
+            if not envoyes and not echecs:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'File des emails vide : {total_envoyes} envoyé(s), {total_echecs} échec(s).'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_preferencenotification_notification_date_lecture_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['destinataire', '-date_creation', 'id'], name='notificatio_destina_4fbb3c_idx'),
+        ),
+    ]
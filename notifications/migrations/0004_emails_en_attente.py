@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_en_attente',
+            field=models.BooleanField(default=False, verbose_name='Email en attente'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('email_en_attente', True)), fields=['id'], name='notif_email_attente_idx'),
+        ),
+    ]
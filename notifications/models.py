@@ -1,6 +1,7 @@
 # notifications/models.py
 
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -82,6 +83,8 @@ class Notification(models.Model):
     )
     lu = models.BooleanField(default=False, verbose_name="Lu")
     email_envoye = models.BooleanField(default=False, verbose_name="Email envoyé")
+    # Email à envoyer par la commande envoyer_emails (hors requête)
+    email_en_attente = models.BooleanField(default=False, verbose_name="Email en attente")
     date_creation = models.DateTimeField(auto_now_add=True)
     date_lecture = models.DateTimeField(null=True, blank=True)
 
@@ -92,6 +95,8 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['destinataire', 'lu']),
             models.Index(fields=['type_notification']),
+            models.Index(fields=['destinataire', '-date_creation', 'id']),
+            models.Index(fields=['id'], condition=Q(email_en_attente=True), name='notif_email_attente_idx'),
         ]
 
     def __str__(self):
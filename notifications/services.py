@@ -1,9 +1,10 @@
 # notifications/services.py
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.contrib.auth import get_user_model
+from administration.metrics import metriques
 from .models import Notification, PreferenceNotification
 import logging
 
@@ -81,8 +82,11 @@ class NotificationService:
         return type_mapping.get(type_notification, True)
     
     @staticmethod
-    def send_email_notification(notification):
-        """Envoie un email HTML pour une notification avec optimisations anti-spam"""
+    def send_email_notification(notification, connection=None):
+        """
+        Envoie un email HTML pour une notification avec optimisations anti-spam.
+        `connection` : connexion SMTP partagée pour les envois en lot (get_connection())
+        """
         try:
             context = {
                 'notification': notification,
@@ -117,7 +121,8 @@ class NotificationService:
                     'List-Unsubscribe': f'<{settings.SITE_URL if hasattr(settings, "SITE_URL") else "http://localhost:8000"}/notifications/preferences/>',
                     'Message-ID': f'<{notification.id}@iutessa.com>',
                     'X-Entity-ID': f'notification-{notification.id}',
-                }
+                },
+                connection=connection
             )
             
             # Ajouter le contenu HTML
@@ -125,10 +130,12 @@ class NotificationService:
             email.send(fail_silently=False)
             
             logger.info(f"Email envoyé à {notification.destinataire.email}")
+            metriques.incrementer('emails_total', statut='envoye', type=notification.type_notification)
             return True
             
         except Exception as e:
             logger.error(f"Erreur envoi email: {e}")
+            metriques.incrementer('emails_total', statut='echec', type=notification.type_notification)
             return False
     
     @staticmethod
@@ -275,4 +282,90 @@ class NotificationService:
                 message=message
             )
             notifications.append(notification)
-        return notifications
\ No newline at end of file
+        return notifications
+    
+    @staticmethod
+    def notify_documents_reviewed(decisions, validateur, commentaire=''):
+        """
+        Une notification par étudiant récapitulant les décisions d'une validation en lot.
+        `decisions` : {etudiant: [(document, valide), ...]}.
+        Notifications créées en un bulk_create, préférences lues en une requête ;
+        les emails sont mis en file et envoyés hors requête (commande envoyer_emails).
+        """
+        preferences = {
+            p.user_id: p for p in PreferenceNotification.objects.filter(
+                user_id__in=[etudiant.user_id for etudiant in decisions]
+            )
+        }
+        notifications = []
+        for etudiant, documents in decisions.items():
+            valides = [doc.get_type_document_display() for doc, valide in documents if valide]
+            rejetes = [doc.get_type_document_display() for doc, valide in documents if not valide]
+            
+            lignes = [f'✓ {nom} : validé' for nom in valides] + [f'✗ {nom} : rejeté' for nom in rejetes]
+            if rejetes:
+                if commentaire:
+                    lignes.append(f'Raison : {commentaire}')
+                lignes.append('Veuillez soumettre de nouveaux documents pour les pièces rejetées.')
+            
+            resume = []
+            if valides:
+                resume.append(f"{len(valides)} validé{'s' if len(valides) > 1 else ''}")
+            if rejetes:
+                resume.append(f"{len(rejetes)} rejeté{'s' if len(rejetes) > 1 else ''}")
+            
+            type_notification = 'document_rejete' if rejetes else 'document_valide'
+            notifications.append(Notification(
+                destinataire=etudiant.user,
+                expediteur=validateur,
+                type_notification=type_notification,
+                priorite='haute' if rejetes else 'normale',
+                titre=f"Documents examinés : {', '.join(resume)}",
+                message='\n'.join(lignes),
+                url_action='/academique/documents/',
+                # Sans préférences enregistrées : valeurs par défaut (emails documents activés)
+                email_en_attente=NotificationService.should_send_email(
+                    preferences.get(etudiant.user_id), type_notification
+                ),
+            ))
+        
+        try:
+            return Notification.objects.bulk_create(notifications)
+        except Exception as e:
+            logger.error(f"Erreur création notifications en lot: {e}")
+            return []
+    
+    @staticmethod
+    def envoyer_emails_en_attente(limite=100):
+        """
+        Envoie les emails en file sur une seule connexion SMTP ; retourne (envoyés, échecs).
+        Un email en échec est journalisé et retiré de la file ; si le serveur SMTP est
+        injoignable, les emails réservés y sont remis pour un prochain passage.
+        """
+        candidats = list(
+            Notification.objects.filter(email_en_attente=True).order_by('id').values_list('id', flat=True)[:limite]
+        )
+        # UPDATE conditionnel : un email n'est réservé que par un seul worker
+        reserves = [
+            notification_id for notification_id in candidats
+            if Notification.objects.filter(id=notification_id, email_en_attente=True).update(email_en_attente=False)
+        ]
+        if not reserves:
+            return 0, 0
+        
+        notifications = list(Notification.objects.filter(id__in=reserves).select_related('destinataire').order_by('id'))
+        envoyees = []
+        try:
+            with get_connection() as connection:
+                for notification in notifications:
+                    if NotificationService.send_email_notification(notification, connection=connection):
+                        envoyees.append(notification.id)
+        except Exception as e:
+            logger.error(f"Erreur connexion email (envoi en lot): {e}")
+            non_traitees = [n.id for n in notifications if n.id not in envoyees]
+            Notification.objects.filter(id__in=non_traitees).update(email_en_attente=True)
+            Notification.objects.filter(id__in=envoyees).update(email_envoye=True)
+            return len(envoyees), 0
+        
+        Notification.objects.filter(id__in=envoyees).update(email_envoye=True)
+        return len(envoyees), len(notifications) - len(envoyees)
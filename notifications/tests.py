@@ -1,3 +1,103 @@
+from collections import namedtuple
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
 from django.test import TestCase
+from django.shortcuts import resolve_url
+from django.urls import reverse
+
+from academique.models import DocumentEtudiant
+from .models import Notification, PreferenceNotification
+from .services import NotificationService
+
+User = get_user_model()
+
+# Seuls `user` et `user_id` de l'étudiant sont lus par notify_documents_reviewed
+Etudiant = namedtuple('Etudiant', 'user user_id')
+
+
+class EmailsEnLotTests(TestCase):
+    """Emails de la validation en lot : mis en file, envoyés par envoyer_emails"""
+
+    def setUp(self):
+        self.validateur = User.objects.create_user('validateur', role='ADMIN')
+        users = [User.objects.create_user(f'etudiant-{i}', email=f'etudiant{i}@iutessa.test') for i in range(2)]
+        self.etudiants = [Etudiant(user, user.pk) for user in users]
+        self.decisions = {
+            etudiant: [(DocumentEtudiant(type_document='photo'), True)] for etudiant in self.etudiants
+        }
+
+    def test_aucun_email_envoye_dans_la_requete(self):
+        notifications = NotificationService.notify_documents_reviewed(self.decisions, self.validateur)
+
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Notification.objects.filter(email_en_attente=True).count(), 2)
+
+    def test_preferences_respectees(self):
+        PreferenceNotification.objects.create(user=self.etudiants[0].user, email_documents=False)
+        NotificationService.notify_documents_reviewed(self.decisions, self.validateur)
+
+        self.assertEqual(
+            list(Notification.objects.filter(email_en_attente=True).values_list('destinataire__username', flat=True)),
+            ['etudiant-1'],
+        )
+
+    def test_envoi_de_la_file(self):
+        NotificationService.notify_documents_reviewed(self.decisions, self.validateur)
+
+        self.assertEqual(NotificationService.envoyer_emails_en_attente(), (2, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['etudiant0@iutessa.test', 'etudiant1@iutessa.test'])
+        self.assertEqual(Notification.objects.filter(email_envoye=True, email_en_attente=False).count(), 2)
+        self.assertEqual(NotificationService.envoyer_emails_en_attente(), (0, 0))
+
+    def test_serveur_injoignable_emails_remis_en_file(self):
+        NotificationService.notify_documents_reviewed(self.decisions, self.validateur)
+
+        with mock.patch('notifications.services.get_connection', side_effect=OSError('SMTP injoignable')):
+            self.assertEqual(NotificationService.envoyer_emails_en_attente(), (0, 0))
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Notification.objects.filter(email_en_attente=True).count(), 2)
+
+
+class VuesAsynchronesTests(TestCase):
+    """Vues asynchrones des notifications, servies par le gestionnaire ASGI"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lecteur', role='ETUDIANT')
+        autre = User.objects.create_user('autre', role='ETUDIANT')
+        for titre, priorite, lu in [('Dossier validé', 'normale', False), ('Pièce refusée', 'urgente', False),
+                                    ('Bienvenue', 'normale', True)]:
+            Notification.objects.create(destinataire=self.user, titre=titre, message='...', priorite=priorite, lu=lu)
+        Notification.objects.create(destinataire=autre, titre='Notification d’un autre', message='...')
+
+    async def test_connexion_requise(self):
+        for nom in ('notifications:list', 'notifications:ajax_unread_count', 'notifications:ajax_recent'):
+            with self.subTest(vue=nom):
+                response = await self.async_client.get(reverse(nom))
+                self.assertEqual(response.status_code, 302)
+                self.assertTrue(response['Location'].startswith(resolve_url(settings.LOGIN_URL)))
+
+    async def test_compteurs_limites_au_destinataire(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('notifications:ajax_unread_count'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'unread_count': 2, 'urgent_count': 1})
+
+        response = await self.async_client.get(reverse('notifications:ajax_recent'))
+        self.assertEqual(
+            sorted(n['titre'] for n in response.json()['notifications']), ['Dossier validé', 'Pièce refusée']
+        )
+
+    async def test_liste_rendue(self):
+        await self.async_client.aforce_login(self.user)
 
-# Create your tests here.
+        response = await self.async_client.get(reverse('notifications:list'), {'read': 'unread'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pièce refusée')
+        self.assertNotContains(response, 'Bienvenue')
+        self.assertNotContains(response, 'Notification d’un autre')
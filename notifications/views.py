@@ -3,16 +3,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Count
 from django.utils import timezone
+from datetime import timedelta
 from .models import Notification, PreferenceNotification
 from .services import NotificationService
+from administration.asynchrone import rendre, utilisateur
+from administration.pagination import apaginer
 
 @login_required
-def notification_list(request):
+async def notification_list(request):
     """Liste des notifications avec filtres"""
-    notifications = request.user.notifications.all()
+    user = await utilisateur(request)
+    notifications = user.notifications.all()
     
     # Filtrage
     filter_type = request.GET.get('type', '')
@@ -30,34 +33,33 @@ def notification_list(request):
             notifications = notifications.filter(lu=True)
     
     # Pagination
-    paginator = Paginator(notifications, 20)
-    page = request.GET.get('page')
-    notifications = paginator.get_page(page)
+    notifications = await apaginer(request, notifications, ('-date_creation', 'id'), 20)
     
-    # Stats calculées
-    total_count = request.user.notifications.count()
-    unread_count = request.user.notifications.filter(lu=False).count()
+    # Stats calculées (une seule requête)
+    week_ago = timezone.now() - timedelta(days=7)
+    stats = await user.notifications.aaggregate(
+        total_count=Count('id'),
+        unread_count=Count('id', filter=Q(lu=False)),
+        week_count=Count('id', filter=Q(date_creation__gte=week_ago)),
+    )
+    total_count = stats['total_count']
+    unread_count = stats['unread_count']
     read_count = total_count - unread_count
     read_percentage = (read_count / total_count * 100) if total_count > 0 else 0
     
-    # Stats cette semaine
-    from datetime import timedelta
-    week_ago = timezone.now() - timedelta(days=7)
-    week_count = request.user.notifications.filter(date_creation__gte=week_ago).count()
-    
     context = {
         'notifications': notifications,
         'total_count': total_count,
         'unread_count': unread_count,
         'read_count': read_count,
         'read_percentage': read_percentage,
-        'week_count': week_count,
+        'week_count': stats['week_count'],
         'filter_type': filter_type,
         'filter_priority': filter_priority,
         'filter_read': filter_read,
     }
     
-    return render(request, 'notifications/notification_list.html', context)
+    return await rendre(request, 'notifications/notification_list.html', context)
 
 @login_required
 def notification_detail(request, pk):
@@ -135,24 +137,22 @@ def ajax_delete_notification(request, pk):
 
 
 @login_required
-def ajax_unread_count(request):
+async def ajax_unread_count(request):
     """Retourne le nombre de notifications non lues"""
-    count = request.user.notifications.filter(lu=False).count()
-    urgent_count = request.user.notifications.filter(
-        lu=False, 
-        priorite__in=['haute', 'urgente']
-    ).count()
+    user = await request.auser()
+    compteurs = await user.notifications.filter(lu=False).aaggregate(
+        unread_count=Count('id'),
+        urgent_count=Count('id', filter=Q(priorite__in=['haute', 'urgente'])),
+    )
     
-    return JsonResponse({
-        'unread_count': count,
-        'urgent_count': urgent_count
-    })
+    return JsonResponse(compteurs)
 
 
 @login_required
-def ajax_recent_notifications(request):
+async def ajax_recent_notifications(request):
     """Retourne les notifications récentes pour l'affichage en dropdown"""
-    notifications = request.user.notifications.filter(lu=False)[:5]
+    user = await request.auser()
+    notifications = user.notifications.filter(lu=False)[:5]
     
     data = [{
         'id': n.id,
@@ -163,6 +163,6 @@ def ajax_recent_notifications(request):
         'icone': n.icone,
         'date': n.date_creation.strftime('%d/%m %H:%M'),
         'url': n.url_action
-    } for n in notifications]
+    } async for n in notifications]
     
-    return JsonResponse({'notifications': data})
\ No newline at end of file
+    return JsonResponse({'notifications': data})
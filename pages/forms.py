@@ -9,6 +9,9 @@ from .models import Post, PostImage, PostDocument, Comment
 class PostForm(forms.ModelForm):
     """Formulaire principal pour créer/éditer un article"""
     
+    # Vidéo déjà envoyée par fragments (administration/televersements.py)
+    video_televersement = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    
     class Meta:
         model = Post
         fields = [
@@ -86,7 +89,7 @@ class PostForm(forms.ModelForm):
         """Validation globale"""
         cleaned_data = super().clean()
         video_url = cleaned_data.get('video_url')
-        video_file = cleaned_data.get('video_file')
+        video_file = cleaned_data.get('video_file') or cleaned_data.get('video_televersement')
         
         # Ne pas avoir les deux en même temps
         if video_url and video_file:
@@ -172,6 +172,9 @@ class Comment(models.Model):
         verbose_name = "Commentaire"
         verbose_name_plural = "Commentaires"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Commentaire de {self.author_name} sur {self.post.title}"
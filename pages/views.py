@@ -1,8 +1,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, F, Count
 from django.utils import timezone
 from django.contrib import messages
+from django.http import Http404
+from administration.asynchrone import lister, rendre
+from administration.limitation import limiter
 from .models import Post, Category, Comment, Project, Event, Course
 
 # ============================================
@@ -49,11 +52,13 @@ def page_404_view(request, exception=None):
 # BLOG
 # ============================================
 
-def blog_view(request):
+async def blog_view(request):
     search_query = request.GET.get('search', '')
     category_slug = request.GET.get('category', '')
     
-    posts = Post.objects.filter(status='published').order_by('-published_at')
+    posts = Post.objects.filter(status='published').select_related('author', 'category').annotate(
+        nb_commentaires=Count('comments')
+    ).order_by('-published_at')
     
     if search_query:
         posts = posts.filter(
@@ -66,25 +71,37 @@ def blog_view(request):
         posts = posts.filter(category__slug=category_slug)
     
     paginator = Paginator(posts, 4)  # 4 articles par page
+    # Total compté sans bloquer : get_page() ne relance pas de COUNT
+    paginator.count = await posts.acount()
     page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = await lister(page_obj.object_list)
     
-    categories = Category.objects.all()
-    recent_posts = Post.objects.filter(status='published').order_by('-published_at')[:3]
+    categories = await lister(Category.objects.all())
+    recent_posts = await lister(
+        Post.objects.filter(status='published').select_related('author').order_by('-published_at')[:3]
+    )
     
-    return render(request, 'pages/blog.html', {
+    return await rendre(request, 'pages/blog.html', {
         'posts': page_obj,
         'categories': categories,
         'recent_posts': recent_posts,
     })
 
-def blog_detail_view(request, slug):
+# Commentaires (POST) limités par adresse IP ; la lecture de l'article n'est pas comptée
+@limiter('commentaire', ip='5/m')
+async def blog_detail_view(request, slug):
     from .forms import CommentForm
     
-    post = get_object_or_404(Post, slug=slug, status='published')
+    try:
+        post = await Post.objects.select_related('author', 'category').prefetch_related(
+            'images', 'documents'
+        ).aget(slug=slug, status='published')
+    except Post.DoesNotExist:
+        raise Http404("Article introuvable")
     
-    # Incrémenter les vues
+    # Incrémenter les vues (UPDATE atomique, sans relire l'article)
+    await Post.objects.filter(pk=post.pk).aupdate(views_count=F('views_count') + 1)
     post.views_count += 1
-    post.save(update_fields=['views_count'])
     
     # Traiter les commentaires
     if request.method == 'POST':
@@ -92,7 +109,7 @@ def blog_detail_view(request, slug):
         if form.is_valid():
             comment = form.save(commit=False)
             comment.post = post
-            comment.save()
+            await comment.asave()
             messages.success(request, 'Votre commentaire a été soumis et sera publié après modération.')
             return redirect('pages:blog_detail', slug=slug)
         else:
@@ -101,15 +118,15 @@ def blog_detail_view(request, slug):
         form = CommentForm()
     
     # Articles similaires
-    related_posts = Post.objects.filter(
+    related_posts = await lister(Post.objects.filter(
         status='published',
         category=post.category
-    ).exclude(id=post.id)[:3]
+    ).exclude(id=post.id)[:3])
     
     # Commentaires approuvés
-    comments = post.comments.filter(is_approved=True)
+    comments = await lister(post.comments.filter(is_approved=True))
     
-    return render(request, 'pages/standard_post.html', {
+    return await rendre(request, 'pages/standard_post.html', {
         'post': post,
         'related_posts': related_posts,
         'comments': comments,
@@ -140,4 +140,32 @@ class AdminUserEditForm(forms.ModelForm):
             'is_active': forms.CheckboxInput(attrs={
                 'class': 'rounded border-gray-300 text-blue-600 focus:ring-blue-500'
             }),
-        }
\ No newline at end of file
+        }
+
+class FiltreUtilisateursForm(forms.Form):
+    """Filtres de la liste des utilisateurs (admin)"""
+    
+    recherche = forms.CharField(
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500',
+            'placeholder': 'Rechercher par identifiant, e-mail, nom...'
+        })
+    )
+    
+    role = forms.ChoiceField(
+        choices=[('', 'Tous les rôles')] + User.ROLE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500'
+        })
+    )
+    
+    actif = forms.ChoiceField(
+        choices=[('', 'Tous les statuts'), ('1', 'Actifs'), ('0', 'Inactifs')],
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500'
+        })
+    )
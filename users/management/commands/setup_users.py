@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from users.signals import create_default_groups
+from users.roles import create_default_groups
 
 User = get_user_model()
 
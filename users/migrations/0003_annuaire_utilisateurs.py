@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+# Recherche de l'annuaire (users/search.py) : `icontains` génère UPPER(col::text) LIKE ...
+INDEX_POSTGRESQL = [
+    (f'user_{champ}_trgm',
+     f'CREATE INDEX IF NOT EXISTS user_{champ}_trgm ON users_user '
+     f'USING gin ((UPPER({champ}::text)) gin_trgm_ops)')
+    for champ in ('username', 'email', 'first_name', 'last_name')
+]
+
+
+def creer_index_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in INDEX_POSTGRESQL:
+        schema_editor.execute(sql)
+
+
+def supprimer_index_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom, _ in INDEX_POSTGRESQL:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nom}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', 'id'], name='user_inscription_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', '-date_joined', 'id'], name='user_role_inscription_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', '-date_joined', 'id'], name='user_actif_inscription_idx'),
+        ),
+        migrations.RunPython(creer_index_postgresql, supprimer_index_postgresql),
+    ]
@@ -69,6 +69,12 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Utilisateur'
         verbose_name_plural = 'Utilisateurs'
+        indexes = [
+            # Pagination par curseur de la liste admin, avec ou sans filtre rôle / actif
+            models.Index(fields=['-date_joined', 'id'], name='user_inscription_idx'),
+            models.Index(fields=['role', '-date_joined', 'id'], name='user_role_inscription_idx'),
+            models.Index(fields=['is_active', '-date_joined', 'id'], name='user_actif_inscription_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
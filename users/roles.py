@@ -0,0 +1,125 @@
+# users/roles.py
+"""
+Groupes et permissions des rôles.
+
+Chaque rôle correspond à un groupe (Administrateurs, Étudiants, Visiteurs) qui
+porte ses permissions : un utilisateur les reçoit par son appartenance au
+groupe, une seule ligne de liaison, sans ligne par permission.
+
+Les identifiants des groupes sont gardés en mémoire du processus après leur
+première lecture (mémorisation au commit : un groupe créé dans une
+transaction annulée n'est jamais retenu) et oubliés à toute modification d'un
+groupe. La création d'un utilisateur coûte alors une seule insertion dans la
+table de liaison.
+
+Imports en masse : bulk_create n'envoie pas de signaux ; ajouter_au_groupe()
+rattache des milliers d'utilisateurs en un bulk_create sur la table de
+liaison. Pour des créations une à une (get_or_create, save), les signaux
+peuvent être suspendus avec roles_differes() puis les groupes attribués en
+une fois à la fin.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+User = get_user_model()
+
+GROUPES_ROLES = {
+    'ADMIN': 'Administrateurs',
+    'ETUDIANT': 'Étudiants',
+    'VISITEUR': 'Visiteurs',
+}
+
+# Codenames des permissions de chaque groupe (None : toutes les permissions)
+PERMISSIONS_ROLES = {
+    'ADMIN': None,
+    'ETUDIANT': ['view_user', 'change_user'],
+    'VISITEUR': ['view_user'],
+}
+
+TAILLE_LOT = 1000
+
+_groupes = {}
+_differes = ContextVar('roles_differes', default=False)
+
+
+def create_default_groups():
+    """
+    Crée les groupes par défaut avec leurs permissions ; retourne {rôle: id du groupe}
+    """
+    existants = dict(Group.objects.filter(name__in=GROUPES_ROLES.values()).values_list('name', 'id'))
+    ids = {}
+    for role, nom in GROUPES_ROLES.items():
+        if nom not in existants:
+            groupe, cree = Group.objects.get_or_create(name=nom)
+            if cree:
+                codenames = PERMISSIONS_ROLES[role]
+                permissions = Permission.objects.all()
+                if codenames is not None:
+                    permissions = permissions.filter(codename__in=codenames)
+                groupe.permissions.set(permissions)
+            existants[nom] = groupe.id
+        ids[role] = existants[nom]
+    return ids
+
+
+def groupes_roles():
+    """{rôle: id du groupe}, lus (ou créés) une fois puis gardés en mémoire"""
+    if len(_groupes) == len(GROUPES_ROLES):
+        return _groupes
+    ids = create_default_groups()
+    # Retenus seulement une fois validés en base (immédiatement hors transaction)
+    transaction.on_commit(lambda: _groupes.update(ids))
+    return ids
+
+
+def oublier_groupes(**kwargs):
+    _groupes.clear()
+
+
+def completer_groupe_admin(using='default', **kwargs):
+    """Après migrate : permissions des nouveaux modèles ajoutées au groupe Administrateurs"""
+    groupe = Group.objects.using(using).filter(name=GROUPES_ROLES['ADMIN']).first()
+    if groupe is not None:
+        groupe.permissions.add(*Permission.objects.using(using).exclude(group=groupe))
+
+
+def ajouter_au_groupe(role, user_ids, batch_size=TAILLE_LOT):
+    """Rattache des utilisateurs au groupe du rôle : un bulk_create sur la table de liaison"""
+    groupe_id = groupes_roles().get(role)
+    if groupe_id is None:
+        return 0
+    liens = [User.groups.through(user_id=user_id, group_id=groupe_id) for user_id in user_ids]
+    User.groups.through.objects.bulk_create(liens, batch_size=batch_size, ignore_conflicts=True)
+    return len(liens)
+
+
+def attribuer_roles(users):
+    """Rattache chaque utilisateur au groupe de son rôle, un bulk_create par rôle"""
+    par_role = {}
+    for user in users:
+        par_role.setdefault(user.role, []).append(user.pk)
+    return sum(ajouter_au_groupe(role, ids) for role, ids in par_role.items())
+
+
+@contextmanager
+def roles_differes():
+    """Suspend l'attribution des groupes à la création (à faire ensuite via attribuer_roles)"""
+    jeton = _differes.set(True)
+    try:
+        yield
+    finally:
+        _differes.reset(jeton)
+
+
+def roles_suspendus():
+    return _differes.get()
+
+
+post_save.connect(oublier_groupes, sender=Group, dispatch_uid='roles_groupe_save')
+post_delete.connect(oublier_groupes, sender=Group, dispatch_uid='roles_groupe_delete')
+post_migrate.connect(completer_groupe_admin, dispatch_uid='roles_groupe_admin')
@@ -0,0 +1,24 @@
+# users/search.py
+"""
+Recherche indexée des utilisateurs (annuaire de l'administration).
+
+Chaque mot saisi doit figurer dans l'identifiant, l'e-mail, le prénom ou le
+nom (sans tenir compte de la casse). Sous PostgreSQL, les LIKE '%mot%' sont
+servis par des index GIN pg_trgm sur UPPER(colonne), l'expression même
+générée par `icontains` (migration users 0003). Sous SQLite (développement),
+la recherche parcourt la table.
+"""
+from django.db.models import Q
+
+CHAMPS_RECHERCHE = ('username', 'email', 'first_name', 'last_name')
+
+
+def rechercher_utilisateurs(queryset, terme):
+    """Filtre `queryset` : tous les mots de `terme` présents dans au moins un champ"""
+    condition = Q()
+    for mot in (terme or '').split():
+        condition_mot = Q()
+        for champ in CHAMPS_RECHERCHE:
+            condition_mot |= Q(**{f'{champ}__icontains': mot})
+        condition &= condition_mot
+    return queryset.filter(condition)
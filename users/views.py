@@ -5,10 +5,16 @@ from django.contrib import messages
 from django.contrib.auth.forms import PasswordChangeForm
 from django.views.generic import TemplateView
 from django.utils.decorators import method_decorator
-from .forms import CustomLoginForm, UserProfileForm
+from django.db.models import Count
+from administration.limitation import limiter
+from administration.pagination import paginer
+from .forms import CustomLoginForm, UserProfileForm, FiltreUtilisateursForm
 from .decorators import role_required
+from .search import rechercher_utilisateurs
 
 
+# Limite vérifiée avant authenticate() (hachage PBKDF2) et toute lecture en base
+@limiter('connexion', ip='30/m', identifiant='10/10m')
 def login_view(request):
     """Vue de connexion"""
     if request.user.is_authenticated:
@@ -99,18 +105,36 @@ def change_password_view(request):
 
 @role_required('ADMIN')
 def admin_users_list(request):
-    """Liste des utilisateurs (admin seulement)"""
+    """Liste des utilisateurs (admin seulement), paginée par curseur"""
     from django.contrib.auth import get_user_model
     User = get_user_model()
     
-    users = User.objects.all().order_by('-date_joined')
+    users = User.objects.only(
+        'id', 'username', 'email', 'first_name', 'last_name', 'role',
+        'is_active', 'is_superuser', 'date_joined', 'last_login',
+    )
+    
+    # Filtres servis par les index (role | is_active, -date_joined, id) et la recherche indexée
+    form = FiltreUtilisateursForm(request.GET)
+    if form.is_valid():
+        if form.cleaned_data['role']:
+            users = users.filter(role=form.cleaned_data['role'])
+        if form.cleaned_data['actif']:
+            users = users.filter(is_active=form.cleaned_data['actif'] == '1')
+        users = rechercher_utilisateurs(users, form.cleaned_data['recherche'])
+    
+    users = paginer(request, users, ('-date_joined', 'id'), 25)
+    
+    # Effectifs par rôle en une requête groupée
+    par_role = dict(User.objects.values_list('role').annotate(n=Count('id')).order_by())
     
     context = {
         'users': users,
-        'total_users': users.count(),
-        'admin_count': users.filter(role='ADMIN').count(),
-        'etudiant_count': users.filter(role='ETUDIANT').count(),
-        'visiteur_count': users.filter(role='VISITEUR').count(),
+        'form': form,
+        'total_users': sum(par_role.values()),
+        'admin_count': par_role.get('ADMIN', 0),
+        'etudiant_count': par_role.get('ETUDIANT', 0),
+        'visiteur_count': par_role.get('VISITEUR', 0),
     }
     
     return render(request, 'users/admin_users_list.html', context)